@@ -0,0 +1,82 @@
+"""Inline and block parsing time on adversarial inputs.
+
+Each case builds a pathological input at several sizes and times
+`text_to_textnodes()` (or `markdown_to_html_node()` for block cases). For a
+linear-time parser, time per KB stays flat as the input grows; a case whose
+time per KB grows more than `--superlinear` times from the smallest to the
+largest size is flagged, and the script exits with status 1.
+
+Inputs that are invalid markdown (such as unbalanced `**`) count the time
+until the parser rejects them.
+
+Usage:
+    python3 src/bench_adversarial.py [--sizes 1000,10000,100000]
+
+"""
+import argparse
+import sys
+import time
+
+from main import markdown_to_html_node
+from markdown_inline import text_to_textnodes
+
+CASES = {
+    'nested brackets': (text_to_textnodes, lambda n: '[' * n + 'x' + ']' * n),
+    'nested images': (text_to_textnodes, lambda n: '![' * n + 'x' + '](u)' * n),
+    'unclosed link urls': (text_to_textnodes, lambda n: '[a](' * n),
+    'many links': (text_to_textnodes, lambda n: 'see [a](/b) ' * n),
+    'many images': (text_to_textnodes, lambda n: '![a](/b.png) ' * n),
+    'bracket then long text': (text_to_textnodes, lambda n: '[a' * (n // 10) + 'x' * n),
+    'unbalanced bold': (text_to_textnodes, lambda n: '**a ' * n + '**'),
+    'unbalanced italic': (text_to_textnodes, lambda n: '_a ' * n + '_'),
+    'long line': (text_to_textnodes, lambda n: 'word ' * n),
+    'long heading': (markdown_to_html_node, lambda n: '#' * 6 + ' ' + 'x' * n),
+    'hash run': (markdown_to_html_node, lambda n: '#' * n),
+    'long list': (markdown_to_html_node, lambda n: '\n'.join(f'{i}. item' for i in range(1, n // 8 + 2))),
+    'many blocks': (markdown_to_html_node, lambda n: 'p\n\n' * (n // 3)),
+}
+
+
+def time_case(func, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            func(text)
+        except Exception:
+            pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000', help="comma-separated repetition counts")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case and size; the best is reported")
+    parser.add_argument('--superlinear', type=float, default=3.0,
+                        help="flag cases whose time per KB grows by more than this factor")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"{'case':<24} {'size':>8} {'KB':>9} {'ms':>10} {'us/KB':>9}")
+    failed = []
+    for name, (func, make) in CASES.items():
+        per_kb = []
+        for size in sizes:
+            text = make(size)
+            elapsed = time_case(func, text, args.repeat)
+            kb = max(len(text) / 1024, 1e-9)
+            per_kb.append(elapsed / kb)
+            print(f"{name:<24} {size:>8} {kb:>9.1f} {elapsed * 1000:>10.2f} {elapsed / kb * 1e6:>9.1f}")
+        growth = per_kb[-1] / per_kb[0] if per_kb[0] else 0
+        if growth > args.superlinear:
+            failed.append(name)
+            print(f"  superlinear: time per KB grew {growth:.1f}x")
+    if failed:
+        print(f"Superlinear cases: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""Memory of a `DocumentArena` compared with the equivalent node tree.
+
+Parses the mixed blocks of `bench_bytes_pipeline` into a node tree, converts
+it with `DocumentArena.from_node()` and reports the bytes held by each, in
+total and per node. The structure columns leave out the text itself: the
+characters in the tree's value strings and the arena's shared buffer.
+
+Usage:
+    python3 src/bench_arena.py [--blocks 2000]
+
+"""
+import argparse
+import sys
+
+from arena import DocumentArena, node_tree_nbytes
+from bench_bytes_pipeline import BLOCKS
+from main import markdown_to_html_node
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=2000, help="markdown blocks in the page")
+    args = parser.parse_args()
+    markdown = "# Benchmark page\n\n" + ''.join(BLOCKS[i % len(BLOCKS)] for i in range(args.blocks))
+    node = markdown_to_html_node(markdown)
+    arena = DocumentArena.from_node(node)
+    text_bytes = sys.getsizeof(arena.text)
+    rows = (('nodes', node_tree_nbytes(node)), ('arena', arena.nbytes()))
+    print(f"{len(arena)} nodes, {len(arena.text)} characters of text")
+    print(f"{'form':<8} {'KiB':>9} {'bytes/node':>11} {'structure/node':>15}")
+    for name, total in rows:
+        print(f"{name:<8} {total / 1024:>9.1f} {total / len(arena):>11.1f} "
+              f"{(total - text_bytes) / len(arena):>15.1f}")
+    print(f"arena is {rows[0][1] / rows[1][1]:.1f}x smaller, "
+          f"{(rows[0][1] - text_bytes) / (rows[1][1] - text_bytes):.1f}x without the text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Throughput of the str pipeline versus the memory-mapped streaming pipeline.
+
+Generates synthetic markdown sources of the requested sizes, renders each
+with `generate_page()` and `generate_page_streaming()`, checks that both
+produce identical output, and reports MB/s and peak RSS growth.
+
+Usage:
+    python3 src/bench_bytes_pipeline.py [--sizes 1,16,128] [--keep]
+
+Sizes are in MB; pass `--sizes 1,16,128,1024` for the full 1 MB to 1 GB
+sweep (the 1 GB case needs several minutes and a few GB of RAM for the str
+pipeline).
+
+"""
+import argparse
+import filecmp
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+from main import generate_page, generate_page_streaming
+
+BLOCKS = [
+    "## Section heading with **bold** text\n\n",
+    "A paragraph of prose with _italic_ words, `inline code`, a [link](/blog/tom) "
+    "and an ![image](/images/tom.png) spread over\nseveral source lines so the "
+    "paragraph joiner has work to do.\n\n",
+    "> A quoted line from the legendarium\n> and a second quoted line\n\n",
+    "- first item\n- second item with **bold**\n- third item\n\n",
+    "1. one\n2. two\n3. three\n\n",
+    "```\ndef code():\n    return 'block'\n```\n\n",
+]
+
+
+def write_source(path, size):
+    """Write a markdown file of roughly `size` bytes."""
+    chunk = ''.join(BLOCKS).encode('utf-8')
+    with open(path, 'wb') as file:
+        file.write(b"# Benchmark page\n\n")
+        written = 0
+        while written < size:
+            file.write(chunk)
+            written += len(chunk)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1,16,128', help="comma-separated source sizes in MB")
+    parser.add_argument('--keep', action='store_true', help="keep the generated files")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    tmp = tempfile.mkdtemp(prefix='bench_bytes_')
+    template = os.path.join(tmp, 'template.html')
+    with open(template, 'w') as file:
+        file.write("<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>")
+    print(f"{'size':>8} {'pipeline':<10} {'seconds':>9} {'MB/s':>8} {'peak RSS':>10}")
+    try:
+        for size_mb in sizes:
+            source = os.path.join(tmp, f'{size_mb}.md')
+            write_source(source, size_mb * 1024 * 1024)
+            actual_mb = os.path.getsize(source) / (1024 * 1024)
+            # Run the streaming pipeline first so its peak RSS is not masked
+            # by the str pipeline's.
+            runs = [
+                ('bytes', generate_page_streaming, os.path.join(tmp, f'{size_mb}.bytes.html')),
+                ('str', generate_page, os.path.join(tmp, f'{size_mb}.str.html')),
+            ]
+            for name, func, dest in runs:
+                elapsed = timed(func, source, '/', template, dest)
+                print(f"{size_mb:>6}MB {name:<10} {elapsed:>9.2f} {actual_mb / elapsed:>8.1f} {peak_rss_mb():>8.0f}MB")
+            if not filecmp.cmp(runs[0][2], runs[1][2], shallow=False):
+                print("  WARNING: outputs differ")
+            if not args.keep:
+                for _, _, dest in runs:
+                    os.remove(dest)
+                os.remove(source)
+    finally:
+        if not args.keep:
+            shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
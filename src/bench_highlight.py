@@ -0,0 +1,79 @@
+"""Cost of build-time highlighting on pages dominated by code blocks.
+
+Renders synthetic pages made mostly of fenced code blocks, drawn from a
+small pool of samples so that most of them repeat across pages, plus one
+unique block per page. Each page is parsed and serialized in three modes:
+
+- plain: the same blocks without a language, so nothing is highlighted
+- cold: highlighted with an empty cache
+- warm: highlighted again, with every sample already cached
+
+Usage:
+    python3 src/bench_highlight.py [--pages 200] [--blocks 30] [--repeat 5]
+
+"""
+import argparse
+import time
+
+import highlight
+from main import markdown_to_html_node
+
+SAMPLES = [
+    ('python', 'def fib(n):\n    """Return the n-th Fibonacci number."""\n    a, b = 0, 1\n'
+               '    for _ in range(n):\n        a, b = b, a + b  # step\n    return a\n'),
+    ('python', '@dataclass\nclass Point:\n    x: float = 0.0\n    y: float = 0.0\n'
+               '    def norm(self):\n        return (self.x ** 2 + self.y ** 2) ** 0.5\n'),
+    ('js', 'function debounce(fn, ms) {\n  let timer = null;\n  return (...args) => {\n'
+           '    clearTimeout(timer); // restart\n    timer = setTimeout(() => fn(...args), ms);\n  };\n}\n'),
+    ('bash', 'for f in *.md; do\n  echo "building $f"  # progress\n  python3 src/main.py --only "$f"\ndone\n'),
+    ('json', '{"name": "site", "pages": 1200, "draft": false, "tags": ["lotr", "tolkien"], "ratio": 0.75}\n'),
+]
+
+
+def build_pages(pages, blocks, language=True):
+    result = []
+    for page in range(pages):
+        parts = [f"# Code page {page}\n\nSome prose before the samples.\n\n"]
+        for block in range(blocks):
+            lang, code = SAMPLES[(page + block) % len(SAMPLES)]
+            parts.append(f"```{lang if language else ''}\n{code}```\n\n")
+        unique = f"value_{page} = {page} * 2  # unique to page {page}\n"
+        parts.append(f"```{'python' if language else ''}\n{unique}```\n")
+        result.append(''.join(parts))
+    return result
+
+
+def render_all(pages):
+    start = time.perf_counter()
+    for markdown in pages:
+        markdown_to_html_node(markdown).to_html()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200, help="pages rendered per mode")
+    parser.add_argument('--blocks', type=int, default=30, help="repeated code blocks per page")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per mode; the best is reported")
+    args = parser.parse_args()
+    plain_pages = build_pages(args.pages, args.blocks, language=False)
+    pages = build_pages(args.pages, args.blocks)
+    highlighter = highlight.HIGHLIGHTER
+
+    plain = min(render_all(plain_pages) for _ in range(args.repeat))
+    cold_runs = []
+    for _ in range(args.repeat):
+        highlighter.cache.clear()
+        cold_runs.append(render_all(pages))
+    cold = min(cold_runs)
+    highlighter.hits = highlighter.misses = 0
+    warm = min(render_all(pages) for _ in range(args.repeat))
+    print(f"{args.pages} pages x {args.blocks + 1} code blocks, {len(SAMPLES) + args.pages} distinct samples")
+    print(f"{'mode':<8} {'ms/page':>8} {'vs plain':>9}")
+    for name, elapsed in (('plain', plain), ('cold', cold), ('warm', warm)):
+        print(f"{name:<8} {elapsed * 1000 / args.pages:>8.3f} {100 * (elapsed / plain - 1):>+8.1f}%")
+    print(f"warm cache: {highlighter.hits} hits, {highlighter.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Cost of escaping text and attribute values during serialization.
+
+Serializes synthetic pages with `to_html()` twice: as shipped, and with
+`LeafNode.to_html()` and `HTMLNode.props_to_html()` replaced by their
+versions from before escaping was added. Two pages are measured:
+
+- prose: the mixed blocks of `bench_bytes_pipeline`, where few values
+  contain anything to escape
+- code: the same page with every fourth block replaced by a code sample
+  full of `<`, `>` and `&`
+
+The target is an escaping cost in the low single-digit percent of
+serialization time. It is not met: prose pages measure +8-10%, most of it
+the call to `escape_text()` made for every leaf, and code-dense pages
++20-30%. Every code sample there contains all three special characters, so
+the fast path never applies and each sample goes through `str.translate()`,
+which looks up every character after the first special one in the table,
+about 2 µs per sample.
+
+Usage:
+    python3 src/bench_html_escape.py [--blocks 2000] [--repeat 20]
+
+"""
+import argparse
+
+import htmlnode
+from bench_bytes_pipeline import BLOCKS
+from bench_html_minify import best_of
+from main import markdown_to_html_node
+
+CODE_BLOCK = "```\nif (a < b && b > c) { x = a & mask; } // <tag attr=\"v\">\n```\n\n"
+
+
+def unescaped_leaf_to_html(self, minifier=None):
+    if self.value is None:
+        raise ValueError("Value is None!")
+    if self.tag is None:
+        return self.value
+    html_str = f"<{self.tag}"
+    if self.props is not None:
+        html_str += self.props_to_html()
+    html_str += f">{self.value}</{self.tag}>"
+    return html_str
+
+
+def unescaped_props_to_html(self, minifier=None):
+    props_str = ""
+    if self.props is not None:
+        props_str += ' ' + ' '.join(f"{k}=\"{v}\"" for k, v in self.props.items())
+    return props_str
+
+
+def measure(node, repeat):
+    # The two modes alternate, so drift in the machine's speed affects both.
+    leaf_to_html, props_to_html = htmlnode.LeafNode.to_html, htmlnode.HTMLNode.props_to_html
+    raw_time = escaped_time = None
+    for _ in range(repeat):
+        escaped_run, escaped = best_of(1, node.to_html)
+        htmlnode.LeafNode.to_html = unescaped_leaf_to_html
+        htmlnode.HTMLNode.props_to_html = unescaped_props_to_html
+        try:
+            raw_run, raw = best_of(1, node.to_html)
+        finally:
+            htmlnode.LeafNode.to_html, htmlnode.HTMLNode.props_to_html = leaf_to_html, props_to_html
+        raw_time = raw_run if raw_time is None else min(raw_time, raw_run)
+        escaped_time = escaped_run if escaped_time is None else min(escaped_time, escaped_run)
+    return raw_time, escaped_time, len(escaped) - len(raw)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=2000, help="markdown blocks per page")
+    parser.add_argument('--repeat', type=int, default=20, help="runs per mode; the best is reported")
+    args = parser.parse_args()
+    prose = ''.join(BLOCKS[i % len(BLOCKS)] for i in range(args.blocks))
+    code = ''.join(CODE_BLOCK if i % 4 == 0 else BLOCKS[i % len(BLOCKS)] for i in range(args.blocks))
+    print(f"{'page':<8} {'raw ms':>8} {'escaped ms':>11} {'overhead':>9} {'bytes added':>12}")
+    for name, markdown in (('prose', prose), ('code', code)):
+        node = markdown_to_html_node("# Benchmark page\n\n" + markdown)
+        raw_time, escaped_time, added = measure(node, args.repeat)
+        print(f"{name:<8} {raw_time * 1000:>8.2f} {escaped_time * 1000:>11.2f} "
+              f"{100 * (escaped_time / raw_time - 1):>+8.1f}% {added:>12}")
+
+
+if __name__ == "__main__":
+    main()
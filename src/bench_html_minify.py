@@ -0,0 +1,47 @@
+"""Serialization cost of minified HTML output.
+
+Renders a synthetic page with `to_html()` and `to_html(HtmlMinifier())` and
+reports the time per page, the output sizes and the relative overhead of the
+minified mode.
+
+Usage:
+    python3 src/bench_html_minify.py [--blocks 2000] [--repeat 20]
+
+"""
+import argparse
+import time
+
+from bench_bytes_pipeline import BLOCKS
+from html_minify import HtmlMinifier
+from main import markdown_to_html_node
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=2000, help="markdown blocks in the page")
+    parser.add_argument('--repeat', type=int, default=20, help="runs per mode; the best is reported")
+    args = parser.parse_args()
+    markdown = "# Benchmark page\n\n" + ''.join(BLOCKS[i % len(BLOCKS)] for i in range(args.blocks))
+    node = markdown_to_html_node(markdown)
+
+    plain_time, plain = best_of(args.repeat, node.to_html)
+    minified_time, minified = best_of(args.repeat, lambda: node.to_html(HtmlMinifier()))
+    print(f"{'mode':<10} {'ms':>8} {'bytes':>10}")
+    print(f"{'plain':<10} {plain_time * 1000:>8.2f} {len(plain):>10}")
+    print(f"{'minified':<10} {minified_time * 1000:>8.2f} {len(minified):>10}")
+    print(f"size {100 * (1 - len(minified) / len(plain)):.1f}% smaller, "
+          f"serialization {100 * (minified_time / plain_time - 1):+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""End-to-end build scaling over synthetic corpora.
+
+For each page count a deterministic corpus is generated (see `corpus`) and
+built through `main()` in a fresh child process, so peak RSS is measured per
+build. Wall time, peak RSS, pages/sec and output bytes are printed as a table
+and optionally written as CSV and JSON for plotting. A build whose time per
+page grows more than `--superlinear` times over the smallest run with at
+least 100 pages is flagged.
+
+Usage:
+    python3 src/bench_scaling.py [--pages 10,1000,10000,100000] [--csv out.csv] [--json out.json]
+
+The 100k page case needs several minutes and a few GB of disk.
+
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import CorpusSpec, generate_corpus
+
+FIELDS = ['pages', 'source_bytes', 'wall_seconds', 'pages_per_second', 'ms_per_page',
+          'peak_rss_mb', 'bytes_written', 'files_written']
+
+
+def output_size(root):
+    total = files = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+            files += 1
+    return total, files
+
+
+def run_worker(site_root, build_args):
+    """Build the site in `site_root` and print the measurements as JSON."""
+    from main import main as build_main
+    os.chdir(site_root)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        build_main(build_args)
+        elapsed = time.perf_counter() - start
+    written, files = output_size('docs')
+    print(json.dumps({
+        'wall_seconds': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'bytes_written': written,
+        'files_written': files,
+    }))
+
+
+def measure(pages, spec_args, build_args, tmp):
+    site_root = os.path.join(tmp, f'site-{pages}')
+    spec = CorpusSpec(pages=pages, **spec_args)
+    source_bytes = generate_corpus(site_root, spec)
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', site_root, '--'] + build_args,
+        check=True, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=src_dir),
+    )
+    row = json.loads(result.stdout.strip().splitlines()[-1])
+    row['pages'] = pages
+    row['source_bytes'] = source_bytes
+    row['pages_per_second'] = pages / row['wall_seconds']
+    row['ms_per_page'] = 1000 * row['wall_seconds'] / pages
+    shutil.rmtree(site_root)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', default='10,1000,10000,100000', help="comma-separated page counts")
+    parser.add_argument('--mean-blocks', type=float, default=20)
+    parser.add_argument('--size-sigma', type=float, default=0.75)
+    parser.add_argument('--link-density', type=float, default=0.5)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--fanout', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', metavar='PATH', help="write the results as CSV")
+    parser.add_argument('--json', metavar='PATH', help="write the results and corpus parameters as JSON")
+    parser.add_argument('--superlinear', type=float, default=1.5,
+                        help="flag runs whose ms/page exceeds this multiple of the reference run")
+    parser.add_argument('--worker', metavar='SITE', help=argparse.SUPPRESS)
+    parser.add_argument('build_args', nargs='*', help="extra arguments for main(), after --")
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args.worker, args.build_args)
+
+    spec_args = {'mean_blocks': args.mean_blocks, 'size_sigma': args.size_sigma, 'link_density': args.link_density,
+                 'depth': args.depth, 'fanout': args.fanout, 'seed': args.seed}
+    rows = []
+    reference = None
+    tmp = tempfile.mkdtemp(prefix='bench_scaling_')
+    print(f"{'pages':>8} {'source MB':>10} {'seconds':>9} {'pages/s':>9} {'ms/page':>8} {'peak RSS':>10} {'written MB':>11}")
+    try:
+        for pages in [int(p) for p in args.pages.split(',')]:
+            row = measure(pages, spec_args, args.build_args, tmp)
+            rows.append(row)
+            if reference is None and pages >= 100:
+                reference = row
+            flag = ''
+            if reference is not None and row['ms_per_page'] > args.superlinear * reference['ms_per_page']:
+                flag = f"  superlinear ({row['ms_per_page'] / reference['ms_per_page']:.1f}x ms/page)"
+            print(f"{pages:>8} {row['source_bytes'] / 1e6:>10.1f} {row['wall_seconds']:>9.2f} "
+                  f"{row['pages_per_second']:>9.0f} {row['ms_per_page']:>8.2f} {row['peak_rss_mb']:>8.0f}MB "
+                  f"{row['bytes_written'] / 1e6:>11.1f}{flag}", flush=True)
+    finally:
+        shutil.rmtree(tmp)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({field: row[field] for field in FIELDS})
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'corpus': spec_args, 'build_args': args.build_args, 'results': rows}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
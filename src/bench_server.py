@@ -0,0 +1,103 @@
+"""Load test comparing the in-memory dev server with `http.server`.
+
+Builds the site into memory, serves it both from a `SiteStore` and from
+`docs/` through the standard library's `SimpleHTTPRequestHandler`, then hits
+each server with concurrent keep-alive clients and reports requests/sec.
+
+Usage:
+    python3 src/bench_server.py [--clients 8] [--seconds 5]
+
+"""
+import argparse
+import functools
+import http.client
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from filesystem import LOCAL, MemoryFileSystem
+from main import build_site
+from server import SiteStore, make_server
+
+
+class QuietFileHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def run_clients(port, paths, clients, seconds, headers):
+    """Hammer a server with concurrent clients for a fixed duration.
+
+    Returns:
+        tuple[int, int]: Completed requests and failed requests.
+    """
+    counts = [0] * clients
+    errors = [0] * clients
+    deadline = time.perf_counter() + seconds
+
+    def client(slot):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        i = slot
+        while time.perf_counter() < deadline:
+            try:
+                conn.request('GET', paths[i % len(paths)], headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[slot] += 1
+                counts[slot] += 1
+                if response.will_close:
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            except (OSError, http.client.HTTPException):
+                errors[slot] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            i += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts), sum(errors)
+
+
+def bench(name, server, paths, clients, seconds, headers):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        done, failed = run_clients(server.server_address[1], paths, clients, seconds, headers)
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"{name:<28} {done / seconds:>10.0f} req/s  ({done} requests, {failed} errors)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    fs = MemoryFileSystem(base=LOCAL)
+    build_site('/', fs=fs)
+    store = SiteStore()
+    store.load(fs, 'docs')
+    paths = ['/', '/blog/tom/', '/blog/glorfindel/', '/contact/', '/index.css']
+    print(f"{args.clients} clients, {args.seconds:g}s per run, {len(paths)} paths")
+
+    handler = functools.partial(QuietFileHandler, directory='docs')
+    bench('http.server (docs/)', ThreadingHTTPServer(('127.0.0.1', 0), handler),
+          paths, args.clients, args.seconds, {})
+    bench('SiteStore', make_server(store, port=0, quiet=True),
+          paths, args.clients, args.seconds, {})
+    bench('SiteStore, gzip', make_server(store, port=0, quiet=True),
+          paths, args.clients, args.seconds, {'Accept-Encoding': 'gzip'})
+    etags = {path: store.resolve(path).etag for path in paths}
+    bench('SiteStore, 304 revalidation', make_server(store, port=0, quiet=True),
+          paths, args.clients, args.seconds, {'If-None-Match': ', '.join(etags.values())})
+
+
+if __name__ == "__main__":
+    main()
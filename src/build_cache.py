@@ -0,0 +1,196 @@
+"""Content-addressed cache of parsed page bodies, shareable between machines.
+
+Parsing markdown into a node tree is the most expensive step of rendering a
+page. With `--cache-dir`, the node tree of every page is stored in a cache
+directory under a key derived from:
+
+- the page's markdown source,
+- `PARSER_VERSION` and a hash of the parser modules' source files, so that
+  any change to the parser, renderers or highlighter invalidates the cache.
+
+The directory may be mounted from shared storage so that CI runners reuse
+each other's work: a runner that finds a page's key only decodes the stored
+tree. The layout template, the basepath, `--minify` and the node transforms
+(image attributes) are applied after the cached stage, so they are not part
+of the key and changing them does not invalidate it.
+
+Entries are zlib-compressed JSON, never pickles, so a shared directory
+cannot inject code. Each entry is written to a temporary file and renamed
+into place, so concurrent writers and readers never see a partial entry.
+Hits refresh an entry's mtime, and at the end of the build the least
+recently used entries are deleted until the directory fits its size limit.
+
+Classes:
+    RenderCache: Build observer reading and writing the cache.
+
+Functions:
+    parser_fingerprint(): Hash of the parser's source files.
+    encode_node(), decode_node(): Convert node trees to and from JSON data.
+
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+from highlight import HighlightedCode
+from htmlnode import LeafNode, ParentNode
+
+PARSER_VERSION = 1
+PARSER_MODULES = ('main.py', 'markdown_blocks.py', 'markdown_inline.py', 'registry.py', 'textnode.py',
+                  'htmlnode.py', 'highlight.py', 'build_cache.py')
+ENTRY_SUFFIX = '.json.z'
+
+
+def parser_fingerprint():
+    """Return a hash of the source files that determine a page's node tree."""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in PARSER_MODULES:
+        with open(os.path.join(directory, name), 'rb') as file:
+            digest.update(name.encode('utf-8') + b'\0' + file.read() + b'\0')
+    return digest.hexdigest()
+
+
+def encode_node(node):
+    """Convert a node tree into nested lists that JSON can store."""
+    if isinstance(node, HighlightedCode):
+        return ['h', node.props, [encode_node(child) for child in node.children]]
+    if isinstance(node, ParentNode):
+        return ['p', node.tag, node.props, [encode_node(child) for child in node.children]]
+    return ['l', node.tag, node.props, node.value]
+
+
+def decode_node(data):
+    """Rebuild a node tree from `encode_node()` output."""
+    kind = data[0]
+    if kind == 'l':
+        return LeafNode(data[1], data[3], data[2])
+    if kind == 'p':
+        return ParentNode(data[1], [decode_node(child) for child in data[3]], data[2])
+    return HighlightedCode([decode_node(child) for child in data[2]], data[1]['class'][len('language-'):])
+
+
+class RenderCache:
+    """Content-addressed cache of parsed page bodies.
+
+    Args:
+        directory (str): Cache directory on the local disk or a mounted
+            share. Created if missing.
+        max_bytes (int): Size the directory is pruned to after the build.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.salt = f"{PARSER_VERSION}:{parser_fingerprint()}\0".encode('utf-8')
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self.pruned = 0
+
+    def key(self, markdown):
+        """Return the cache key of a page source."""
+        return hashlib.sha256(self.salt + markdown.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def node(self, markdown, parse):
+        """Return the node tree of `markdown`, from the cache if possible.
+
+        Args:
+            markdown (str): The page source.
+            parse (callable): `parse(markdown)` building the tree on a miss.
+
+        Returns:
+            ParentNode: A tree owned by the caller, which may modify it.
+        """
+        key = self.key(markdown)
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = json.loads(zlib.decompress(file.read()))
+        except (OSError, ValueError, zlib.error):
+            data = None
+        if data is not None:
+            self.hits += 1
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return decode_node(data)
+        self.misses += 1
+        node = parse(markdown)
+        try:
+            self._store(path, node)
+        except OSError:
+            pass  # A read-only or full share only costs the cache write.
+        return node
+
+    def _store(self, path, node):
+        encoded = zlib.compress(json.dumps(encode_node(node), separators=(',', ':')).encode('utf-8'), 1)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(encoded)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.written += 1
+
+    def entries(self):
+        """Return `(mtime, size, path)` of every entry, oldest first."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def prune(self):
+        """Delete the least recently used entries until the cache fits
+        `max_bytes`.
+
+        Returns:
+            int: The size of the cache afterwards, in bytes.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Pruned by a concurrent build.
+            total -= size
+            self.pruned += 1
+        return total
+
+    def finish(self, context):
+        size = self.prune()
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0.0
+        context.report(
+            "Render cache",
+            f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), {self.written} written, "
+            f"{self.pruned} pruned, {size / 1024 / 1024:.1f} MiB in {self.directory}",
+        )
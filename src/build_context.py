@@ -0,0 +1,190 @@
+"""Shared state for a single site build.
+
+`generate_page()` describes every page it renders with a `Page` record and
+hands it to the build's `BuildContext`, which forwards it to the registered
+observers (search index, link checker, ...). Observers see the parsed node
+tree and the final HTML, so site-wide artifacts are collected in the same
+pass that renders the pages instead of by re-reading the output.
+
+Classes:
+    Page: Everything known about one rendered page.
+    BuildContext: The filesystem, page observers and summary of one build.
+
+"""
+import hashlib
+import os
+import time
+
+from filesystem import LOCAL, HashingFileSystem
+from templates import TemplateLoader
+
+
+class Page:
+    """A rendered page as seen by build observers.
+
+    Attributes:
+        source_path (str): Path of the markdown source.
+        dest_path (str): Path of the generated HTML file.
+        url (str): Site-relative URL path of the page, starting with '/'.
+        markdown (str or None): The markdown source. None for pages rendered
+            by the streaming pipeline, which never decodes the whole source.
+        title (str): Title extracted from the first level 1 heading.
+        node (ParentNode): The page body as an HTML node tree.
+        html (str or None): The final page, template applied. None for pages
+            rendered by the streaming pipeline.
+        timings (dict[str, float] or None): Seconds spent in each stage of
+            `generate_page()`, by stage name.
+        source_digest (str): SHA-256 hex digest of the source.
+        source_bytes (int): Size of the source in bytes.
+        output_bytes (int): Size of the final page in bytes.
+    """
+
+    def __init__(self, source_path, dest_path, url, markdown, title, node, html, timings=None, source_digest=None,
+                 source_bytes=None, output_bytes=None):
+        self.source_path = source_path
+        self.dest_path = dest_path
+        self.url = url
+        self.markdown = markdown
+        self.title = title
+        self.node = node
+        self.html = html
+        self.timings = timings
+        self._source_digest = source_digest
+        self._source_bytes = source_bytes
+        self._output_bytes = output_bytes
+
+    # Computed from `markdown` and `html` when they were not given, as for
+    # every page of the str pipeline.
+
+    @property
+    def source_digest(self):
+        if self._source_digest is None:
+            self._source_digest = hashlib.sha256(self.markdown.encode('utf-8')).hexdigest()
+        return self._source_digest
+
+    @property
+    def source_bytes(self):
+        if self._source_bytes is None:
+            self._source_bytes = len(self.markdown.encode('utf-8'))
+        return self._source_bytes
+
+    @property
+    def output_bytes(self):
+        if self._output_bytes is None:
+            self._output_bytes = len(self.html.encode('utf-8'))
+        return self._output_bytes
+
+
+class BuildContext:
+    """The filesystem, observers and summary lines for one build.
+
+    Page layouts are rendered through the context's `templates` loader, so
+    compiled templates and site-wide partials are shared by every page.
+
+    Every file the build writes is recorded in `outputs` as a URL path, so
+    site-wide checks can be answered from memory instead of from the disk.
+    With `hash_outputs`, the SHA-256 of every output is recorded in
+    `output_hashes` as it is written.
+
+    Observers are objects with an optional `add_page(page, context)` method,
+    called once for each rendered page, and an optional `finish(context)`
+    method, called once after all pages have been generated.
+
+    Transforms are callables `transform(node, page_url, fs)` that may modify a
+    page's node tree in place before it is serialized.
+
+    Args:
+        fs (optional): Filesystem backend of the build. Defaults to the local
+            disk.
+        content_root (str): Directory the markdown sources live in.
+        dest_root (str): Directory the site is generated into.
+        hash_outputs (bool): Wrap `fs` in a `HashingFileSystem` that fills
+            `output_hashes`.
+
+    Attributes:
+        stream_threshold (int or None): Source size in bytes from which pages
+            are rendered by the memory-mapped streaming pipeline.
+        minifier (HtmlMinifier or None): Serialize pages in minified mode.
+        memprofile (MemoryProfiler or None): Measure the memory used by each
+            stage of `generate_page()`.
+        page_budget (PageBudget or None): Time limit for rendering one page.
+        render_cache (RenderCache or None): Shared cache of parsed page
+            bodies.
+        page_graph (PageGraph or None): Backlinks and related pages, exposed
+            to every page's template.
+        selection (PageSelection or None): The pages of a targeted build.
+            Observers keep what they know about the other pages.
+    """
+
+    def __init__(self, fs=LOCAL, content_root='content', dest_root='docs', hash_outputs=False):
+        self.output_hashes = {}
+        if hash_outputs:
+            fs = HashingFileSystem(fs, dest_root, self.record_hash)
+        self.fs = fs
+        self.content_root = content_root
+        self.dest_root = dest_root
+        self.templates = TemplateLoader(fs, content_root=content_root)
+        self.stream_threshold = None
+        self.minifier = None
+        self.memprofile = None
+        self.page_budget = None
+        self.render_cache = None
+        self.page_graph = None
+        self.selection = None
+        self.observers = []
+        self.transforms = []
+        self.outputs = set()
+        self.summary = []
+        self.pages = 0
+        self.started = time.perf_counter()
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+        return observer
+
+    def add_transform(self, transform):
+        self.transforms.append(transform)
+        return transform
+
+    def apply_transforms(self, node, dest_path):
+        """Run every registered transform over a page's node tree."""
+        if self.transforms:
+            page_url = self.url_for(dest_path)
+            for transform in self.transforms:
+                transform(node, page_url, self.fs)
+
+    def url_for(self, dest_path):
+        """Return the site-relative URL path of an output file."""
+        return '/' + os.path.relpath(dest_path, self.dest_root).replace(os.sep, '/')
+
+    def add_output(self, dest_path):
+        """Record that the build produced the file at `dest_path`."""
+        self.outputs.add(self.url_for(dest_path))
+
+    def record_hash(self, dest_path, digest):
+        """Record the SHA-256 hex digest of the output file at `dest_path`."""
+        self.output_hashes[self.url_for(dest_path)] = digest
+
+    def add_page(self, page):
+        self.pages += 1
+        for observer in self.observers:
+            add_page = getattr(observer, 'add_page', None)
+            if add_page is not None:
+                add_page(page, self)
+
+    def finish(self):
+        """Let every observer write its site-wide output."""
+        for observer in self.observers:
+            finish = getattr(observer, 'finish', None)
+            if finish is not None:
+                finish(self)
+
+    def report(self, label, value):
+        """Add a line to the build summary."""
+        self.summary.append((label, value))
+
+    def print_summary(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"Built {self.pages} pages in {elapsed * 1000:.1f} ms")
+        for label, value in self.summary:
+            print(f"  {label}: {value}")
@@ -0,0 +1,249 @@
+"""Per-page build metrics kept across builds in a SQLite database.
+
+Every build appends one row per rendered page to `.cache/build-history.sqlite`
+(see `sqlite3`): the time spent in each stage of `generate_page()`, the source
+and output sizes, and the number of blocks and inline nodes of the page body.
+Only the most recent builds are kept, so the database stays small.
+
+`main.py stats` reads the database and prints the slowest pages, the pages
+whose render time grew the most, and where the time goes by stage, over the
+last builds.
+
+The database is always on the local disk, whatever filesystem backend the
+build writes its output to.
+
+Classes:
+    Stopwatch: Times consecutive stages of a page.
+    BuildHistory: Build observer appending the metrics of each build.
+
+Functions:
+    recent_builds(), slowest_pages(), growth(), stage_breakdown(): Queries
+        over the last builds.
+    print_stats(): The report of `main.py stats`.
+
+"""
+import datetime
+import os
+import sqlite3
+import time
+
+from htmlnode import ParentNode
+
+STAGES = ('read', 'parse', 'transforms', 'to_html', 'template', 'write')
+SCHEMA_VERSION = 1
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    pages INTEGER NOT NULL,
+    selection TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    build_id INTEGER NOT NULL REFERENCES builds(id),
+    source TEXT NOT NULL,
+    render_ms REAL NOT NULL,
+    {', '.join(f'{stage}_ms REAL NOT NULL' for stage in STAGES)},
+    source_bytes INTEGER NOT NULL,
+    output_bytes INTEGER NOT NULL,
+    blocks INTEGER NOT NULL,
+    inline_nodes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_build ON pages(build_id);
+CREATE INDEX IF NOT EXISTS pages_source ON pages(source);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+# The ids of the last N builds, N being the query parameter.
+RECENT = "SELECT id FROM builds ORDER BY id DESC LIMIT ?"
+
+
+class Stopwatch:
+    """Record the time of consecutive stages.
+
+    Attributes:
+        laps (dict[str, float]): Seconds spent in each stage, by name.
+    """
+
+    def __init__(self):
+        self.laps = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """End the current stage, naming it `stage`, and start the next."""
+        now = time.perf_counter()
+        self.laps[stage] = self.laps.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+def count_nodes(node):
+    """Return `(blocks, inline_nodes)` of a page body.
+
+    Blocks are the body's children; every node below them counts as an
+    inline node.
+    """
+    blocks = len(node.children or ())
+    total = 0
+    stack = list(node.children or ())
+    while stack:
+        child = stack.pop()
+        total += 1
+        if isinstance(child, ParentNode):
+            stack.extend(child.children)
+    return blocks, total - blocks
+
+
+def connect(path):
+    """Open the history database at `path`, creating it if needed."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class BuildHistory:
+    """Build observer appending per-page metrics to the history database.
+
+    Args:
+        path (str): The SQLite database file.
+        keep (int): Number of most recent builds kept.
+    """
+
+    def __init__(self, path, keep=50):
+        self.path = path
+        self.keep = keep
+        self.rows = []
+
+    def add_page(self, page, context):
+        timings = page.timings or {}
+        blocks, inline_nodes = count_nodes(page.node)
+        stages = [timings.get(stage, 0.0) * 1000 for stage in STAGES]
+        self.rows.append((page.source_path, sum(stages), *stages, page.source_bytes,
+                          page.output_bytes, blocks, inline_nodes))
+
+    def record(self, duration, selection=None):
+        """Store the pages added so far as one build and drop the builds
+        beyond `keep`.
+
+        Returns:
+            int: The id of the new build.
+        """
+        connection = connect(self.path)
+        try:
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO builds (started, duration_ms, pages, selection) VALUES (?, ?, ?, ?)",
+                    (time.time(), duration * 1000, len(self.rows), selection))
+                build_id = cursor.lastrowid
+                placeholders = ', '.join('?' * (len(STAGES) + 7))
+                connection.executemany(f"INSERT INTO pages VALUES ({placeholders})",
+                                       [(build_id, *row) for row in self.rows])
+                expired = "SELECT id FROM builds ORDER BY id DESC LIMIT -1 OFFSET ?"
+                connection.execute(f"DELETE FROM pages WHERE build_id IN ({expired})", (self.keep,))
+                connection.execute(f"DELETE FROM builds WHERE id IN ({expired})", (self.keep,))
+        finally:
+            connection.close()
+        self.rows = []
+        return build_id
+
+    def finish(self, context):
+        pages = len(self.rows)
+        selection = str(context.selection) if context.selection is not None else None
+        build_id = self.record(time.perf_counter() - context.started, selection)
+        context.report("Build history", f"build {build_id}, {pages} pages recorded in {self.path} "
+                                        f"(last {self.keep} builds kept)")
+
+
+def recent_builds(connection, builds):
+    """Return `(id, started, duration_ms, pages, source_bytes, selection)` of
+    the last `builds` builds, oldest first."""
+    return connection.execute(
+        f"""SELECT b.id, b.started, b.duration_ms, b.pages, COALESCE(SUM(p.source_bytes), 0), b.selection
+           FROM builds b LEFT JOIN pages p ON p.build_id = b.id
+           WHERE b.id IN ({RECENT})
+           GROUP BY b.id ORDER BY b.id""", (builds,)).fetchall()
+
+
+def slowest_pages(connection, builds, limit=10):
+    """Return `(source, builds, avg_ms, max_ms, source_bytes)` of the pages
+    with the highest average render time over the last `builds` builds.
+    `source_bytes` is the page's most recent size."""
+    return connection.execute(
+        f"""SELECT source, COUNT(*), AVG(render_ms), MAX(render_ms),
+                  (SELECT source_bytes FROM pages q WHERE q.source = p.source ORDER BY build_id DESC LIMIT 1)
+           FROM pages p WHERE build_id IN ({RECENT})
+           GROUP BY source ORDER BY AVG(render_ms) DESC LIMIT ?""", (builds, limit)).fetchall()
+
+
+def growth(connection, builds, limit=10):
+    """Return the pages whose render time grew the most between their first
+    and last build among the last `builds`.
+
+    Returns:
+        list[tuple]: `(source, first_ms, last_ms, first_bytes, last_bytes)`,
+            largest growth first. Pages seen in a single build are left out.
+    """
+    return connection.execute(
+        f"""WITH recent AS (
+               SELECT * FROM pages WHERE build_id IN ({RECENT})
+           ), span AS (
+               SELECT source, MIN(build_id) AS first, MAX(build_id) AS last FROM recent
+               GROUP BY source HAVING COUNT(*) > 1
+           )
+           SELECT span.source, a.render_ms, b.render_ms, a.source_bytes, b.source_bytes
+           FROM span
+           JOIN recent a ON a.source = span.source AND a.build_id = span.first
+           JOIN recent b ON b.source = span.source AND b.build_id = span.last
+           ORDER BY b.render_ms - a.render_ms DESC LIMIT ?""", (builds, limit)).fetchall()
+
+
+def stage_breakdown(connection, builds):
+    """Return `{stage: total_ms}` over every page of the last `builds` builds."""
+    columns = ', '.join(f'COALESCE(SUM({stage}_ms), 0)' for stage in STAGES)
+    row = connection.execute(
+        f"SELECT {columns} FROM pages WHERE build_id IN ({RECENT})",
+        (builds,)).fetchone()
+    return dict(zip(STAGES, row))
+
+
+def print_stats(path, builds=10, limit=10):
+    """Print the trends of the last `builds` builds recorded in `path`.
+
+    Returns:
+        bool: False if there is no history yet.
+    """
+    if not os.path.exists(path):
+        print(f"No build history in {path}")
+        return False
+    connection = connect(path)
+    try:
+        history = recent_builds(connection, builds)
+        if not history:
+            print(f"No build history in {path}")
+            return False
+        print(f"Last {len(history)} builds:")
+        for build_id, started, duration, pages, source_bytes, selection in history:
+            when = datetime.datetime.fromtimestamp(started).strftime('%Y-%m-%d %H:%M')
+            scope = f" (--only {selection})" if selection else ""
+            print(f"  #{build_id:<5} {when}  {pages:>6} pages  {source_bytes / 1024:>9.1f} KiB  "
+                  f"{duration:>9.1f} ms{scope}")
+        print(f"\nSlowest pages (average over the last {len(history)} builds):")
+        for source, count, average, worst, size in slowest_pages(connection, builds, limit):
+            print(f"  {average:>8.2f} ms avg  {worst:>8.2f} ms max  {size / 1024:>7.1f} KiB  "
+                  f"{count:>3} builds  {source}")
+        trends = growth(connection, builds, limit)
+        if trends:
+            print("\nLargest growth in render time (first -> last build):")
+            for source, first, last, first_bytes, last_bytes in trends:
+                print(f"  {last - first:>+8.2f} ms  {first:.2f} -> {last:.2f} ms  "
+                      f"{first_bytes / 1024:.1f} -> {last_bytes / 1024:.1f} KiB  {source}")
+        totals = stage_breakdown(connection, builds)
+        overall = sum(totals.values()) or 1.0
+        print("\nTime by stage:")
+        for stage in STAGES:
+            print(f"  {stage:<11} {totals[stage] / len(history):>10.1f} ms/build  "
+                  f"{100 * totals[stage] / overall:>5.1f}%")
+    finally:
+        connection.close()
+    return True
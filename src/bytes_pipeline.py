@@ -0,0 +1,130 @@
+"""Bytes-level helpers for streaming very large pages.
+
+The default pipeline reads a page as one `str`, splits it into blocks and
+joins the rendered HTML back into one string before writing it. For very
+large sources these helpers let the generator work on a memory-mapped file
+instead: block boundaries are found by scanning the raw bytes, only one block
+is decoded at a time, and rendered fragments are encoded and written straight
+to the output file.
+
+Blocks are separated by `b"\\n\\n"`, which can never occur inside a
+multi-byte UTF-8 sequence, so splitting the bytes gives exactly the same
+blocks as `markdown_to_blocks()` on the decoded text.
+
+`generate_page()` reads sources in text mode, which turns `\\r\\n` and `\\r`
+line endings into `\\n`. Sources containing `\\r` are split on any two
+consecutive line endings instead, and their blocks and title have their line
+endings translated the same way, so CRLF files give the same page too.
+
+Functions:
+    map_source(): Memory-map a source file for reading.
+    iter_block_spans(): Yield the `(start, end)` byte span of every block.
+    iter_blocks(): Yield the decoded, stripped blocks of a buffer.
+    extract_title_bytes(): Find the page title without decoding the page.
+
+"""
+import contextlib
+import mmap
+import os
+import re
+
+# Two consecutive line endings, as text mode reads them: `\r\n`, `\r` or `\n`.
+BLOCK_BREAK = re.compile(rb'(?:\r\n|\r(?!\n)|\n){2}')
+
+
+@contextlib.contextmanager
+def map_source(path):
+    """Memory-map `path` read-only.
+
+    Yields:
+        mmap.mmap or bytes: The mapped file, or `b""` for an empty file
+            (which cannot be mapped).
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def iter_block_spans(buf):
+    """Yield the byte span of every `\\n\\n`-separated block in `buf`.
+
+    A source containing `\\r` is split on any two consecutive line endings
+    (see `BLOCK_BREAK`).
+
+    Args:
+        buf (bytes or mmap.mmap): The markdown source.
+
+    Yields:
+        tuple[int, int]: `(start, end)` offsets of each raw, unstripped block.
+    """
+    size = len(buf)
+    pos = 0
+    if buf.find(b'\r') != -1:
+        for match in BLOCK_BREAK.finditer(buf):
+            yield pos, match.start()
+            pos = match.end()
+        yield pos, size
+        return
+    while pos <= size:
+        end = buf.find(b'\n\n', pos)
+        if end == -1:
+            yield pos, size
+            return
+        yield pos, end
+        pos = end + 2
+
+
+def iter_blocks(buf):
+    """Yield the blocks of `buf`, decoding only one block at a time.
+
+    Produces the same sequence as `markdown_to_blocks()` on the decoded text.
+
+    Args:
+        buf (bytes or mmap.mmap): The markdown source, UTF-8 encoded.
+
+    Yields:
+        str: Each non-empty block, stripped of surrounding whitespace.
+    """
+    view = memoryview(buf)
+    try:
+        for start, end in iter_block_spans(buf):
+            block = str(view[start:end], 'utf-8').strip()
+            if '\r' in block:
+                block = _translate_newlines(block)
+            if block:
+                yield block
+    finally:
+        view.release()
+
+
+def extract_title_bytes(buf):
+    """Return the text of the first line starting with `# `.
+
+    Matches `extract_title()` but only decodes the title line.
+
+    Args:
+        buf (bytes or mmap.mmap): The markdown source, UTF-8 encoded.
+
+    Returns:
+        str: The title with the `# ` prefix removed.
+
+    Raises:
+        Exception: If no level 1 heading line is found.
+    """
+    if buf[:2] == b'# ':
+        start = 0
+    else:
+        starts = [pos for pos in (buf.find(b'\n# '), buf.find(b'\r# ')) if pos != -1]
+        if not starts:
+            raise Exception("No title found in markdown")
+        start = min(starts) + 1
+    ends = [pos for pos in (buf.find(b'\n', start), buf.find(b'\r', start)) if pos != -1]
+    end = min(ends) if ends else len(buf)
+    return buf[start:end].decode('utf-8').strip('# ')
+
+
+def _translate_newlines(text):
+    return text.replace('\r\n', '\n').replace('\r', '\n')
@@ -0,0 +1,179 @@
+"""Deterministic synthetic content trees for benchmarks.
+
+A `CorpusSpec` describes the shape of a site: how many pages, how large they
+are, how densely they link to each other, which block types they use and how
+deep the directory tree is. `generate_corpus()` writes a matching `content/`
+tree, a `template.html` and an empty `static/` directory. The same spec and
+seed always produce byte-identical files, so timings from different runs and
+machines are comparable.
+
+Classes:
+    CorpusSpec: Parameters of a synthetic corpus.
+
+Functions:
+    generate_corpus(): Write a corpus to disk (or any filesystem backend).
+    page_path(): Directory and file name of a page in the tree.
+
+"""
+import math
+import os
+import random
+
+from filesystem import LOCAL
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+WORDS = (
+    "ring hobbit shire wizard elf dwarf mountain river forest tower road journey "
+    "shadow light king steward song tale battle council ent horse sword star "
+    "north west east south fire water stone silver gold green grey white dark"
+).split()
+DEFAULT_MIX = {'paragraph': 6, 'heading': 2, 'unordered_list': 1, 'ordered_list': 1, 'code': 1, 'quote': 1}
+
+
+class CorpusSpec:
+    """Parameters of a synthetic corpus.
+
+    Args:
+        pages (int): Number of markdown pages.
+        mean_blocks (float): Mean number of blocks per page.
+        size_sigma (float): Spread of the log-normal page size distribution;
+            0 makes every page `mean_blocks` long.
+        link_density (float): Mean number of internal links per paragraph.
+        block_mix (dict, optional): Relative weights of the block types
+            'paragraph', 'heading', 'unordered_list', 'ordered_list', 'code'
+            and 'quote'.
+        depth (int): Number of directory levels below `content/`.
+        fanout (int): Subdirectories per directory.
+        seed (int): Random seed.
+    """
+
+    def __init__(self, pages=100, mean_blocks=20, size_sigma=0.75, link_density=0.5,
+                 block_mix=None, depth=2, fanout=8, seed=0):
+        self.pages = pages
+        self.mean_blocks = mean_blocks
+        self.size_sigma = size_sigma
+        self.link_density = link_density
+        self.block_mix = dict(block_mix or DEFAULT_MIX)
+        self.depth = depth
+        self.fanout = fanout
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def page_path(index, depth, fanout):
+    """Return the directory parts and file name of page `index`.
+
+    Pages are spread round-robin over `fanout ** depth` leaf directories, so
+    the tree stays balanced for any page count.
+
+    Returns:
+        tuple[list[str], str]: Directory names below the content root, and the
+            file name without extension.
+    """
+    parts = []
+    bucket = index
+    for _ in range(depth):
+        parts.append(f"section-{bucket % fanout}")
+        bucket //= fanout
+    return parts, f"page-{index}"
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def _inline_text(rng, spec, urls):
+    pieces = []
+    links = _poisson(rng, spec.link_density)
+    for _ in range(rng.randint(3, 6)):
+        pieces.append(_words(rng, rng.randint(4, 10)))
+        roll = rng.random()
+        if roll < 0.2:
+            pieces.append(f"**{_words(rng, 2)}**")
+        elif roll < 0.35:
+            pieces.append(f"_{_words(rng, 2)}_")
+        elif roll < 0.45:
+            pieces.append(f"`{rng.choice(WORDS)}()`")
+    for _ in range(links):
+        pieces.insert(rng.randrange(len(pieces) + 1), f"[{_words(rng, 2)}]({rng.choice(urls)})")
+    return ' '.join(pieces)
+
+
+def _poisson(rng, mean):
+    # Knuth's method; the means used here are small.
+    limit = math.exp(-mean)
+    count = 0
+    product = rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _block(rng, kind, spec, urls):
+    if kind == 'heading':
+        return f"{'#' * rng.randint(2, 4)} {_words(rng, rng.randint(2, 5)).title()}"
+    if kind == 'unordered_list':
+        return '\n'.join(f"- {_inline_text(rng, spec, urls)}" for _ in range(rng.randint(2, 6)))
+    if kind == 'ordered_list':
+        return '\n'.join(f"{i}. {_inline_text(rng, spec, urls)}" for i in range(1, rng.randint(3, 7)))
+    if kind == 'code':
+        lines = [f"def {rng.choice(WORDS)}_{i}():\n    return '{_words(rng, 3)}'" for i in range(rng.randint(1, 4))]
+        return "```\n" + '\n'.join(lines) + "\n```"
+    if kind == 'quote':
+        return '\n'.join(f"> {_words(rng, rng.randint(6, 14))}" for _ in range(rng.randint(1, 3)))
+    return _inline_text(rng, spec, urls)
+
+
+def generate_corpus(root, spec, fs=LOCAL):
+    """Write a synthetic site described by `spec` under `root`.
+
+    Creates `root/content/...`, `root/template.html` and `root/static/`.
+
+    Args:
+        root (str): Directory the site is written to.
+        spec (CorpusSpec): Shape of the corpus.
+        fs (optional): Filesystem backend. Defaults to the local disk.
+
+    Returns:
+        int: Total bytes of markdown written.
+    """
+    rng = random.Random(spec.seed)
+    kinds = list(spec.block_mix)
+    weights = [spec.block_mix[kind] for kind in kinds]
+    urls = []
+    for index in range(spec.pages):
+        parts, name = page_path(index, spec.depth, spec.fanout)
+        urls.append('/' + '/'.join(parts + [name]))
+    fs.makedirs(os.path.join(root, 'static'))
+    fs.write_text(os.path.join(root, 'template.html'), TEMPLATE)
+    # Blocks per page follow a log-normal distribution with the requested
+    # mean: a few very large pages and many small ones.
+    mu = math.log(spec.mean_blocks) - spec.size_sigma ** 2 / 2
+    total = 0
+    for index in range(spec.pages):
+        parts, name = page_path(index, spec.depth, spec.fanout)
+        directory = os.path.join(root, 'content', *parts)
+        fs.makedirs(directory)
+        blocks = [f"# {_words(rng, 3).title()} {index}"]
+        count = max(1, round(rng.lognormvariate(mu, spec.size_sigma)))
+        for kind in rng.choices(kinds, weights, k=count):
+            blocks.append(_block(rng, kind, spec, urls))
+        markdown = '\n\n'.join(blocks) + '\n'
+        fs.write_text(os.path.join(directory, name + '.md'), markdown)
+        total += len(markdown.encode('utf-8'))
+    return total
@@ -0,0 +1,319 @@
+"""CSS minification, bundling and critical-CSS inlining.
+
+The stylesheets at the top level of the static directory are minified and
+concatenated into one bundle once per build. Local stylesheet `<link>` tags
+in the page templates are rewritten to load that bundle instead. Optionally,
+the rules that apply to the elements a template contains are inlined into a
+`<style>` element and the full bundle is loaded without blocking rendering.
+
+The template rewrite is a `TemplateLoader` source filter, so it is computed
+once per template when it is compiled rather than once per page.
+
+Critical CSS is computed from the template alone, not from the page content
+filled into it: rules for elements that only appear in a page's body, such
+as a `table` in one post, are left to the bundle, which loads without
+blocking rendering. A page whose first screen relies on such rules may
+render briefly unstyled.
+
+Classes:
+    CssBundle: The per-build CSS asset stage.
+
+Functions:
+    minify_css(): Remove comments and insignificant whitespace.
+    split_rules(): Split a stylesheet into its top-level rules.
+    critical_css(): Keep only the rules whose selectors can match a document.
+    document_selectors(): Collect tag names, classes and ids from HTML.
+
+"""
+import hashlib
+import os
+import re
+import time
+
+STRING_OR_COMMENT = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.DOTALL)
+WHITESPACE = re.compile(r'\s+')
+TIGHT_AROUND = re.compile(r'\s*([{};,>])\s*')
+TIGHT_AFTER_COLON = re.compile(r':\s+')
+PSEUDO = re.compile(r'::?[\w-]+(\([^)]*\))?')
+ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+COMBINATORS = re.compile(r'\s*[\s>+~]\s*')
+TAG_NAME = re.compile(r'^[a-zA-Z][\w-]*')
+CLASS_NAME = re.compile(r'\.([\w-]+)')
+ID_NAME = re.compile(r'#([\w-]+)')
+HTML_TAG = re.compile(r'<([a-zA-Z][\w-]*)')
+HTML_CLASS = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']')
+HTML_ID = re.compile(r'\bid\s*=\s*["\']([^"\']*)["\']')
+LINK_TAG = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+HREF = re.compile(r'\bhref\s*=\s*["\']([^"\']*)["\']')
+ALWAYS_MATCH = frozenset(('*', 'html', 'body', ':root'))
+KEEP_AT_RULES = ('@charset', '@import', '@font-face', '@namespace')
+
+
+def _minify_code(code):
+    code = WHITESPACE.sub(' ', code)
+    code = TIGHT_AROUND.sub(r'\1', code)
+    return TIGHT_AFTER_COLON.sub(':', code).replace(';}', '}')
+
+
+def minify_css(text):
+    """Minify a stylesheet.
+
+    Comments are removed, whitespace runs are collapsed, spaces around
+    `{ } ; , >` and after `:` are dropped and the last `;` of each block is
+    removed. String literals are left untouched.
+
+    Args:
+        text (str): The stylesheet source.
+
+    Returns:
+        str: The minified stylesheet.
+    """
+    parts = []
+    code = []
+    pos = 0
+    for match in STRING_OR_COMMENT.finditer(text):
+        code.append(text[pos:match.start()])
+        token = match.group(0)
+        if token.startswith('/*'):
+            code.append(' ')
+        else:
+            parts.append(_minify_code(''.join(code)))
+            parts.append(token)
+            code = []
+        pos = match.end()
+    code.append(text[pos:])
+    parts.append(_minify_code(''.join(code)))
+    return ''.join(parts).strip()
+
+
+def split_rules(css):
+    """Split a minified stylesheet into top-level rules.
+
+    Args:
+        css (str): A stylesheet, ideally minified.
+
+    Returns:
+        list[tuple[str, str]]: `(prelude, body)` pairs, where body is the text
+            between the rule's outer braces. Statements without a block, such
+            as `@import`, have a body of `None`.
+    """
+    rules = []
+    depth = 0
+    start = 0
+    body_start = None
+    i = 0
+    quote = None
+    while i < len(css):
+        char = css[i]
+        if quote is not None:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            if depth == 0:
+                body_start = i
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((css[start:body_start].strip(), css[body_start + 1:i]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            rules.append((css[start:i].strip(), None))
+            start = i + 1
+        i += 1
+    return rules
+
+
+def document_selectors(html):
+    """Collect the tag names, classes and ids used in an HTML document.
+
+    Returns:
+        tuple[set, set, set]: Lowercase tag names, class names and ids.
+    """
+    tags = {tag.lower() for tag in HTML_TAG.findall(html)}
+    classes = set()
+    for value in HTML_CLASS.findall(html):
+        classes.update(value.split())
+    ids = set(HTML_ID.findall(html))
+    return tags, classes, ids
+
+
+def _selector_matches(selector, tags, classes, ids):
+    selector = ATTRIBUTE.sub('', PSEUDO.sub('', selector)).strip()
+    if not selector:
+        return True
+    for compound in COMBINATORS.split(selector):
+        if not compound:
+            continue
+        tag = TAG_NAME.match(compound)
+        if tag and tag.group(0).lower() not in tags and tag.group(0).lower() not in ALWAYS_MATCH:
+            return False
+        if not set(CLASS_NAME.findall(compound)) <= classes:
+            return False
+        if not set(ID_NAME.findall(compound)) <= ids:
+            return False
+    return True
+
+
+def critical_css(css, tags, classes=(), ids=()):
+    """Keep only the rules that can apply to a document's elements.
+
+    A selector is kept when every compound part of it names only tags,
+    classes and ids present in the document; pseudo-classes and attribute
+    selectors are ignored. `@media` and `@supports` blocks are filtered
+    recursively, `@font-face`, `@import` and `@charset` are always kept and
+    other at-rules (such as `@keyframes`) are dropped.
+
+    Args:
+        css (str): A minified stylesheet.
+        tags (set[str]): Tag names in the document.
+        classes (set[str]): Class names in the document.
+        ids (set[str]): Ids in the document.
+
+    Returns:
+        str: The minified subset of the stylesheet.
+    """
+    tags = set(tags) | ALWAYS_MATCH
+    classes = set(classes)
+    ids = set(ids)
+    out = []
+    for prelude, body in split_rules(css):
+        if prelude.startswith('@'):
+            if prelude.startswith(KEEP_AT_RULES):
+                out.append(prelude + (';' if body is None else '{' + body + '}'))
+            elif prelude.startswith(('@media', '@supports')) and body is not None:
+                inner = critical_css(body, tags, classes, ids)
+                if inner:
+                    out.append(prelude + '{' + inner + '}')
+            continue
+        if body is None:
+            continue
+        selectors = [s for s in prelude.split(',') if _selector_matches(s, tags, classes, ids)]
+        if selectors:
+            out.append(','.join(selectors) + '{' + body + '}')
+    return ''.join(out)
+
+
+class CssBundle:
+    """Minify and bundle the site's stylesheets once per build.
+
+    Also a build observer, reporting the bundle and the inlined critical CSS
+    once the pages are rendered.
+
+    Args:
+        static_root (str): Directory whose top-level `.css` files are bundled.
+        bundle_name (str): File name of the bundle in the output root.
+        critical (bool): Inline each template's critical CSS and load the
+            bundle without blocking rendering.
+    """
+
+    def __init__(self, static_root='static', bundle_name='bundle.css', critical=False):
+        self.static_root = static_root
+        self.bundle_name = bundle_name
+        self.critical = critical
+        self.sources = []
+        self.bundle = ''
+        self.original_bytes = 0
+        self.inlined_bytes = 0
+        self._critical_cache = {}
+        self.elapsed = 0.0
+
+    def build(self, context, write=True):
+        """Write the bundle and register the template rewrite with the
+        build's template loader.
+
+        Only the bundle is written: every template link to a bundled
+        stylesheet is rewritten to it, so copy the static directory without
+        the stylesheets (see `stylesheets()`). Without `write`, as in a
+        targeted build that skips the assets, the bundle is only prepared
+        for the template rewrite.
+        """
+        start = time.perf_counter()
+        fs = context.fs
+        names = self.stylesheets(fs)
+        if not names:
+            return
+        minified = []
+        for name in names:
+            source = fs.read_text(os.path.join(self.static_root, name))
+            self.original_bytes += len(source.encode('utf-8'))
+            minified.append(minify_css(source))
+        self.sources = names
+        self.bundle = '\n'.join(minified)
+        if write:
+            bundle_path = os.path.join(context.dest_root, self.bundle_name)
+            fs.write_text(bundle_path, self.bundle)
+            context.add_output(bundle_path)
+        fingerprint = hashlib.sha256(f"{self.critical}:{self.bundle}".encode('utf-8')).hexdigest()[:16]
+        context.templates.add_source_filter(self.rewrite_template, f"css:{fingerprint}")
+        self.elapsed += time.perf_counter() - start
+
+    def stylesheets(self, fs):
+        """Return the names of the stylesheets in the static root, sorted.
+
+        Pages load them through the bundle written by `build()`, so they
+        need not be copied to the output root.
+        """
+        if not fs.isdir(self.static_root):
+            return []
+        return sorted(name for name in fs.listdir(self.static_root)
+                      if name.endswith('.css') and fs.isfile(os.path.join(self.static_root, name)))
+
+    def finish(self, context):
+        # Templates are compiled as pages render, so the inlined bytes and
+        # the rewrite time are only known once the pages are done.
+        if self.sources:
+            context.report("CSS", self.summary())
+
+    def summary(self):
+        saved = self.original_bytes - len(self.bundle.encode('utf-8'))
+        line = (f"{len(self.sources)} files bundled, {self.original_bytes} -> {len(self.bundle.encode('utf-8'))} bytes "
+                f"({saved} saved)")
+        if self.critical:
+            line += f", {self.inlined_bytes} bytes of critical CSS inlined"
+        return line + f", {self.elapsed * 1000:.1f} ms"
+
+    def _bundled_href(self, href):
+        return href.startswith('/') and not href.startswith('//') and href.lstrip('/') in self.sources
+
+    def _replacement(self, source):
+        href = '/' + self.bundle_name
+        if not self.critical:
+            return f'<link href="{href}" rel="stylesheet" />'
+        tags, classes, ids = document_selectors(source)
+        key = (frozenset(tags), frozenset(classes), frozenset(ids))
+        critical = self._critical_cache.get(key)
+        if critical is None:
+            critical = self._critical_cache[key] = critical_css(self.bundle, tags, classes, ids)
+            self.inlined_bytes += len(critical.encode('utf-8'))
+        return (f'<style>{critical}</style>'
+                f'<link href="{href}" rel="preload" as="style" onload="this.onload=null;this.rel=\'stylesheet\'" />'
+                f'<noscript><link href="{href}" rel="stylesheet" /></noscript>')
+
+    def rewrite_template(self, source):
+        """Point a template's local stylesheet links at the bundle.
+
+        The first bundled `<link rel="stylesheet">` is replaced by the bundle
+        link (or the critical CSS markup); any further ones are removed.
+        """
+        start = time.perf_counter()
+        replaced = False
+
+        def replace(match):
+            nonlocal replaced
+            tag = match.group(0)
+            href = HREF.search(tag)
+            if 'stylesheet' not in tag.lower() or href is None or not self._bundled_href(href.group(1)):
+                return tag
+            if replaced:
+                return ''
+            replaced = True
+            return self._replacement(source)
+
+        rewritten = LINK_TAG.sub(replace, source)
+        self.elapsed += time.perf_counter() - start
+        return rewritten
@@ -0,0 +1,120 @@
+"""Change manifest of a build's output, for targeted CDN purges.
+
+Every build records the SHA-256 of each output file while writing it (see
+`BuildContext(hash_outputs=True)`). At the end of the build those hashes are
+compared with the ones saved by the previous build, and the added, modified
+and removed files are written to a JSON manifest together with the public
+URLs that serve them. Nothing is read back from the output directory. The
+manifest is written after every other observer has finished and after a
+progressive build has deleted its stale outputs, so deleted pages are
+reported as removed.
+
+Manifest layout::
+
+    {
+      "basepath": "/site/",
+      "added":    [{"path": "blog/new/index.html", "sha256": "...",
+                    "urls": ["/site/blog/new/index.html", "/site/blog/new/"]}],
+      "modified": [{"path": ..., "sha256": ..., "previous_sha256": ..., "urls": [...]}],
+      "removed":  [{"path": ..., "previous_sha256": ..., "urls": [...]}],
+      "files":    {"index.html": "...", ...}
+    }
+
+`files` holds every output's hash and is what the next build compares with.
+A targeted build (`--only`) writes only some of the outputs; the others keep
+their previous hashes and nothing is reported as removed.
+
+Classes:
+    DeployManifest: Build observer that writes the manifest.
+
+Functions:
+    public_urls(): The URLs a file in the output root is served at.
+
+"""
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def public_urls(path, basepath):
+    """Return the public URLs of the output file at relative `path`.
+
+    An `index.html` is also served at its directory URL, so that URL is
+    included too.
+
+    Args:
+        path (str): Path relative to the output root, with '/' separators.
+        basepath (str): The URL prefix the site is published under.
+
+    Returns:
+        list[str]: The file URL, followed by the directory URL for index pages.
+    """
+    prefix = basepath if basepath.endswith('/') else basepath + '/'
+    urls = [prefix + path]
+    if path == 'index.html' or path.endswith('/index.html'):
+        urls.append(prefix + path[:-len('index.html')])
+    return urls
+
+
+class DeployManifest:
+    """Build observer that writes the change manifest.
+
+    Call its `finish()` after every other observer's and after stale
+    outputs are deleted, so that files written in their `finish()` methods
+    (such as search index shards) are included and deleted files are not.
+
+    Args:
+        basepath (str): URL prefix the site is published under.
+        manifest_path (str): File the manifest is written to; it also holds
+            the hashes the next build compares with.
+    """
+
+    def __init__(self, basepath, manifest_path):
+        self.basepath = basepath
+        self.manifest_path = manifest_path
+        self.manifest = None
+        self.previous = None
+
+    def load_previous(self, fs):
+        """Return the output hashes recorded by the previous build."""
+        if self.previous is None:
+            self.previous = {}
+            if fs.isfile(self.manifest_path):
+                manifest = json.loads(fs.read_text(self.manifest_path))
+                if manifest.get('version') == MANIFEST_VERSION:
+                    self.previous = manifest['files']
+        return self.previous
+
+    def compare(self, previous, current):
+        """Return the manifest for a build with hashes `current`, given the
+        hashes of the previous build."""
+        added, modified, removed = [], [], []
+        for path in sorted(current):
+            digest = current[path]
+            if path not in previous:
+                added.append({'path': path, 'sha256': digest, 'urls': public_urls(path, self.basepath)})
+            elif previous[path] != digest:
+                modified.append({'path': path, 'sha256': digest, 'previous_sha256': previous[path],
+                                 'urls': public_urls(path, self.basepath)})
+        for path in sorted(previous.keys() - current.keys()):
+            removed.append({'path': path, 'previous_sha256': previous[path], 'urls': public_urls(path, self.basepath)})
+        return {'version': MANIFEST_VERSION, 'basepath': self.basepath, 'added': added, 'modified': modified,
+                'removed': removed, 'files': current}
+
+    def finish(self, context):
+        current = {url.lstrip('/'): context.output_hashes[url]
+                   for url in context.outputs if url in context.output_hashes}
+        previous = self.load_previous(context.fs)
+        if context.selection is not None:
+            current = {**previous, **current}
+        self.manifest = self.compare(previous, current)
+        manifest_dir = os.path.dirname(self.manifest_path)
+        if manifest_dir:
+            context.fs.makedirs(manifest_dir)
+        context.fs.write_text(self.manifest_path, json.dumps(self.manifest, indent=1))
+        context.report(
+            "Changes",
+            f"{len(self.manifest['added'])} added, {len(self.manifest['modified'])} modified, "
+            f"{len(self.manifest['removed'])} removed, manifest in {self.manifest_path}",
+        )
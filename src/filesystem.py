@@ -0,0 +1,563 @@
+"""Filesystem backends used by the build.
+
+The page and asset generators never touch `open`, `os` or `shutil` directly;
+they go through one of the backends below so a build can target the local
+disk, memory, or a deploy archive without changing any generator code.
+
+Classes:
+    LocalFileSystem: Reads and writes the real disk.
+    AtomicFileSystem: Local backend replacing each written file atomically.
+    MemoryFileSystem: Keeps every file in a dictionary, optionally reading
+        through to another backend for files it does not hold.
+    ArchiveFileSystem: Streams written files into a tar or zip archive while
+        reading sources from another backend.
+    HashingFileSystem: Wraps another backend and records the SHA-256 of every
+        file written under an output root.
+
+Functions:
+    replacing(): Write a local file through a temporary file renamed over it.
+
+"""
+import contextlib
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+
+
+def _norm(path):
+    return os.path.normpath(path)
+
+
+_last_mtime = 0
+
+
+def _next_mtime():
+    # In-memory files get strictly increasing nanosecond timestamps so that
+    # caches keyed by (path, mtime) see every rewrite as a change.
+    global _last_mtime
+    _last_mtime = max(time.time_ns(), _last_mtime + 1)
+    return _last_mtime
+
+
+class LocalFileSystem:
+    """Backend that reads and writes the real disk."""
+
+    def read_bytes(self, path):
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def read_text(self, path):
+        with open(path, 'r') as file:
+            return file.read()
+
+    def open_binary(self, path):
+        return open(path, 'rb')
+
+    def write_bytes(self, path, data):
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    def write_text(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def write_chunks(self, path, chunks):
+        with open(path, 'w') as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def isfile(self, path):
+        return os.path.isfile(path)
+
+    def isdir(self, path):
+        return os.path.isdir(path)
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def mtime(self, path):
+        return os.stat(path).st_mtime_ns
+
+    def mkdir(self, path):
+        os.mkdir(path)
+
+    def makedirs(self, path):
+        os.makedirs(path, exist_ok=True)
+
+    def rmtree(self, path):
+        if os.path.islink(path):
+            os.remove(path)
+        else:
+            shutil.rmtree(path)
+
+    def remove(self, path):
+        os.remove(path)
+
+    def copy(self, source_path, dest_path):
+        shutil.copy(source_path, dest_path)
+
+
+def default_file_mode():
+    """Return the permissions `open()` gives new files under the current
+    umask."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+@contextlib.contextmanager
+def replacing(path, mode='wb', buffering=-1, file_mode=None):
+    """Open a temporary file that replaces `path` once the block completes.
+
+    The file is created in `path`'s directory and renamed over `path` with
+    `os.replace()`. If the block raises, the temporary file is deleted and
+    `path` is left as it was.
+
+    Args:
+        path (str): The file to replace.
+        mode (str): `'wb'` or `'w'`.
+        buffering (int): Passed on to `open()`.
+        file_mode (int, optional): Permissions of the new file. Defaults to
+            `default_file_mode()`.
+
+    Yields:
+        file: The temporary file, open for writing.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-')
+    try:
+        with os.fdopen(fd, mode, buffering) as file:
+            yield file
+        os.chmod(temp_path, default_file_mode() if file_mode is None else file_mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class AtomicFileSystem(LocalFileSystem):
+    """Local backend that replaces each written file atomically.
+
+    Every file is written to a temporary file in its directory and renamed
+    over the target with `os.replace()` (see `replacing()`), so a server
+    reading the output while the build runs sees either the previous or the
+    new version of each file, never a partial one. Files get the permissions
+    `open()` would give them.
+    """
+
+    def __init__(self):
+        self.mode = default_file_mode()
+
+    def write_bytes(self, path, data):
+        with replacing(path, 'wb', file_mode=self.mode) as file:
+            file.write(data)
+
+    def write_text(self, path, text):
+        with replacing(path, 'w', file_mode=self.mode) as file:
+            file.write(text)
+
+    def write_chunks(self, path, chunks):
+        with replacing(path, 'w', file_mode=self.mode) as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+    def copy(self, source_path, dest_path):
+        self.write_bytes(dest_path, self.read_bytes(source_path))
+
+
+class MemoryFileSystem:
+    """Backend that keeps files in memory.
+
+    Files and directories written through this backend live in dictionaries
+    keyed by normalized path. When a `base` backend is given, reads and
+    listings of paths the memory backend does not hold fall through to it,
+    which allows RAM-only builds from sources on disk.
+
+    Args:
+        base (optional): Backend to read through to for unknown paths.
+    """
+
+    def __init__(self, base=None):
+        self.base = base
+        self.files = {}
+        self.mtimes = {}
+        self._dirs = {'.': {}}
+        self._removed = set()
+
+    def _shadowed(self, path):
+        return any(path == r or path.startswith(r + os.sep) for r in self._removed)
+
+    def _base_has(self, path, check):
+        return self.base is not None and not self._shadowed(path) and getattr(self.base, check)(path)
+
+    def _add_entry(self, path):
+        parent, name = os.path.split(path)
+        parent = parent or '.'
+        if parent not in self._dirs:
+            self.makedirs(parent)
+        self._dirs[parent][name] = None
+
+    def read_bytes(self, path):
+        path = _norm(path)
+        if path in self.files:
+            return self.files[path]
+        if self._base_has(path, 'isfile'):
+            return self.base.read_bytes(path)
+        raise FileNotFoundError(path)
+
+    def read_text(self, path):
+        return self.read_bytes(path).decode('utf-8')
+
+    def open_binary(self, path):
+        path = _norm(path)
+        if path in self.files:
+            return io.BytesIO(self.files[path])
+        if self._base_has(path, 'isfile'):
+            return self.base.open_binary(path)
+        raise FileNotFoundError(path)
+
+    def write_bytes(self, path, data):
+        path = _norm(path)
+        parent = os.path.dirname(path) or '.'
+        if not self.isdir(parent):
+            raise FileNotFoundError(parent)
+        self._add_entry(path)
+        self.files[path] = bytes(data)
+        self.mtimes[path] = _next_mtime()
+
+    def write_text(self, path, text):
+        self.write_bytes(path, text.encode('utf-8'))
+
+    def write_chunks(self, path, chunks):
+        self.write_bytes(path, b''.join(chunk.encode('utf-8') for chunk in chunks))
+
+    def exists(self, path):
+        return self.isfile(path) or self.isdir(path)
+
+    def isfile(self, path):
+        path = _norm(path)
+        return path in self.files or self._base_has(path, 'isfile')
+
+    def isdir(self, path):
+        path = _norm(path)
+        return path in self._dirs or self._base_has(path, 'isdir')
+
+    def listdir(self, path):
+        path = _norm(path)
+        names = list(self._dirs.get(path, {}))
+        if self._base_has(path, 'isdir'):
+            names += [n for n in self.base.listdir(path)
+                      if n not in self._dirs.get(path, {}) and not self._shadowed(os.path.join(path, n))]
+        elif path not in self._dirs:
+            raise FileNotFoundError(path)
+        return names
+
+    def mtime(self, path):
+        path = _norm(path)
+        if path in self.mtimes:
+            return self.mtimes[path]
+        if self._base_has(path, 'exists'):
+            return self.base.mtime(path)
+        raise FileNotFoundError(path)
+
+    def mkdir(self, path):
+        path = _norm(path)
+        if path in self._dirs:
+            raise FileExistsError(path)
+        parent = os.path.dirname(path) or '.'
+        if not self.isdir(parent):
+            raise FileNotFoundError(parent)
+        self._add_entry(path)
+        self._dirs[path] = {}
+
+    def makedirs(self, path):
+        path = _norm(path)
+        if path in self._dirs:
+            return
+        parent = os.path.dirname(path) or '.'
+        if parent == path:
+            self._dirs[path] = {}
+            return
+        if parent not in self._dirs:
+            self.makedirs(parent)
+        self._dirs[parent][os.path.basename(path)] = None
+        self._dirs[path] = {}
+
+    def rmtree(self, path):
+        path = _norm(path)
+        prefix = path + os.sep
+        for name in [p for p in self.files if p.startswith(prefix)]:
+            del self.files[name]
+            del self.mtimes[name]
+        for name in [d for d in self._dirs if d == path or d.startswith(prefix)]:
+            del self._dirs[name]
+        parent = os.path.dirname(path) or '.'
+        self._dirs.get(parent, {}).pop(os.path.basename(path), None)
+        if self.base is not None:
+            self._removed.add(path)
+
+    def remove(self, path):
+        path = _norm(path)
+        if path in self.files:
+            del self.files[path]
+            del self.mtimes[path]
+        elif not self._base_has(path, 'isfile'):
+            raise FileNotFoundError(path)
+        parent = os.path.dirname(path) or '.'
+        self._dirs.get(parent, {}).pop(os.path.basename(path), None)
+        if self.base is not None:
+            self._removed.add(path)
+
+    def copy(self, source_path, dest_path):
+        self.write_bytes(dest_path, self.read_bytes(source_path))
+
+
+class ArchiveFileSystem:
+    """Backend that streams written files into a tar or zip archive.
+
+    Reads (sources, templates, static assets) go to the `base` backend, while
+    every file written under `root` is appended to the archive as soon as it
+    is produced, so no output file is ever written to disk individually.
+    Writes outside `root`, such as build caches, go to `base`. Member names are
+    made relative to `root`, so a build into `docs/` yields an archive whose
+    top level is the site itself.
+
+    The archive format is picked from the file name: `.zip` produces a zip
+    file, `.tar.gz`/`.tgz` a gzipped tarball and anything else a plain tar.
+
+    Args:
+        archive_path (str): Path of the archive to create.
+        root (str): Output directory that maps to the archive's top level.
+        base (optional): Backend used for reads. Defaults to the local disk.
+    """
+
+    def __init__(self, archive_path, root, base=None):
+        self.archive_path = archive_path
+        self.root = _norm(root)
+        self.base = base if base is not None else LocalFileSystem()
+        self._dirs = {self.root}
+        self._files = set()
+        if archive_path.endswith('.zip'):
+            self._zip = zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED)
+            self._tar = None
+        else:
+            mode = 'w:gz' if archive_path.endswith(('.tar.gz', '.tgz')) else 'w'
+            self._tar = tarfile.open(archive_path, mode)
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Finish writing the archive."""
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def _owns(self, path):
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def _member_name(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    def read_bytes(self, path):
+        return self.base.read_bytes(path)
+
+    def read_text(self, path):
+        return self.base.read_text(path)
+
+    def open_binary(self, path):
+        return self.base.open_binary(path)
+
+    def write_bytes(self, path, data):
+        path = _norm(path)
+        if not self._owns(path):
+            self.base.write_bytes(path, data)
+            return
+        name = self._member_name(path)
+        if self._zip is not None:
+            self._zip.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._tar.addfile(info, io.BytesIO(data))
+        self._files.add(path)
+
+    def write_text(self, path, text):
+        self.write_bytes(path, text.encode('utf-8'))
+
+    def write_chunks(self, path, chunks):
+        path = _norm(path)
+        if not self._owns(path):
+            self.base.write_chunks(path, chunks)
+            return
+        name = self._member_name(path)
+        if self._zip is not None:
+            with self._zip.open(name, 'w') as member:
+                for chunk in chunks:
+                    member.write(chunk.encode('utf-8'))
+        else:
+            # A tar header holds the member's size, so the data is spooled
+            # first; large members go to a temporary file.
+            with tempfile.SpooledTemporaryFile(max_size=1 << 20) as data:
+                for chunk in chunks:
+                    data.write(chunk.encode('utf-8'))
+                info = tarfile.TarInfo(name)
+                info.size = data.tell()
+                info.mtime = int(time.time())
+                data.seek(0)
+                self._tar.addfile(info, data)
+        self._files.add(path)
+
+    def exists(self, path):
+        return self.isfile(path) or self.isdir(path)
+
+    def isfile(self, path):
+        path = _norm(path)
+        if self._owns(path):
+            return path in self._files
+        return self.base.isfile(path)
+
+    def isdir(self, path):
+        path = _norm(path)
+        if self._owns(path):
+            return path in self._dirs
+        return self.base.isdir(path)
+
+    def listdir(self, path):
+        return self.base.listdir(path)
+
+    def mtime(self, path):
+        return self.base.mtime(path)
+
+    def mkdir(self, path):
+        path = _norm(path)
+        if not self._owns(path):
+            self.base.mkdir(path)
+        self._dirs.add(path)
+
+    def makedirs(self, path):
+        path = _norm(path)
+        if not self._owns(path):
+            self.base.makedirs(path)
+        self._dirs.add(path)
+
+    def rmtree(self, path):
+        # Archive members cannot be removed once streamed; a fresh archive
+        # starts empty, so clearing the output root is a no-op.
+        pass
+
+    def remove(self, path):
+        path = _norm(path)
+        if self._owns(path):
+            raise OSError(f"Cannot remove {path} from an archive")
+        self.base.remove(path)
+
+    def copy(self, source_path, dest_path):
+        self.write_bytes(dest_path, self.base.read_bytes(source_path))
+
+
+class HashingFileSystem:
+    """Backend that records the SHA-256 of every file written under `root`.
+
+    All operations go to the wrapped `base` backend. Digests are computed
+    from the data as it is written, so the hashes of a build's output are
+    known without reading the output back.
+
+    Args:
+        base: The backend to wrap.
+        root (str): Output directory whose writes are hashed.
+        record (callable): `record(path, hexdigest)`, called for every write
+            under `root`.
+    """
+
+    def __init__(self, base, root, record):
+        self.base = base
+        self.root = _norm(root)
+        self.record = record
+
+    def _owns(self, path):
+        path = _norm(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def read_bytes(self, path):
+        return self.base.read_bytes(path)
+
+    def read_text(self, path):
+        return self.base.read_text(path)
+
+    def open_binary(self, path):
+        return self.base.open_binary(path)
+
+    def write_bytes(self, path, data):
+        self.base.write_bytes(path, data)
+        if self._owns(path):
+            self.record(path, hashlib.sha256(data).hexdigest())
+
+    def write_text(self, path, text):
+        self.base.write_text(path, text)
+        if self._owns(path):
+            self.record(path, hashlib.sha256(text.encode('utf-8')).hexdigest())
+
+    def write_chunks(self, path, chunks):
+        if not self._owns(path):
+            self.base.write_chunks(path, chunks)
+            return
+        digest = hashlib.sha256()
+
+        def hashed():
+            for chunk in chunks:
+                digest.update(chunk.encode('utf-8'))
+                yield chunk
+
+        self.base.write_chunks(path, hashed())
+        self.record(path, digest.hexdigest())
+
+    def exists(self, path):
+        return self.base.exists(path)
+
+    def isfile(self, path):
+        return self.base.isfile(path)
+
+    def isdir(self, path):
+        return self.base.isdir(path)
+
+    def listdir(self, path):
+        return self.base.listdir(path)
+
+    def mtime(self, path):
+        return self.base.mtime(path)
+
+    def mkdir(self, path):
+        self.base.mkdir(path)
+
+    def makedirs(self, path):
+        self.base.makedirs(path)
+
+    def rmtree(self, path):
+        self.base.rmtree(path)
+
+    def remove(self, path):
+        self.base.remove(path)
+
+    def copy(self, source_path, dest_path):
+        if self._owns(dest_path):
+            self.write_bytes(dest_path, self.base.read_bytes(source_path))
+        else:
+            self.base.copy(source_path, dest_path)
+
+
+LOCAL = LocalFileSystem()
@@ -0,0 +1,187 @@
+"""Build-time syntax highlighting of fenced code blocks.
+
+A code block opened with a language name (```` ```python ````) is split into
+tokens by a lexer for that language and rendered as `<span>` elements with a
+`tok-<kind>` class, so pages no longer need a client-side highlighter.
+
+Each lexer is a single regular expression with one named group per token
+kind, compiled once when the module is imported; tokenizing is one
+`finditer()` pass over the code. Text between matches is emitted unstyled.
+
+Highlighted elements are cached by language and the SHA-256 of the code, so
+a sample repeated across pages (or across rebuilds of `serve --watch`) is
+tokenized and serialized once.
+
+Classes:
+    HighlightedCode: A shared `<code>` node with its serialized HTML.
+    Highlighter: Cache of highlighted samples and build summary.
+
+Functions:
+    language_lexer(): The lexer for a language name or alias.
+    tokenize(): Split code into tokens with a compiled lexer.
+
+"""
+import hashlib
+import re
+import time
+
+from htmlnode import LeafNode, ParentNode
+
+_STRING = r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+_NUMBER = r'\b(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?)\b'
+
+
+def _words(words):
+    return r'\b(?:' + '|'.join(words.split()) + r')\b'
+
+
+def _lexer(*rules):
+    return re.compile('|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in rules))
+
+
+PYTHON = _lexer(
+    ('comment', r'#[^\n]*'),
+    ('string', r'(?i:[rbuf]{0,2})(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|' + _STRING + ')'),
+    ('decorator', r'@[\w.]+'),
+    ('function', r'(?<=\bdef )\w+|(?<=\bclass )\w+'),
+    ('keyword', _words('False None True and as assert async await break class continue def del elif else '
+                       'except finally for from global if import in is lambda nonlocal not or pass raise '
+                       'return try while with yield')),
+    ('builtin', _words('abs all any bool bytes dict enumerate filter float getattr hasattr int isinstance '
+                       'len list map max min next object open print range repr reversed self set sorted str '
+                       'sum super tuple type zip')),
+    ('number', _NUMBER),
+)
+
+JAVASCRIPT = _lexer(
+    ('comment', r'//[^\n]*|/\*[\s\S]*?\*/'),
+    ('string', _STRING + r'|`(?:\\.|[^`\\])*`'),
+    ('function', r'(?<=\bfunction )[\w$]+|(?<=\bclass )[\w$]+'),
+    ('keyword', _words('async await break case catch class const continue default delete do else export '
+                       'extends false finally for from function if import in instanceof let new null of '
+                       'return static super switch this throw true try typeof undefined var void while yield')),
+    ('builtin', _words('Array Boolean console document JSON Map Math Number Object Promise Set String window')),
+    ('number', _NUMBER),
+)
+
+BASH = _lexer(
+    ('comment', r'(?<![^\s;])#[^\n]*'),
+    ('string', _STRING),
+    ('variable', r'\$(?:\{[^}\n]*\}|\w+|[@#?$!*-])'),
+    ('keyword', _words('case do done elif else esac fi for function if in local return select then until '
+                       'while export')),
+    ('builtin', _words('cd echo exit printf pwd read set shift source test trap unset')),
+    ('number', r'(?<![\w-])\d+\b'),
+)
+
+JSON = _lexer(
+    ('key', r'"(?:\\.|[^"\\\n])*"(?=\s*:)'),
+    ('string', r'"(?:\\.|[^"\\\n])*"'),
+    ('keyword', _words('true false null')),
+    ('number', r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?'),
+)
+
+LEXERS = {
+    'python': PYTHON, 'py': PYTHON,
+    'javascript': JAVASCRIPT, 'js': JAVASCRIPT,
+    'bash': BASH, 'sh': BASH, 'shell': BASH,
+    'json': JSON,
+}
+
+
+def language_lexer(language):
+    """Return the compiled lexer for `language`, or None if unsupported."""
+    return LEXERS.get(language)
+
+
+class HighlightedCode(ParentNode):
+    """A highlighted `<code>` element that serializes itself once.
+
+    Instances are shared by every page containing the same sample, so they
+    must not be modified; walkers such as the search index may read them.
+    """
+
+    def __init__(self, children, language):
+        super().__init__('code', children, {'class': f'language-{language}'})
+        self._html = None
+
+    def to_html(self, minifier=None):
+        # Inside <pre>, so there is nothing for a minifier to change.
+        if self._html is None:
+            self._html = super().to_html()
+        return self._html
+
+
+def tokenize(code, lexer):
+    """Split `code` into `(kind, text)` tokens with a compiled lexer.
+
+    `kind` is the name of the matching group, or None for unstyled text.
+    """
+    tokens = []
+    pos = 0
+    for match in lexer.finditer(code):
+        if match.start() > pos:
+            tokens.append((None, code[pos:match.start()]))
+        tokens.append((match.lastgroup, match.group()))
+        pos = match.end()
+    if pos < len(code):
+        tokens.append((None, code[pos:]))
+    return tokens
+
+
+class Highlighter:
+    """Highlight code blocks, caching the result for each distinct sample.
+
+    Used as a build observer, it reports the cache statistics of each build
+    and then resets them; the cache itself is kept.
+
+    Args:
+        max_entries (int): Cached samples kept; the cache is cleared when
+            it grows past this.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+        self.elapsed = 0.0
+
+    def code_node(self, code, language):
+        """Return the highlighted `<code>` element for `code`.
+
+        Returns:
+            HighlightedCode or None: A node shared with every other block
+                holding the same code, or None if the language has no lexer.
+        """
+        lexer = language_lexer(language)
+        if lexer is None:
+            return None
+        key = (language, hashlib.sha256(code.encode('utf-8')).digest())
+        node = self.cache.get(key)
+        if node is not None:
+            self.hits += 1
+            return node
+        start = time.perf_counter()
+        children = [LeafNode(None, text) if kind is None else LeafNode('span', text, {'class': f'tok-{kind}'})
+                    for kind, text in tokenize(code, lexer)]
+        node = HighlightedCode(children, language)
+        if len(self.cache) >= self.max_entries:
+            self.cache.clear()
+        self.cache[key] = node
+        self.misses += 1
+        self.elapsed += time.perf_counter() - start
+        return node
+
+    def finish(self, context):
+        if self.hits or self.misses:
+            context.report(
+                "Highlighting",
+                f"{self.hits + self.misses} code blocks, {self.misses} tokenized, {self.hits} cached, "
+                f"{self.elapsed * 1000:.1f} ms",
+            )
+        self.hits = self.misses = 0
+        self.elapsed = 0.0
+
+
+HIGHLIGHTER = Highlighter()
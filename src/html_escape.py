@@ -0,0 +1,50 @@
+"""Escaping of text and attribute values during serialization.
+
+Node values and props hold the raw text parsed from markdown; the
+serializers (`HTMLNode.to_html()`, `HtmlMinifier`, `DocumentArena.to_html()`)
+escape them as they write the HTML, so a `<` in a code sample or a quote in
+an image's alt text cannot break the page.
+
+Text and attribute values are escaped separately: text only needs `&`, `<`
+and `>`, while attribute values, always written inside double quotes unless
+they contain none of these characters, also need `"`.
+
+Each kind of value has a precomputed `str.translate()` table, applied in a
+single pass. Most values contain nothing to escape, so the special
+characters are looked for first and values without any are returned
+unchanged, without building a new string.
+
+Functions:
+    escape_text(): Escape a text value.
+    escape_attribute(): Escape an attribute value.
+
+"""
+
+
+
+def _translation_table(entities):
+    # A list indexed by code point: translate() looks characters up in it
+    # faster than in the dict of str.maketrans(). Code points past its end
+    # raise IndexError, a LookupError, and are left unchanged.
+    table = [chr(code) for code in range(128)]
+    for char, entity in entities.items():
+        table[ord(char)] = entity
+    return table
+
+
+TEXT_TABLE = _translation_table({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+ATTRIBUTE_TABLE = _translation_table({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+
+
+def escape_text(value):
+    """Return `value` escaped for use as element content."""
+    if '&' in value or '<' in value or '>' in value:
+        return value.translate(TEXT_TABLE)
+    return value
+
+
+def escape_attribute(value):
+    """Return `value` escaped for use inside a double-quoted attribute."""
+    if '&' in value or '<' in value or '>' in value or '"' in value:
+        return value.translate(ATTRIBUTE_TABLE)
+    return value
@@ -0,0 +1,143 @@
+"""Minified HTML output.
+
+An `HtmlMinifier` is handed to `HTMLNode.to_html()` to switch the serializer
+into minified mode: text runs are collapsed to single spaces and attribute
+values that need no quotes are written without them while the HTML string is
+being produced, so there is no second parse. Text inside whitespace-sensitive
+elements (`<pre>`, `<code>`, `<textarea>`, `<script>`, `<style>`) is written
+unchanged.
+
+Templates are minified once, when they are compiled, through the
+`TemplateLoader` source filter `HtmlMinifier.template()`.
+
+Classes:
+    HtmlMinifier: Minified serialization mode and build observer.
+
+Functions:
+    unquoted_safe(): Whether an attribute value can be written without quotes.
+
+"""
+import re
+
+from html_escape import escape_attribute
+
+PRESERVE_WHITESPACE = frozenset(('pre', 'code', 'textarea', 'script', 'style'))
+BLOCK_TAGS = frozenset((
+    'html', 'head', 'body', 'meta', 'title', 'link', 'style', 'script', 'base', 'noscript',
+    'article', 'aside', 'blockquote', 'div', 'dl', 'dt', 'dd', 'fieldset', 'figure', 'figcaption',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+))
+WHITESPACE = re.compile(r'\s+')
+UNQUOTED_VALUE = re.compile(r'[^\s"\'=<>`]+')
+TEMPLATE_TOKENS = re.compile(r'(<!--.*?-->|<[^>]*>)', re.DOTALL)
+TAG_NAME = re.compile(r'</?([a-zA-Z][\w-]*)')
+# Template expressions stay quoted: `{{ x }}` may render to anything.
+QUOTED_ATTRIBUTE = re.compile(r'(\s[\w:.-]+)="([^\s"\'=<>`{}]+)"')
+
+
+def unquoted_safe(value):
+    """Return whether `value` may be written as an unquoted attribute value."""
+    return UNQUOTED_VALUE.fullmatch(value) is not None
+
+
+class HtmlMinifier:
+    """Minified serialization mode, template filter and build observer.
+
+    Attributes:
+        saved (int): Characters removed from page bodies while serializing.
+        template_saved (int): Characters removed from compiled templates.
+        output_bytes (int): Size of the rendered pages, as a build observer.
+    """
+
+    def __init__(self):
+        self.saved = 0
+        self.template_saved = 0
+        self.output_bytes = 0
+        self.pages = 0
+        self.serialize_time = 0.0
+
+    def text(self, value):
+        """Collapse whitespace runs in a text node to single spaces."""
+        if '  ' not in value and '\n' not in value and '\t' not in value and '\r' not in value:
+            return value
+        collapsed = WHITESPACE.sub(' ', value)
+        self.saved += len(value) - len(collapsed)
+        return collapsed
+
+    def props(self, props):
+        """Serialize attributes, omitting quotes where that is safe. Values
+        are escaped (see `html_escape`).
+
+        Returns:
+            str: The attributes with a leading space, or '' if there are none.
+        """
+        if not props:
+            return ''
+        parts = []
+        for key, value in props.items():
+            value = escape_attribute(str(value))
+            if unquoted_safe(value):
+                parts.append(f'{key}={value}')
+                self.saved += 2
+            else:
+                parts.append(f'{key}="{value}"')
+        return ' ' + ' '.join(parts)
+
+    def template(self, source):
+        """Minify a template's source; used as a `TemplateLoader` source filter.
+
+        Whitespace next to block-level tags is removed, other whitespace runs
+        become one space, comments are dropped and safe attribute quotes are
+        removed. The contents of whitespace-sensitive elements are kept.
+        """
+        tokens = TEMPLATE_TOKENS.split(source)
+        out = []
+        preserve = None
+        for i, token in enumerate(tokens):
+            if i % 2:
+                if token.startswith('<!--'):
+                    continue
+                name = TAG_NAME.match(token)
+                name = name.group(1).lower() if name else None
+                if preserve is None:
+                    token = QUOTED_ATTRIBUTE.sub(r'\1=\2', token)
+                    if name in PRESERVE_WHITESPACE and not token.startswith('</'):
+                        preserve = name
+                elif token.startswith('</') and name == preserve:
+                    preserve = None
+                out.append(token)
+                continue
+            if preserve is not None or not token:
+                out.append(token)
+                continue
+            text = WHITESPACE.sub(' ', token)
+            if i > 0 and _is_block_tag(tokens[i - 1]):
+                text = text.lstrip(' ')
+            if i + 1 < len(tokens) and _is_block_tag(tokens[i + 1]):
+                text = text.rstrip(' ')
+            out.append(text)
+        minified = ''.join(out).strip()
+        self.template_saved += len(source) - len(minified)
+        return minified
+
+    def add_page(self, page, context):
+        self.pages += 1
+        self.output_bytes += page.output_bytes
+
+    def finish(self, context):
+        original = self.output_bytes + self.saved
+        percent = 100 * self.saved / original if original else 0
+        context.report(
+            "HTML minified",
+            f"{self.output_bytes / 1024:.1f} KiB in {self.pages} pages, {self.saved} bytes removed while "
+            f"serializing ({percent:.1f}%), {self.template_saved} bytes removed from templates, "
+            f"serialization {self.serialize_time * 1000:.1f} ms",
+        )
+
+
+def _is_block_tag(token):
+    if token.startswith('<!'):
+        return True
+    name = TAG_NAME.match(token)
+    return name is not None and name.group(1).lower() in BLOCK_TAGS
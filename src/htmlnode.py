@@ -1,3 +1,6 @@
+from html_escape import escape_attribute, escape_text
+from html_minify import PRESERVE_WHITESPACE
+
 
 class HTMLNode:
     def __init__(self, tag=None, value=None, children=None, props=None):
@@ -6,24 +9,29 @@ class HTMLNode:
         self.children = children
         self.props = props
     
-    def to_html(self):
+    def to_html(self, minifier=None):
         """Convert the HTML node to its HTML string representation.
         
         This is an abstract method that must be implemented by subclasses.
         Each subclass provides its own implementation based on whether it's a
         leaf node (with content) or a parent node (with children).
         
+        Args:
+            minifier (HtmlMinifier, optional): Serialize in minified mode (see
+                `html_minify`).
+        
         Raises:
             NotImplementedError: Always, as this is an abstract method.
         """
         raise NotImplementedError
     
-    def props_to_html(self):
+    def props_to_html(self, minifier=None):
         """Convert the node's properties dictionary to HTML attribute string.
         
         Converts a dictionary of HTML attributes (props) into a formatted
         string suitable for insertion into an HTML tag. The attributes are
-        formatted as `key="value"` pairs separated by spaces.
+        formatted as `key="value"` pairs separated by spaces, with the values
+        escaped (see `html_escape`).
         
         Returns:
             str: A string containing HTML attributes formatted as ` key="value"`.
@@ -33,10 +41,15 @@ class HTMLNode:
         Example:
             If props = {"href": "https://example.com", "target": "_blank"},
             returns ' href="https://example.com" target="_blank"'.
+            With a minifier, safe values are unquoted: ' target=_blank'.
         """
+        if minifier is not None:
+            return minifier.props(self.props)
+        if self.props is None:
+            return ""
         props_str = ""
-        if self.props is not None:
-            props_str += ' ' + ' '.join(f"{k}=\"{v}\"" for k, v in self.props.items())
+        for key, value in self.props.items():
+            props_str += f" {key}=\"{escape_attribute(str(value))}\""
         return props_str
     
     def __repr__(self):
@@ -46,12 +59,17 @@ class LeafNode(HTMLNode):
     def __init__(self, tag, value, props=None):
         super().__init__(tag=tag, value=value, props=props)
     
-    def to_html(self):
+    def to_html(self, minifier=None):
         """Convert the leaf node to its HTML string representation.
         
         Generates an HTML string for a leaf node, which contains content but
         no children. If the node has no tag, returns the value as plain text.
         Otherwise, returns a properly formatted HTML tag with the value as content.
+        The value is escaped, so it may contain any text.
+        
+        Args:
+            minifier (HtmlMinifier, optional): Collapse whitespace in the value
+                (except in `<code>`) and unquote safe attribute values.
         
         Returns:
             str: The HTML string representation of the leaf node. If tag is None,
@@ -61,27 +79,39 @@ class LeafNode(HTMLNode):
         Raises:
             ValueError: If the value is None, as leaf nodes must have content.
         """
-        if self.value is None:
+        value = self.value
+        if value is None:
             raise ValueError("Value is None!")
-        if self.tag is None:
-            return self.value
-        html_str = f"<{self.tag}"
+        if minifier is not None:
+            value = escape_text(value if self.tag in PRESERVE_WHITESPACE else minifier.text(value))
+            if self.tag is None:
+                return value
+            props = minifier.props(self.props) if self.props else ''
+            return f"<{self.tag}{props}>{value}</{self.tag}>"
+        value = escape_text(value)
+        tag = self.tag
+        if tag is None:
+            return value
         if self.props is not None:
-            html_str += self.props_to_html()
-        html_str += f">{self.value}</{self.tag}>"
-        return html_str
+            return f"<{tag}{self.props_to_html()}>{value}</{tag}>"
+        return f"<{tag}>{value}</{tag}>"
 
 class ParentNode(HTMLNode):
     def __init__(self, tag, children, props=None):
         super().__init__(tag=tag, value=None, children=children, props = props)
     
-    def to_html(self):
+    def to_html(self, minifier=None):
         """Convert the parent node to its HTML string representation.
         
         Generates an HTML string for a parent node, which contains child nodes
         but no direct content. Recursively converts all child nodes to HTML and
         wraps them in the parent's tag.
         
+        Args:
+            minifier (HtmlMinifier, optional): Serialize in minified mode.
+                Children of whitespace-sensitive elements such as `<pre>` are
+                serialized unchanged.
+        
         Returns:
             str: The HTML string representation of the parent node and all its
                 children. The format is '<tag>child1_htmlchild2_html...</tag>'.
@@ -94,6 +124,10 @@ class ParentNode(HTMLNode):
             raise ValueError("Tag is None!")
         if self.children is None:
             raise ValueError("Children is None!")
+        if minifier is not None:
+            inner = None if self.tag in PRESERVE_WHITESPACE else minifier
+            props = minifier.props(self.props) if self.props else ''
+            return f"<{self.tag}{props}>" + ''.join([c.to_html(inner) for c in self.children]) + f"</{self.tag}>"
         html_str = f"<{self.tag}{self.props_to_html()}>" + ''.join(f"{c.to_html()}" for c in self.children)
         html_str += f"</{self.tag}>"
         return html_str
\ No newline at end of file
@@ -0,0 +1,235 @@
+"""Image dimensions index used to enrich `<img>` elements.
+
+Image sizes are read from the PNG, GIF, JPEG or WebP header bytes of each
+static asset the first time it is referenced, and cached by path and
+modification time in a small JSON index that persists between builds. Every
+page of a build shares the same index, so an image referenced from a hundred
+pages is inspected once.
+
+Rendered `<img>` elements pointing at indexed assets get `width`/`height`
+attributes (so the browser can reserve space before the image loads) and
+`loading="lazy"`/`decoding="async"`. Images smaller than a threshold are
+inlined as `data:` URIs instead.
+
+Classes:
+    ImageIndex: Cached image metadata and the `<img>` node transform.
+
+Functions:
+    read_image_size(): Read `(format, width, height)` from an image header.
+
+"""
+import base64
+import json
+import os
+import struct
+import time
+
+from htmlnode import ParentNode
+from link_checker import resolve_target
+
+INDEX_VERSION = 1
+MIME_TYPES = {'png': 'image/png', 'gif': 'image/gif', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _read_jpeg_size(file):
+    file.seek(2)
+    while True:
+        byte = file.read(1)
+        while byte and byte != b'\xff':
+            byte = file.read(1)
+        while byte == b'\xff':
+            byte = file.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker == 0xD9:
+            return None
+        length_bytes = file.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            segment = file.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack('>HH', segment[1:5])
+            return width, height
+        file.seek(length - 2, 1)
+
+
+def read_image_size(file):
+    """Read an image's format and dimensions from its header.
+
+    Only the header bytes are read: 30 bytes for PNG, GIF and WebP, and the
+    segment headers up to the first frame for JPEG.
+
+    Args:
+        file: A binary file object positioned anywhere; it is rewound.
+
+    Returns:
+        tuple[str, int, int] or None: `(format, width, height)`, where format
+            is one of 'png', 'gif', 'jpeg' or 'webp', or `None` if the format
+            is not recognized or the header is truncated.
+    """
+    file.seek(0)
+    head = file.read(30)
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR' and len(head) >= 24:
+        width, height = struct.unpack('>II', head[16:24])
+        return 'png', width, height
+    if head[:6] in (b'GIF87a', b'GIF89a') and len(head) >= 10:
+        width, height = struct.unpack('<HH', head[6:10])
+        return 'gif', width, height
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+            return 'webp', width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(head[21:25], 'little')
+            return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            width = int.from_bytes(head[24:27], 'little') + 1
+            height = int.from_bytes(head[27:30], 'little') + 1
+            return 'webp', width, height
+        return None
+    if head[:2] == b'\xff\xd8':
+        size = _read_jpeg_size(file)
+        if size is not None:
+            return ('jpeg',) + size
+    return None
+
+
+class ImageIndex:
+    """Shared image metadata cache and `<img>` node transform.
+
+    Args:
+        static_root (str): Directory the site's assets are copied from; a
+            `src` of `/images/a.png` is looked up as `<static_root>/images/a.png`.
+        state_path (str, optional): File the index is persisted in.
+        inline_threshold (int): Images smaller than this many bytes are
+            inlined as `data:` URIs. 0 disables inlining.
+    """
+
+    def __init__(self, static_root='static', state_path=None, inline_threshold=2048):
+        self.static_root = static_root
+        self.state_path = state_path
+        self.inline_threshold = inline_threshold
+        self.entries = {}
+        self._data_uris = {}
+        self._checked = {}
+        self.reads = 0
+        self.images = 0
+        self.inlined = 0
+        self.elapsed = 0.0
+
+    def load(self, fs):
+        """Load the index saved by a previous build."""
+        if self.state_path is None or not fs.isfile(self.state_path):
+            return
+        state = json.loads(fs.read_text(self.state_path))
+        if state.get('version') == INDEX_VERSION:
+            self.entries = state['images']
+
+    def save(self, fs, keep_unreferenced=False):
+        """Persist the entries of the images referenced in this build.
+
+        With `keep_unreferenced`, as for a targeted build that only renders
+        some pages, the previous entries of the other images are kept too.
+        """
+        if self.state_path is None:
+            return
+        state_dir = os.path.dirname(self.state_path)
+        if state_dir:
+            fs.makedirs(state_dir)
+        entries = dict(self.entries) if keep_unreferenced else {}
+        for path, entry in self._checked.items():
+            if entry is not None:
+                entries[path] = entry
+            else:
+                entries.pop(path, None)
+        fs.write_text(self.state_path, json.dumps({'version': INDEX_VERSION, 'images': entries}))
+
+    def lookup(self, fs, path):
+        """Return the metadata of the image at `path`.
+
+        The header is only read if the file's mtime differs from the cached
+        entry. Each path is checked at most once per build.
+
+        Returns:
+            dict or None: `{'mtime', 'format', 'width', 'height', 'bytes'}`,
+                or `None` if the file is missing or not a recognized image.
+        """
+        if path in self._checked:
+            return self._checked[path]
+        entry = None
+        if fs.isfile(path):
+            mtime = fs.mtime(path)
+            entry = self.entries.get(path)
+            if entry is None or entry['mtime'] != mtime:
+                with fs.open_binary(path) as file:
+                    info = read_image_size(file)
+                    file.seek(0, 2)
+                    size = file.tell()
+                self.reads += 1
+                entry = None
+                if info is not None:
+                    entry = {'mtime': mtime, 'format': info[0], 'width': info[1], 'height': info[2], 'bytes': size}
+                    self.entries[path] = entry
+        self._checked[path] = entry
+        return entry
+
+    def data_uri(self, fs, path, entry):
+        uri = self._data_uris.get(path)
+        if uri is None:
+            encoded = base64.b64encode(fs.read_bytes(path)).decode('ascii')
+            uri = self._data_uris[path] = f"data:{MIME_TYPES[entry['format']]};base64,{encoded}"
+        return uri
+
+    def transform(self, node, page_url, fs):
+        """Add image attributes to every `<img>` in a page's node tree.
+
+        Args:
+            node (HTMLNode): The page body.
+            page_url (str): URL path of the page, for relative `src` values.
+            fs: Filesystem backend the static assets are read from.
+        """
+        start = time.perf_counter()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, ParentNode):
+                stack.extend(current.children or [])
+            elif current.tag == 'img' and current.props and current.props.get('src'):
+                self._decorate(current, page_url, fs)
+        self.elapsed += time.perf_counter() - start
+
+    def _decorate(self, img, page_url, fs):
+        url_path = resolve_target(img.props['src'], page_url)
+        if url_path is None:
+            return
+        path = os.path.join(self.static_root, *url_path.lstrip('/').split('/'))
+        entry = self.lookup(fs, path)
+        if entry is None:
+            return
+        self.images += 1
+        props = dict(img.props)
+        props['width'] = str(entry['width'])
+        props['height'] = str(entry['height'])
+        if entry['bytes'] < self.inline_threshold:
+            props['src'] = self.data_uri(fs, path, entry)
+            self.inlined += 1
+        else:
+            props['loading'] = 'lazy'
+            props['decoding'] = 'async'
+        img.props = props
+
+    def finish(self, context):
+        self.save(context.fs, keep_unreferenced=context.selection is not None)
+        context.report(
+            "Images",
+            f"{self.images} references, {len(self._checked)} files, {self.reads} headers read, "
+            f"{self.inlined} inlined, {self.elapsed * 1000:.1f} ms",
+        )
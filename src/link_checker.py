@@ -0,0 +1,140 @@
+"""Build-time checker for internal links and image sources.
+
+Each rendered page's node tree is scanned for `href`/`src` attributes as the
+page is generated. After the last page, every internal target is looked up in
+the build's set of output URLs, which already holds every generated page and
+copied asset, so no output file is read back.
+
+Classes:
+    LinkChecker: Build observer reporting broken internal links.
+
+Functions:
+    collect_targets(): Return the `href`/`src` values of an HTML node tree.
+    resolve_target(): Normalize an internal link to a site-relative path.
+
+"""
+import posixpath
+import time
+from urllib.parse import unquote, urlsplit
+
+from htmlnode import ParentNode
+
+LINK_ATTRIBUTES = ('href', 'src')
+
+
+def collect_targets(node):
+    """Return the link and image targets of an HTML node tree.
+
+    Args:
+        node (HTMLNode): The root of the tree.
+
+    Returns:
+        list[str]: Every `href` and `src` value in document order.
+    """
+    targets = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props:
+            for attribute in LINK_ATTRIBUTES:
+                value = current.props.get(attribute)
+                if value is not None:
+                    targets.append(value)
+        if isinstance(current, ParentNode):
+            stack.extend(reversed(current.children or []))
+    return targets
+
+
+def resolve_target(target, page_url):
+    """Normalize an internal link target to a site-relative path.
+
+    Args:
+        target (str): The `href` or `src` value.
+        page_url (str): URL path of the page the link appears on.
+
+    Returns:
+        str or None: The absolute, normalized URL path without query or
+            fragment, or `None` if the target is external (has a scheme or
+            host), a pure fragment, or empty.
+    """
+    parts = urlsplit(target)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if not path.startswith('/'):
+        path = posixpath.join(posixpath.dirname(page_url), path)
+    normalized = posixpath.normpath(path)
+    if path.endswith('/') and normalized != '/':
+        normalized += '/'
+    return normalized
+
+
+def target_exists(path, outputs):
+    """Check whether an internal path is served by one of the outputs.
+
+    A path matches an output file directly, as a directory containing an
+    `index.html`, or as a page without its `.html` extension.
+    """
+    if path in outputs:
+        return True
+    base = path.rstrip('/')
+    return base + '/index.html' in outputs or base + '.html' in outputs
+
+
+class LinkChecker:
+    """Build observer that reports broken internal links by source page.
+
+    Args:
+        max_report (int): Maximum number of broken links printed per page.
+    """
+
+    def __init__(self, max_report=20):
+        self.max_report = max_report
+        self.links = {}
+        self.broken = {}
+        self.checked = 0
+        self.elapsed = 0.0
+
+    def add_page(self, page, context):
+        start = time.perf_counter()
+        self.links[page.url] = collect_targets(page.node)
+        self.elapsed += time.perf_counter() - start
+
+    def check(self, outputs):
+        """Check every collected target against the output URL set.
+
+        Args:
+            outputs (set[str]): URL paths of every file the build produced.
+
+        Returns:
+            dict[str, list[str]]: Broken targets keyed by source page URL.
+        """
+        broken = {}
+        checked = 0
+        for page_url, targets in self.links.items():
+            for target in targets:
+                path = resolve_target(target, page_url)
+                if path is None:
+                    continue
+                checked += 1
+                if not target_exists(path, outputs):
+                    broken.setdefault(page_url, []).append(target)
+        self.checked = checked
+        return broken
+
+    def finish(self, context):
+        start = time.perf_counter()
+        self.broken = self.check(context.outputs)
+        self.elapsed += time.perf_counter() - start
+        count = sum(len(targets) for targets in self.broken.values())
+        context.report(
+            "Internal links",
+            f"{self.checked} checked, {count} broken on {len(self.broken)} pages, {self.elapsed * 1000:.1f} ms",
+        )
+        for page_url in sorted(self.broken):
+            targets = self.broken[page_url]
+            print(f"Broken links on {page_url}:")
+            for target in targets[:self.max_report]:
+                print(f"  {target}")
+            if len(targets) > self.max_report:
+                print(f"  ... and {len(targets) - self.max_report} more")
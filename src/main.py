@@ -1,19 +1,390 @@
 from textnode import TextNode, TextType
 from htmlnode import HTMLNode, LeafNode, ParentNode
-from markdown_blocks import markdown_to_blocks,block_to_block_type, strip_ordered_list_prefix, BlockType, strip_paragraph_newlines, strip_codeblock_backticks, extract_heading_level, extract_title
+from markdown_blocks import markdown_to_blocks,block_to_block_type, strip_ordered_list_prefix, BlockType, strip_paragraph_newlines, strip_codeblock_backticks, extract_heading_level, extract_title, extract_codeblock_language
 from markdown_inline import text_to_textnodes
+from filesystem import (LOCAL, ArchiveFileSystem, AtomicFileSystem, HashingFileSystem, LocalFileSystem,
+                        MemoryFileSystem, replacing)
+from server import SiteStore, make_server
+from build_context import BuildContext, Page
+from search_index import SearchIndex
+from link_checker import LinkChecker
+from publish import Release, rollback, update_live_manifest
+from templates import Markup, TemplateLoader
+from bytes_pipeline import map_source, iter_blocks, extract_title_bytes
+from registry import BLOCKS, INLINE
+from image_index import ImageIndex
+from css_assets import CssBundle
+from html_minify import HtmlMinifier
+from memprofile import MemoryProfiler
+from page_budget import PageBudget
+from deploy_manifest import DeployManifest
+from page_selection import PageSelection
+from page_graph import PageGraph
+from highlight import HIGHLIGHTER
+from build_cache import RenderCache
+from page_index import PageIndex
+from build_history import BuildHistory, Stopwatch, print_stats
+from page_schedule import PageSchedule
+import argparse
+import hashlib
 import os
-import shutil
 import sys
+import threading
+import time
 
-def main():
+CACHE_DIR = '.cache'
+RELEASES_DIR = '.releases'
+HISTORY_PATH = os.path.join(CACHE_DIR, 'build-history.sqlite')
+
+def main(argv=None):
     """Main entry point for the static site generator application.
+
+    Args:
+        argv (list[str], optional): Command line arguments, excluding the
+            program name. Defaults to `sys.argv[1:]`.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'serve':
+        return serve(argv[1:])
+    if argv and argv[0] == 'rollback':
+        return rollback_command(argv[1:])
+    if argv and argv[0] == 'stats':
+        return stats_command(argv[1:])
+    parser = argparse.ArgumentParser(description="Build the static site from content/ into docs/.")
+    parser.add_argument('basepath', nargs='?', default='/',
+                        help="URL prefix for absolute links in the generated pages")
+    parser.add_argument('--archive', metavar='PATH',
+                        help="stream the output into a .tar, .tar.gz or .zip archive instead of docs/")
+    parser.add_argument('--atomic', action='store_true',
+                        help=f"build into a new release under {RELEASES_DIR}/ and publish it by swapping the docs symlink")
+    parser.add_argument('--keep', type=int, default=5, metavar='N',
+                        help="number of releases kept for rollback with --atomic")
+    parser.add_argument('--stream-threshold', type=int, metavar='BYTES',
+                        help="render sources at least this large with the memory-mapped streaming pipeline")
+    parser.add_argument('--critical-css', action='store_true',
+                        help="inline the CSS used by each template and load the stylesheet bundle without blocking")
+    parser.add_argument('--minify', action='store_true',
+                        help="write minified HTML, collapsing whitespace and dropping optional attribute quotes")
+    parser.add_argument('--memprofile', nargs='?', const=os.path.join(CACHE_DIR, 'memprofile.json'), metavar='PATH',
+                        help="record per-stage memory use with tracemalloc and write a JSON report "
+                             f"(default {CACHE_DIR}/memprofile.json)")
+    parser.add_argument('--memprofile-pages', type=int, default=5, metavar='N',
+                        help="number of largest pages whose allocation sites are reported")
+    parser.add_argument('--page-budget', type=float, metavar='SECONDS',
+                        help="fail the build if a single page takes longer than this to render")
+    parser.add_argument('--quarantine', action='store_true',
+                        help="with --page-budget, skip over-budget pages and list them instead of failing")
+    parser.add_argument('--cache-dir', metavar='PATH',
+                        help="reuse parsed page bodies from this content-addressed cache directory, "
+                             "which may be shared between machines")
+    parser.add_argument('--cache-max-size', type=int, default=512, metavar='MIB',
+                        help="prune the least recently used cache entries beyond this size")
+    parser.add_argument('--only', action='append', metavar='PATTERN',
+                        help="only build the content pages matching this path or glob (repeatable); "
+                             "site-wide artifacts are updated in place")
+    parser.add_argument('--assets', action='store_true',
+                        help="with --only, also copy static/ into docs/")
+    parser.add_argument('--progressive', action='store_true',
+                        help="update docs/ in place, rendering changed pages first and replacing each file "
+                             "atomically as soon as it is written")
+    parser.add_argument('--priority-file', metavar='PATH',
+                        help="with --progressive, render the URLs listed in this file (one per line) before "
+                             "the other unchanged pages; implies --progressive")
+    parser.add_argument('--history-builds', type=int, default=50, metavar='N',
+                        help=f"record per-page timings in {HISTORY_PATH}, keeping the last N builds (0 disables)")
+    parser.add_argument('--site-url', metavar='URL',
+                        help="scheme and host the site is served from, such as https://example.com; "
+                             "enables sitemap.xml and feed.xml")
+    args = parser.parse_args(argv)
+    options = {'stream_threshold': args.stream_threshold, 'critical_css': args.critical_css, 'minify': args.minify,
+               'site_url': args.site_url}
+    if args.only and (args.archive or args.atomic):
+        parser.error("--only updates docs/ in place and cannot be combined with --archive or --atomic")
+    progressive = args.progressive or args.priority_file is not None
+    if progressive and (args.archive or args.atomic):
+        parser.error("--progressive updates docs/ in place and cannot be combined with --archive or --atomic")
+    if progressive:
+        options['schedule'] = PageSchedule()
+        if args.priority_file:
+            options['schedule'].load(LOCAL, args.priority_file, args.basepath)
+    if progressive or args.only:
+        # docs/ may be a release published with --atomic, whose unchanged
+        # files are hardlinks into older releases: replace files rather than
+        # writing through them, so rollback still restores those releases.
+        options['fs'] = AtomicFileSystem()
+    if args.only:
+        options['selection'] = PageSelection(args.only)
+        options['copy_assets'] = args.assets
+    if args.history_builds > 0:
+        options['history'] = BuildHistory(HISTORY_PATH, keep=args.history_builds)
+    if args.cache_dir:
+        options['render_cache'] = RenderCache(args.cache_dir, max_bytes=args.cache_max_size * 1024 * 1024)
+    if args.page_budget:
+        options['page_budget'] = PageBudget(args.page_budget, quarantine=args.quarantine)
+    if args.memprofile:
+        options['memprofile'] = MemoryProfiler(args.memprofile, largest=args.memprofile_pages)
+    if args.archive:
+        with ArchiveFileSystem(args.archive, 'docs') as fs:
+            build_site(args.basepath, fs=fs, **options)
+    elif args.atomic:
+        release = Release('docs', RELEASES_DIR)
+        try:
+            build_site(args.basepath, fs=release.fs, **options)
+        except BaseException:
+            release.discard()
+            raise
+        pruned = release.publish(keep=args.keep)
+        print(f"Published release {release.release_id} ({release.fs.linked} files linked from the "
+              f"previous release, {release.fs.written} written, {len(pruned)} old releases pruned)")
+    else:
+        context = build_site(args.basepath, **options)
+        if progressive or args.only:
+            update_live_manifest('docs', RELEASES_DIR, context.output_hashes)
+
+def rollback_command(argv):
+    """Point docs/ back at an earlier release published with `--atomic`.
+
+    Args:
+        argv (list[str]): Arguments following the `rollback` command.
+    """
+    parser = argparse.ArgumentParser(prog='main.py rollback', description="Roll docs/ back to an earlier release.")
+    parser.add_argument('--steps', type=int, default=1, help="number of releases to go back")
+    args = parser.parse_args(argv)
+    print(f"docs/ now points at release {rollback('docs', RELEASES_DIR, args.steps)}")
+
+def stats_command(argv):
+    """Print page timing trends from the build history.
+
+    Args:
+        argv (list[str]): Arguments following the `stats` command.
+    """
+    parser = argparse.ArgumentParser(prog='main.py stats',
+                                     description="Show the slowest pages and timing trends of recent builds.")
+    parser.add_argument('--builds', type=int, default=10, metavar='N', help="number of recent builds to cover")
+    parser.add_argument('--limit', type=int, default=10, metavar='N', help="pages listed per table")
+    parser.add_argument('--db', default=HISTORY_PATH, help=f"history database (default {HISTORY_PATH})")
+    args = parser.parse_args(argv)
+    print_stats(args.db, builds=args.builds, limit=args.limit)
+
+def serve(argv):
+    """Build the site into memory and serve it with the development server.
+
+    The build output never touches docs/. With `--watch`, the sources are
+    polled and the site is rebuilt into memory when they change; the store's
+    entries are updated in place so clients never see a partial rebuild.
+
+    Args:
+        argv (list[str]): Arguments following the `serve` command.
+    """
+    parser = argparse.ArgumentParser(prog='main.py serve', description="Serve the site from memory.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--basepath', default='/')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', default=0,
+                        help="poll the sources at this interval and rebuild on change")
+    args = parser.parse_args(argv)
+    store = SiteStore()
+
+    def rebuild():
+        return build_into_store(store, args.basepath)
+
+    rebuild()
+    server = make_server(store, args.host, args.port)
+    print(f"Serving {len(store)} files at http://{args.host}:{server.server_address[1]}{args.basepath}")
+    if args.watch:
+        threading.Thread(target=_watch_sources, args=(rebuild, args.watch), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def build_into_store(store, basepath, base=LOCAL):
+    """Build the site into memory and load the output into a `SiteStore`.
+
+    The files are stored under `basepath`, where the pages' links point.
+
+    Args:
+        store (SiteStore): The store to update.
+        basepath (str): URL prefix the site is built and served under.
+        base (optional): Backend the sources are read from. Defaults to the
+            local disk.
+
+    Returns:
+        int: The number of entries added, changed or removed.
     """
-    basepath = '/'
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
-    copy_directory('static', 'docs')
-    generate_pages_recursive('content', basepath, 'template.html', 'docs')
+    fs = MemoryFileSystem(base=base)
+    build_site(basepath, fs=fs)
+    return store.load(fs, 'docs', prefix=basepath)
+
+def _source_mtimes():
+    mtimes = {}
+    for root in ('content', 'static'):
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                mtimes[path] = os.stat(path).st_mtime_ns
+    if os.path.exists('template.html'):
+        mtimes['template.html'] = os.stat('template.html').st_mtime_ns
+    return mtimes
+
+def _watch_sources(rebuild, interval):
+    last = _source_mtimes()
+    while True:
+        time.sleep(interval)
+        current = _source_mtimes()
+        if current != last:
+            last = current
+            try:
+                print(f"Rebuilt site, {rebuild()} files changed")
+            except Exception as error:
+                print(f"Rebuild failed: {error}")
+
+def build_site(basepath, fs=LOCAL, stream_threshold=None, critical_css=False, minify=False, memprofile=None,
+               page_budget=None, selection=None, copy_assets=True, render_cache=None, site_url=None,
+               history=None, schedule=None):
+    """Copy static assets and generate every content page into docs/.
+
+    The sources are first scanned for their links and headings, so every
+    page's template can list the pages linking to it and related pages (see
+    `page_graph`). Site-wide artifacts such as the search index are emitted
+    after the pages, followed by a manifest of the output files that changed
+    since the last build and a build summary. The title, summary and word
+    count of each page are kept in a persisted index (see `page_index`), from
+    which the blog listing pages, `sitemap.xml` and `feed.xml` are written.
+
+    With a `selection`, only the matching pages are generated and docs/ is
+    updated in place: the rest of the previous output is kept and taken from
+    the previous deploy manifest, so links to it still resolve and the
+    manifest keeps listing it. The search index is left as it is; the next
+    full build re-tokenizes the pages whose source changed. When docs/ is a
+    release published with `--atomic`, build through an `AtomicFileSystem`:
+    the release's unchanged files are hardlinks into older releases, which
+    writing in place would modify too.
+
+    With a `schedule`, the build is progressive: docs/ is updated in place
+    rather than cleared first, the pages are rendered in the schedule's
+    priority order (see `page_schedule`), and each file replaces its previous
+    version as soon as it is written when `fs` is an `AtomicFileSystem`.
+    Files the build did not write are deleted at the end. Such a build never
+    uses the streaming pipeline, which writes its output in place.
+
+    Args:
+        basepath (str): URL prefix for absolute links in the generated pages.
+        fs (optional): Filesystem backend to read sources from and write the
+            output to. Defaults to the local disk.
+        stream_threshold (int, optional): Source size in bytes from which
+            pages are rendered with `generate_page_streaming()`.
+        critical_css (bool): Inline each template's critical CSS instead of
+            linking the stylesheet bundle directly.
+        minify (bool): Serialize pages and templates as minified HTML.
+        memprofile (MemoryProfiler, optional): Profile the memory used by each
+            page generation stage.
+        page_budget (PageBudget, optional): Time limit for rendering a
+            single page.
+        selection (PageSelection, optional): Only generate these pages.
+        copy_assets (bool): Copy static/ into docs/. A full build always
+            starts from an empty docs/; with a `selection` the files are
+            copied over the previous output.
+        render_cache (RenderCache, optional): Cache the parsed node tree of
+            every page.
+        site_url (str, optional): Scheme and host the site is served from.
+            Required for `sitemap.xml` and `feed.xml`.
+        history (BuildHistory, optional): Record the build's per-page
+            metrics for `main.py stats`.
+        schedule (PageSchedule, optional): Render the pages in priority
+            order, updating docs/ in place.
+
+    Returns:
+        BuildContext: The finished build's context.
+    """
+    context = BuildContext(fs=fs, content_root='content', dest_root='docs', hash_outputs=True)
+    fs = context.fs
+    context.selection = selection
+    manifest = DeployManifest(basepath, os.path.join(CACHE_DIR, 'deploy-manifest.json'))
+    if selection is not None:
+        context.outputs.update('/' + path for path in manifest.load_previous(fs))
+    context.stream_threshold = stream_threshold
+    if memprofile is not None:
+        context.memprofile = context.add_observer(memprofile)
+        memprofile.start()
+    if page_budget is not None:
+        context.page_budget = context.add_observer(page_budget)
+    if render_cache is not None:
+        context.render_cache = context.add_observer(render_cache)
+    if selection is None:
+        search_index = context.add_observer(SearchIndex(state_path=os.path.join(CACHE_DIR, 'search-index.json')))
+        search_index.load(fs)
+    else:
+        context.report("Search index", "unchanged in a targeted build")
+    images = context.add_observer(ImageIndex('static', state_path=os.path.join(CACHE_DIR, 'image-index.json')))
+    images.load(fs)
+    context.add_transform(images.transform)
+    context.page_graph = context.add_observer(PageGraph(state_path=os.path.join(CACHE_DIR, 'page-graph.json')))
+    context.page_graph.load(fs)
+    context.page_graph.scan(fs, 'content', selection=selection)
+    page_index = context.add_observer(PageIndex(basepath, state_path=os.path.join(CACHE_DIR, 'page-index.json'),
+                                                site_url=site_url, rebase=rebase_links))
+    page_index.load(fs)
+    context.templates.partials_dir = 'partials'
+    context.templates.site['nav'] = site_navigation('content', fs=fs)
+    css = context.add_observer(CssBundle('static', critical=critical_css))
+    if copy_assets:
+        stylesheets = {os.path.join('static', name) for name in css.stylesheets(fs)}
+        copy_directory('static', 'docs', fs=fs, context=context, clean=selection is None and schedule is None,
+                       exclude=stylesheets)
+    css.build(context, write=copy_assets)
+    context.add_observer(HIGHLIGHTER)
+    if minify:
+        context.minifier = context.add_observer(HtmlMinifier())
+        context.templates.add_source_filter(context.minifier.template, 'minify')
+    if history is not None:
+        context.add_observer(history)
+    # Observers finish in the order they were added: the link checker comes
+    # after those writing files at the end of the build, such as the blog
+    # listing pages, so links to these resolve.
+    context.add_observer(LinkChecker())
+    if schedule is not None:
+        context.add_observer(schedule)
+        pages = schedule.order(list(iter_pages('content', 'docs', fs=fs, selection=selection)), context,
+                               page_index.source_mtimes())
+        generate_pages_in_order(pages, basepath, 'template.html', fs=fs, context=context)
+    else:
+        generate_pages_recursive('content', basepath, 'template.html', 'docs', fs=fs, context=context,
+                                 selection=selection)
+    if selection is not None:
+        context.report("Selection", f"{selection.matched} pages matching {selection}")
+    context.report(
+        "Templates",
+        f"{context.templates.compiled} compiled, {context.templates.partial_renders} partial renders",
+    )
+    context.finish()
+    if schedule is not None and selection is None:
+        context.report("Stale files", f"{remove_stale_outputs('docs', context)} removed from docs/")
+    # Last, once docs/ holds exactly the files of this build.
+    manifest.finish(context)
+    context.print_summary()
+    return context
+
+def site_navigation(content_root, fs=LOCAL):
+    """Build the `nav` template variable from the top-level content sections.
+
+    Args:
+        content_root (str): The content directory.
+        fs (optional): Filesystem backend. Defaults to the local disk.
+
+    Returns:
+        list[dict]: `{'url': ..., 'title': ...}` entries for the home page and
+            each top-level directory containing an `index.md`, in name order.
+    """
+    nav = [{'url': '/', 'title': 'Home'}]
+    if not fs.isdir(content_root):
+        return nav
+    for name in sorted(fs.listdir(content_root)):
+        if fs.isfile(os.path.join(content_root, name, 'index.md')):
+            nav.append({'url': f'/{name}', 'title': name.replace('-', ' ').title()})
+    return nav
 
 def text_node_to_html_node(text_node):
     """Convert a TextNode to its corresponding HTML node representation.
@@ -35,24 +406,20 @@ def text_node_to_html_node(text_node):
             - IMAGE: LeafNode with 'img' tag, src and alt properties
     
     Raises:
-        Exception: If the text_node.text_type doesn't match any allowed TextType
-            values.
-    """
-    match text_node.text_type:
-        case TextType.TEXT:
-            return LeafNode(tag=None,value=text_node.text)
-        case TextType.BOLD:
-            return LeafNode(tag='b', value=text_node.text)
-        case TextType.ITALIC:
-            return LeafNode(tag='i', value=text_node.text)
-        case TextType.CODE:
-            return LeafNode(tag='code', value=text_node.text)
-        case TextType.LINK:
-            return LeafNode(tag='a', value=text_node.text, props={"href":text_node.url})
-        case TextType.IMAGE:
-            return LeafNode(tag='img', value='', props = {"src":text_node.url, "alt":text_node.text})
-        case _:
-            raise Exception("TextType doesn't match allowed values")
+        Exception: If no renderer is registered in `registry.INLINE` for
+            text_node.text_type.
+    """
+    render = INLINE.renderer(text_node.text_type)
+    if render is None:
+        raise Exception("TextType doesn't match allowed values")
+    return render(text_node)
+
+INLINE.register_renderer(TextType.TEXT, lambda node: LeafNode(tag=None, value=node.text))
+INLINE.register_renderer(TextType.BOLD, lambda node: LeafNode(tag='b', value=node.text))
+INLINE.register_renderer(TextType.ITALIC, lambda node: LeafNode(tag='i', value=node.text))
+INLINE.register_renderer(TextType.CODE, lambda node: LeafNode(tag='code', value=node.text))
+INLINE.register_renderer(TextType.LINK, lambda node: LeafNode(tag='a', value=node.text, props={"href": node.url}))
+INLINE.register_renderer(TextType.IMAGE, lambda node: LeafNode(tag='img', value='', props={"src": node.url, "alt": node.text}))
 
 def markdown_to_html_node(markdown):
     """Convert markdown text to an HTML node structure.
@@ -79,49 +446,86 @@ def markdown_to_html_node(markdown):
     """
     blocks = markdown_to_blocks(markdown)
     html_parent_node = ParentNode(tag="div", children=[])
-    child_nodes = []
     for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.HEADING:
-                heading_level = extract_heading_level(block)
-                heading_text = block.strip('# ')
-                heading_node = ParentNode(tag=f'h{heading_level}', children=text_to_children(heading_text))
-                html_parent_node.children.append(heading_node)
-            case BlockType.QUOTE:
-                quote_lines = block.split('\n')
-                quote_text = [l.strip('> ') for l in quote_lines]
-                quote_text = '\n'.join(quote_text)
-                quote_node = ParentNode(tag='blockquote', children = text_to_children(quote_text))
-                html_parent_node.children.append(quote_node)
-            case BlockType.UNORDERED_LIST:
-                list_items = block.split('\n')
-                list_text = [l.strip('- ') for l in list_items]
-                children = [ParentNode(tag='li', children=text_to_children(text)) for text in list_text]
-                list_node = ParentNode(tag='ul', children=children)
-                html_parent_node.children.append(list_node)
-            case BlockType.ORDERED_LIST:
-                list_items = block.split('\n')
-                list_text = strip_ordered_list_prefix(list_items)
-                children = [ParentNode(tag='li', children=text_to_children(text)) for text in list_text]
-                list_node = ParentNode(tag='ol', children=children)
-                html_parent_node.children.append(list_node)
-            case BlockType.CODE:
-                code_text = strip_codeblock_backticks(block)
-                code_text_node = TextNode(code_text, TextType.TEXT)
-                code_node = ParentNode(tag='code', children =[text_node_to_html_node(code_text_node)])
-                pre_node = ParentNode(tag='pre', children=[code_node])
-                html_parent_node.children.append(pre_node)
-            case BlockType.PARAGRAPH:
-                paragraph_text = strip_paragraph_newlines(block)
-                text_nodes = text_to_textnodes(paragraph_text)
-                children = [text_node_to_html_node(text_node) for text_node in text_nodes]
-                paragraph_node = ParentNode(tag='p', children=children)
-                html_parent_node.children.append(paragraph_node)
-            case _:
-                raise Exception(f"Block type {block_type} not supported")
+        html_parent_node.children.append(block_to_html_node(block))
     return html_parent_node
 
+def block_to_html_node(block):
+    """Convert a single markdown block to its HTML node.
+    
+    Args:
+        block (str): One block as returned by `markdown_to_blocks()`.
+    
+    Returns:
+        ParentNode: The HTML node for the block (see `markdown_to_html_node()`
+            for the element used by each block type).
+    
+    Raises:
+        Exception: If no renderer is registered in `registry.BLOCKS` for the
+            block's type.
+    """
+    block_type = block_to_block_type(block)
+    render = BLOCKS.renderer(block_type)
+    if render is None:
+        raise Exception(f"Block type {block_type} not supported")
+    return render(block)
+
+def heading_block_to_html_node(block):
+    """Render a heading block as an h1-h6 element."""
+    heading_level = extract_heading_level(block)
+    heading_text = block.strip('# ')
+    return ParentNode(tag=f'h{heading_level}', children=text_to_children(heading_text))
+
+def quote_block_to_html_node(block):
+    """Render a quote block as a blockquote element."""
+    quote_lines = block.split('\n')
+    quote_text = [l.strip('> ') for l in quote_lines]
+    quote_text = '\n'.join(quote_text)
+    return ParentNode(tag='blockquote', children = text_to_children(quote_text))
+
+def unordered_list_block_to_html_node(block):
+    """Render an unordered list block as a ul element."""
+    list_items = block.split('\n')
+    list_text = [l.strip('- ') for l in list_items]
+    children = [ParentNode(tag='li', children=text_to_children(text)) for text in list_text]
+    return ParentNode(tag='ul', children=children)
+
+def ordered_list_block_to_html_node(block):
+    """Render an ordered list block as an ol element."""
+    list_items = block.split('\n')
+    list_text = strip_ordered_list_prefix(list_items)
+    children = [ParentNode(tag='li', children=text_to_children(text)) for text in list_text]
+    return ParentNode(tag='ol', children=children)
+
+def code_block_to_html_node(block):
+    """Render a code block as pre > code, without inline parsing.
+
+    A block naming its language gets a `language-<name>` class and, for the
+    languages in `highlight.LEXERS`, highlighted tokens.
+    """
+    code_text = strip_codeblock_backticks(block)
+    language = extract_codeblock_language(block)
+    code_node = HIGHLIGHTER.code_node(code_text, language) if language is not None else None
+    if code_node is None:
+        code_text_node = TextNode(code_text, TextType.TEXT)
+        props = {'class': f'language-{language}'} if language is not None else None
+        code_node = ParentNode(tag='code', children=[text_node_to_html_node(code_text_node)], props=props)
+    return ParentNode(tag='pre', children=[code_node])
+
+def paragraph_block_to_html_node(block):
+    """Render a paragraph block as a p element."""
+    paragraph_text = strip_paragraph_newlines(block)
+    text_nodes = text_to_textnodes(paragraph_text)
+    children = [text_node_to_html_node(text_node) for text_node in text_nodes]
+    return ParentNode(tag='p', children=children)
+
+BLOCKS.register_renderer(BlockType.HEADING, heading_block_to_html_node)
+BLOCKS.register_renderer(BlockType.QUOTE, quote_block_to_html_node)
+BLOCKS.register_renderer(BlockType.UNORDERED_LIST, unordered_list_block_to_html_node)
+BLOCKS.register_renderer(BlockType.ORDERED_LIST, ordered_list_block_to_html_node)
+BLOCKS.register_renderer(BlockType.CODE, code_block_to_html_node)
+BLOCKS.register_renderer(BlockType.PARAGRAPH, paragraph_block_to_html_node)
+
 def text_to_children(text):
     """Convert text with inline markdown to a list of HTML nodes.
     
@@ -144,7 +548,7 @@ def text_to_children(text):
         children.append(text_node_to_html_node(textnode))
     return children
 
-def copy_directory(source_dir, target_dir):
+def copy_directory(source_dir, target_dir, fs=LOCAL, context=None, clean=True, exclude=()):
     """Recursively copy a directory and all its contents to a target location.
     
     Copies all files and subdirectories from the source directory to the target
@@ -155,31 +559,46 @@ def copy_directory(source_dir, target_dir):
         source_dir (str): The path to the source directory to copy from.
         target_dir (str): The path to the target directory to copy to. This directory
             will be created if it doesn't exist, or removed and recreated if it does.
+        fs (optional): Filesystem backend to copy through. Defaults to the
+            local disk.
+        context (BuildContext, optional): The build the copied files are
+            recorded in as outputs.
+        clean (bool): Remove an existing target directory first. Otherwise
+            the files are copied over its contents.
+        exclude (set[str], optional): Paths of source files not to copy, such
+            as the stylesheets bundled by `CssBundle`.
     
     Note:
         If the source directory doesn't exist, the function will still create the
         target directory but it will be empty.
     """
-    if os.path.exists(target_dir):
-        shutil.rmtree(target_dir)
-    os.mkdir(target_dir)
-    if os.path.exists(source_dir):
-        dir_list = os.listdir(source_dir)
+    if clean and fs.exists(target_dir):
+        fs.rmtree(target_dir)
+    if not fs.isdir(target_dir):
+        fs.mkdir(target_dir)
+    if fs.exists(source_dir):
+        dir_list = fs.listdir(source_dir)
         for file in dir_list:
-            if os.path.isfile(os.path.join(source_dir, file)):
-                shutil.copy(os.path.join(source_dir, file), os.path.join(target_dir, file))
-            elif os.path.isdir(os.path.join(source_dir, file)):
-                os.mkdir(os.path.join(target_dir, file))
-                copy_directory(os.path.join(source_dir, file), os.path.join(target_dir, file))
+            if os.path.join(source_dir, file) in exclude:
+                continue
+            if fs.isfile(os.path.join(source_dir, file)):
+                fs.copy(os.path.join(source_dir, file), os.path.join(target_dir, file))
+                if context is not None:
+                    context.add_output(os.path.join(target_dir, file))
+            elif fs.isdir(os.path.join(source_dir, file)):
+                copy_directory(os.path.join(source_dir, file), os.path.join(target_dir, file), fs=fs, context=context,
+                               clean=clean, exclude=exclude)
 
-def generate_page(from_path, basepath, template_path, dest_path):
+def generate_page(from_path, basepath, template_path, dest_path, fs=LOCAL, context=None):
     """Generate an HTML page from markdown content using a template.
     
-    Reads markdown content from a source file, converts it to HTML, and injects
-    it into an HTML template. The template should contain placeholders '{{ Title }}'
-    and '{{ Content }}' which will be replaced with the extracted title and
-    converted HTML content respectively. Absolute paths in href and src attributes
-    are adjusted to use the provided basepath.
+    Reads markdown content from a source file, converts it to HTML, and renders
+    it with a compiled template (see `templates`). The template's `{{ Title }}`
+    and `{{ Content }}` tags are filled with the extracted title and converted
+    HTML content respectively. When a build context is given, a `template.html`
+    in the page's directory or the nearest parent content directory is used as
+    the layout instead of `template_path`. Absolute paths in href and src
+    attributes are adjusted to use the provided basepath.
     
     Args:
         from_path (str): The file path to the markdown source file to convert.
@@ -187,34 +606,255 @@ def generate_page(from_path, basepath, template_path, dest_path):
             generated HTML. All occurrences of 'href="/' and 'src="/' in the
             template will be replaced with 'href="{basepath}' and 'src="{basepath}'
             respectively.
-        template_path (str): The file path to the HTML template file containing
-            '{{ Title }}' and '{{ Content }}' placeholders.
+        template_path (str): The file path to the default HTML template, using
+            '{{ Title }}' and '{{ Content }}' tags.
         dest_path (str): The file path where the generated HTML page should be
             written. The parent directory will be created if it doesn't exist.
+        fs (optional): Filesystem backend to read the source and template from
+            and write the page to. Defaults to the local disk.
+        context (BuildContext, optional): The build the page belongs to. Its
+            observers are handed the rendered page.
     
     Note:
         The function prints a message indicating which files are being used for
         generation. The title is extracted from the first heading in the markdown
         content.
     """
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path, 'r') as file:
-        markdown = file.read()
-    with open(template_path, 'r') as file:
-        template = file.read()
-    html_string = markdown_to_html_node(markdown).to_html()
+    templates = context.templates if context is not None else TemplateLoader(fs)
+    layout = templates.resolve(os.path.dirname(from_path), template_path)
+    print(f"Generating page from {from_path} to {dest_path} using {layout}")
+    stopwatch = Stopwatch()
+    markdown = fs.read_text(from_path)
+    stopwatch.lap('read')
+    profiler = context.memprofile if context is not None else None
+    render_cache = context.render_cache if context is not None else None
+    if profiler is not None:
+        html_node = _profiled_html_node(profiler, from_path, markdown)
+    elif render_cache is not None:
+        html_node = render_cache.node(markdown, markdown_to_html_node)
+    else:
+        html_node = markdown_to_html_node(markdown)
+    stopwatch.lap('parse')
+    if context is not None:
+        context.apply_transforms(html_node, dest_path)
+    stopwatch.lap('transforms')
+    minifier = context.minifier if context is not None else None
+    start = time.perf_counter()
+    if profiler is not None:
+        html_string = profiler.measure('to_html', html_node.to_html, minifier)
+    else:
+        html_string = html_node.to_html(minifier)
+    if minifier is not None:
+        minifier.serialize_time += time.perf_counter() - start
+    stopwatch.lap('to_html')
     page_title = extract_title(markdown)
-    template = template.replace('{{ Title }}', page_title)
-    template = template.replace('{{ Content }}', html_string)
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
+    variables = {'Title': page_title, 'Content': Markup(html_string)}
+    if context is not None and context.page_graph is not None:
+        variables.update(context.page_graph.variables(context.url_for(dest_path)))
+    template = templates.render(layout, variables)
+    template = rebase_links(template, basepath)
+    stopwatch.lap('template')
+    if context is not None and context.page_budget is not None:
+        context.page_budget.stop()
+    dest_dir = os.path.dirname(dest_path)
+    if not fs.exists(dest_dir):
+        fs.mkdir(dest_dir)
+    fs.write_text(dest_path, template)
+    stopwatch.lap('write')
+    if context is not None:
+        context.add_output(dest_path)
+        context.add_page(Page(from_path, dest_path, context.url_for(dest_path), markdown, page_title, html_node, template,
+                              timings=stopwatch.laps))
+
+def _profiled_html_node(profiler, from_path, markdown):
+    # Same result as markdown_to_html_node(), split into measured stages. The
+    # textnodes stage parses every block's inline markup once more, holding
+    # all of the page's TextNode lists at the same time.
+    profiler.begin_page(from_path, len(markdown.encode('utf-8')))
+    blocks = profiler.measure('block split', markdown_to_blocks, markdown)
+    profiler.measure('textnodes', lambda: [text_to_textnodes(block) for block in blocks])
+    return profiler.measure('node tree', lambda: ParentNode(tag="div", children=[block_to_html_node(b) for b in blocks]))
+
+def rebase_links(html, basepath):
+    """Prefix absolute `href` and `src` paths with `basepath`.
+
+    Handles both quoted values and the unquoted values of minified output.
+    """
+    for attribute in ('href', 'src'):
+        html = html.replace(f'{attribute}="/', f'{attribute}="{basepath}')
+        html = html.replace(f'{attribute}=/', f'{attribute}={basepath}')
+    return html
+
+CONTENT_MARKER = '\x00content\x00'
+
+def generate_page_streaming(from_path, basepath, template_path, dest_path, context=None):
+    """Generate a page from a memory-mapped source, streaming the output.
+
+    Produces the same file as `generate_page()`, but the source is never
+    decoded as a whole and the page body is never joined into one string:
+    each block is decoded from the mapped bytes, rendered, encoded and written
+    to the output file before the next block is read. The output is written
+    to a temporary file renamed over `dest_path` once the page is complete,
+    so an interrupted page leaves no partial file. Only works on the local
+    disk.
+
+    The blocks' nodes are kept and handed to the build observers as one
+    page body, like the node tree of `generate_page()`; only the source and
+    the output are never held as strings. The `Page` has no `markdown` or
+    `html` (see `build_context.Page`).
+
+    Args:
+        from_path (str): The file path to the markdown source file to convert.
+        basepath (str): The base path prefix for absolute URLs, as for
+            `generate_page()`.
+        template_path (str): The file path to the default HTML template.
+        dest_path (str): The file path where the generated page is written.
+        context (BuildContext, optional): The build the page belongs to. Its
+            observers are handed the rendered page.
+    """
+    templates = context.templates if context is not None else TemplateLoader(LOCAL)
+    layout = templates.resolve(os.path.dirname(from_path), template_path)
+    print(f"Streaming page from {from_path} to {dest_path} using {layout}")
     dest_dir = os.path.dirname(dest_path)
     if not os.path.exists(dest_dir):
         os.mkdir(dest_dir)
-    with open(dest_path, 'w') as file:
-        file.write(template)
 
-def generate_pages_recursive(dir_path_content, basepath, template_path, dest_dir_path):
+    stopwatch = Stopwatch()
+    minifier = context.minifier if context is not None else None
+    digest = hashlib.sha256()
+    blocks = []
+    output_bytes = 0
+    with map_source(from_path) as source, replacing(dest_path, 'wb', buffering=1 << 20) as out:
+
+        def write(data):
+            nonlocal output_bytes
+            digest.update(data)
+            out.write(data)
+            output_bytes += len(data)
+
+        source_digest = hashlib.sha256(source).hexdigest()
+        source_bytes = len(source)
+        stopwatch.lap('read')
+        page_title = extract_title_bytes(source)
+        variables = {'Title': page_title, 'Content': Markup(CONTENT_MARKER)}
+        if context is not None and context.page_graph is not None:
+            variables.update(context.page_graph.variables(context.url_for(dest_path)))
+        page = templates.render(layout, variables)
+        head, tail = page.split(CONTENT_MARKER, 1)
+        write(rebase_links(head, basepath).encode('utf-8'))
+        write(b'<div>')
+        stopwatch.lap('template')
+        for block in iter_blocks(source):
+            block_node = block_to_html_node(block)
+            stopwatch.lap('parse')
+            if context is not None:
+                context.apply_transforms(block_node, dest_path)
+            blocks.append(block_node)
+            stopwatch.lap('transforms')
+            html = block_node.to_html(minifier)
+            stopwatch.lap('to_html')
+            write(rebase_links(html, basepath).encode('utf-8'))
+            stopwatch.lap('write')
+        write(b'</div>')
+        write(rebase_links(tail, basepath).encode('utf-8'))
+        if context is not None and context.page_budget is not None:
+            context.page_budget.stop()
+    stopwatch.lap('write')
+    if context is not None:
+        context.add_output(dest_path)
+        context.record_hash(dest_path, digest.hexdigest())
+        context.add_page(Page(from_path, dest_path, context.url_for(dest_path), None, page_title,
+                              ParentNode(tag="div", children=blocks), None, timings=stopwatch.laps,
+                              source_digest=source_digest, source_bytes=source_bytes, output_bytes=output_bytes))
+
+def _should_stream(path, fs, context):
+    if context is None or context.stream_threshold is None:
+        return False
+    if isinstance(fs, HashingFileSystem):
+        fs = fs.base
+    return type(fs) is LocalFileSystem and os.path.getsize(path) >= context.stream_threshold
+
+def _generate_one(path_src, basepath, template_path, path_dest, fs, context):
+    if _should_stream(path_src, fs, context):
+        generate, kwargs = generate_page_streaming, {'context': context}
+    else:
+        generate, kwargs = generate_page, {'fs': fs, 'context': context}
+    args = (path_src, basepath, template_path, path_dest)
+    budget = context.page_budget if context is not None else None
+    if budget is not None:
+        if not budget.run(path_src, generate, *args, **kwargs) and fs.isfile(path_dest):
+            # A build updating docs/ in place keeps the quarantined page's
+            # previous version, which must not be removed as stale.
+            context.add_output(path_dest)
+            context.record_hash(path_dest, hashlib.sha256(fs.read_bytes(path_dest)).hexdigest())
+    else:
+        generate(*args, **kwargs)
+
+def iter_pages(dir_path_content, dest_dir_path, fs=LOCAL, selection=None):
+    """Yield `(source_path, dest_path)` for every page under a content
+    directory, in the order `generate_pages_recursive()` generates them.
+
+    Args:
+        dir_path_content (str): The content directory.
+        dest_dir_path (str): The output directory.
+        fs (optional): Filesystem backend. Defaults to the local disk.
+        selection (PageSelection, optional): Only yield the matching pages,
+            counting them in `selection.matched`.
+    """
+    for file in fs.listdir(dir_path_content):
+        path_src = os.path.join(dir_path_content, file)
+        path_dest = os.path.join(dest_dir_path, file)
+        if fs.isfile(path_src) and file.endswith('.md'):
+            if selection is not None:
+                if not selection.matches(path_src):
+                    continue
+                selection.matched += 1
+            yield path_src, path_dest.replace('.md', '.html')
+        elif fs.isdir(path_src):
+            if selection is None or selection.may_contain(path_src):
+                yield from iter_pages(path_src, path_dest, fs=fs, selection=selection)
+
+def generate_pages_in_order(pages, basepath, template_path, fs=LOCAL, context=None):
+    """Generate the given pages one after the other, in list order.
+
+    Args:
+        pages (list[tuple[str, str]]): `(source_path, dest_path)` pairs, as
+            yielded by `iter_pages()`.
+        basepath (str): The base path prefix for absolute URLs.
+        template_path (str): The file path to the default HTML template.
+        fs (optional): Filesystem backend. Defaults to the local disk.
+        context (BuildContext, optional): The build the pages belong to.
+    """
+    for path_src, path_dest in pages:
+        fs.makedirs(os.path.dirname(path_dest))
+        _generate_one(path_src, basepath, template_path, path_dest, fs, context)
+
+def remove_stale_outputs(dest_dir, context):
+    """Delete the files under `dest_dir` that the build did not write, and
+    the directories left empty.
+
+    Args:
+        dest_dir (str): The output directory.
+        context (BuildContext): The finished build, whose `outputs` are kept.
+
+    Returns:
+        int: The number of files deleted.
+    """
+    fs = context.fs
+    removed = 0
+    for name in fs.listdir(dest_dir):
+        path = os.path.join(dest_dir, name)
+        if fs.isdir(path):
+            removed += remove_stale_outputs(path, context)
+            if not fs.listdir(path):
+                fs.rmtree(path)
+        elif context.url_for(path) not in context.outputs:
+            fs.remove(path)
+            removed += 1
+    return removed
+
+def generate_pages_recursive(dir_path_content, basepath, template_path, dest_dir_path, fs=LOCAL, context=None,
+                             selection=None):
     """Recursively generate HTML pages from markdown files in a directory.
     
     Traverses a directory structure containing markdown files and generates
@@ -233,21 +873,34 @@ def generate_pages_recursive(dir_path_content, basepath, template_path, dest_dir
             '{{ Title }}' and '{{ Content }}' placeholders.
         dest_dir_path (str): The destination directory path where generated HTML
             files will be written. The directory structure will be preserved.
+        fs (optional): Filesystem backend used for every read and write.
+            Defaults to the local disk.
+        context (BuildContext, optional): The build the pages belong to,
+            passed on to `generate_page()`.
+        selection (PageSelection, optional): Only generate the matching
+            pages. Subdirectories that cannot hold a match are not listed.
     
     Raises:
         ValueError: If `dir_path_content` is not a valid directory path.
     """
-    if not os.path.isdir(dir_path_content):
+    if not fs.isdir(dir_path_content):
         raise ValueError(f"Directory {dir_path_content} does not exist")
-    if not os.path.isdir(dest_dir_path):
-        os.makedirs(dest_dir_path, exist_ok=True)
-    for file in os.listdir(dir_path_content):
+    if not fs.isdir(dest_dir_path):
+        fs.makedirs(dest_dir_path)
+    for file in fs.listdir(dir_path_content):
         path_src = os.path.join(dir_path_content, file)
         path_dest = os.path.join(dest_dir_path, file)
-        if os.path.isfile(path_src) and file.endswith('.md'):
-            generate_page(path_src, basepath, template_path, path_dest.replace('.md', '.html'))
-        elif os.path.isdir(path_src):
-            generate_pages_recursive(path_src, basepath, template_path, path_dest)
+        if fs.isfile(path_src) and file.endswith('.md'):
+            if selection is not None:
+                if not selection.matches(path_src):
+                    continue
+                selection.matched += 1
+            _generate_one(path_src, basepath, template_path, path_dest.replace('.md', '.html'), fs, context)
+        elif fs.isdir(path_src):
+            if selection is not None and not selection.may_contain(path_src):
+                continue
+            generate_pages_recursive(path_src, basepath, template_path, path_dest, fs=fs, context=context,
+                                     selection=selection)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
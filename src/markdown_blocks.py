@@ -1,4 +1,8 @@
+import re
 from enum import Enum
+from registry import BLOCKS
+
+CODE_INFO_PATTERN = re.compile(r"```([\w+#.-]+)\n")
 
 
 class BlockType(Enum):
@@ -62,8 +66,9 @@ def block_to_block_type(block):
     """Determine the type of a markdown block.
     
     Analyzes the structure and syntax of a markdown block to classify it
-    as one of the supported block types: heading, code, quote, unordered list,
-    ordered list, or paragraph.
+    as one of the registered block types. The built-in detectors are
+    registered below; lookup goes through the first-character table of
+    `registry.BLOCKS`, so only detectors for the block's first character run.
     
     Args:
         block (str): The markdown block to classify.
@@ -76,33 +81,40 @@ def block_to_block_type(block):
             - BlockType.UNORDERED_LIST: All lines start with '- '
             - BlockType.ORDERED_LIST: Lines start with '1. ', '2. ', etc.
             - BlockType.PARAGRAPH: Default for blocks that don't match other types
+            Extensions may register further types.
+    
+    Note:
+        Every built-in detector makes at most one pass over the block, so
+        classification is linear in the block's length.
     """
-    if extract_heading_level(block) is not None:
-        return BlockType.HEADING
-    if block.startswith('```') and block.endswith('```'):
-        return BlockType.CODE
-    block_lines = block.split('\n')
-    starts_with_quote = True
-    starts_with_unordered = True
-    starts_with_ordered = True
-    ordered_count = 1
-    for i in block_lines:
-        if not i.startswith('>'):
-            starts_with_quote = False
-        if not i.startswith('- '):
-            starts_with_unordered = False
-        if not i.startswith(f'{ordered_count}. '):
-            starts_with_ordered = False
-        ordered_count += 1
-    if starts_with_quote:
-        return BlockType.QUOTE
-    if starts_with_unordered:
-        return BlockType.UNORDERED_LIST
-    if starts_with_ordered:
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
+    return BLOCKS.block_type(block)
+
+def is_heading(block):
+    """Return True if the block is a valid 1-6 level heading."""
+    return extract_heading_level(block) is not None
+
+def is_code_block(block):
+    """Return True if the block starts and ends with '```'."""
+    return block.startswith('```') and block.endswith('```')
+
+def is_quote(block):
+    """Return True if every line of the block starts with '>'."""
+    return all(line.startswith('>') for line in block.split('\n'))
+
+def is_unordered_list(block):
+    """Return True if every line of the block starts with '- '."""
+    return all(line.startswith('- ') for line in block.split('\n'))
 
+def is_ordered_list(block):
+    """Return True if the lines are numbered '1. ', '2. ', ... in order."""
+    return all(line.startswith(f'{i}. ') for i, line in enumerate(block.split('\n'), start=1))
 
+BLOCKS.default_type = BlockType.PARAGRAPH
+BLOCKS.register_detector(BlockType.HEADING, is_heading, first_chars='#')
+BLOCKS.register_detector(BlockType.CODE, is_code_block, first_chars='`')
+BLOCKS.register_detector(BlockType.QUOTE, is_quote, first_chars='>')
+BLOCKS.register_detector(BlockType.UNORDERED_LIST, is_unordered_list, first_chars='-')
+BLOCKS.register_detector(BlockType.ORDERED_LIST, is_ordered_list, first_chars='1')
 
 def strip_ordered_list_prefix(text_list):
     """Remove ordered list number prefixes from a list of strings.
@@ -164,16 +176,34 @@ def strip_codeblock_backticks(text):
         text (str): The markdown code block text including backticks.
     
     Returns:
-        str: The code content with backticks removed. If the block starts
-            with '```\n', removes both the opening and closing backticks.
-            Otherwise, removes the first occurrence of '```' and everything
-            before it.
+        str: The code content with backticks removed. A language name on the
+            opening line (see `extract_codeblock_language()`) is dropped too.
+            If the block starts with '```\n', removes both the opening and
+            closing backticks. Otherwise, removes the first occurrence of
+            '```' and everything before it.
     """
+    info = CODE_INFO_PATTERN.match(text)
+    if info is not None:
+        text = '```\n' + text[info.end():]
     if text.startswith('```\n'):
         return text.split('```\n')[1].strip('```')
     else:
         return text.split('```')[1]
 
+def extract_codeblock_language(text):
+    """Return the language named after the opening backticks of a code block.
+
+    The language is a single word on the opening line, as in ```` ```python ````.
+    An opening line with more than one word is code, not a language.
+
+    Args:
+        text (str): The markdown code block text including backticks.
+
+    Returns:
+        str or None: The lowercased language name, or None if there is none.
+    """
+    info = CODE_INFO_PATTERN.match(text)
+    return info.group(1).lower() if info is not None else None
 
 def extract_title(markdown):
     """Extract the title from markdown content.
@@ -9,9 +9,17 @@ Functions:
     split_nodes_image(): Split text nodes into text and image nodes based on Markdown image syntax.
     split_nodes_link(): Split text nodes into text and link nodes based on Markdown link syntax.
 
+All inline parsing runs in time linear in the length of the text: delimiters
+are split with one `str.split()`, and images and links are found in a single
+left-to-right regex scan whose match offsets are used to cut the text. The
+image and link patterns exclude brackets and parentheses from their bodies,
+so no input makes them backtrack over more than the run of text up to the
+next bracket or parenthesis.
+
 """
 import re
 from textnode import TextNode, TextType
+from registry import INLINE
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     """Split text nodes on a delimiter and assign types to the resulting segments.
@@ -49,6 +57,9 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
                     new_nodes.append(TextNode(split_text[i], TextType.TEXT))
     return new_nodes
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def extract_markdown_images(text):
     """Extract Markdown image tags from a string.
 
@@ -64,8 +75,7 @@ def extract_markdown_images(text):
         extracted from the Markdown image tags found in the text. If no
         image tags are present, an empty list is returned.
     """
-    matches = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
     """Extract Markdown links from a string.
@@ -82,8 +92,7 @@ def extract_markdown_links(text):
         from Markdown links found in the text. If no links are present,
         an empty list is returned.
     """
-    matches = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
-    return matches
+    return LINK_PATTERN.findall(text)
 
 def split_nodes_image(old_nodes):
     """Split text nodes into text and image nodes based on Markdown image syntax.
@@ -101,31 +110,7 @@ def split_nodes_image(old_nodes):
         list[TextNode]: A new list of nodes where any Markdown image syntax in
         text nodes has been converted into separate image and text nodes.
     """
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-        else:
-            text = node.text
-            matches = extract_markdown_images(text)
-            
-            while matches:
-                alt, url = matches[0]
-
-                full_match = f"![{alt}]({url})"
-                before, after = text.split(full_match, 1)
-
-                if before:
-                    new_nodes.append(TextNode(before, TextType.TEXT))
-                new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-
-                text = after
-                matches = extract_markdown_images(text)
-            
-            if text:
-                new_nodes.append(TextNode(text, TextType.TEXT))
-
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
 def split_nodes_link(old_nodes):
     """Split text nodes into text and link nodes based on Markdown link syntax.
@@ -143,38 +128,33 @@ def split_nodes_link(old_nodes):
         list[TextNode]: A new list of nodes where any Markdown link syntax in
         text nodes has been converted into separate link and text nodes.
     """
+    return _split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+def _split_nodes_pattern(old_nodes, pattern, text_type):
+    # One scan per text node; the text between matches is sliced out by
+    # offset instead of re-searching the remainder after every match.
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
-        else:
-            text = node.text
-            matches = extract_markdown_links(text)
-            
-            while matches:
-                alt, url = matches[0]
-
-                full_match = f"[{alt}]({url})"
-                before, after = text.split(full_match, 1)
-
-                if before:
-                    new_nodes.append(TextNode(before, TextType.TEXT))
-                new_nodes.append(TextNode(alt, TextType.LINK, url))
-
-                text = after
-                matches = extract_markdown_links(text)
-            
-            if text:
-                new_nodes.append(TextNode(text, TextType.TEXT))
-
+            continue
+        text = node.text
+        pos = 0
+        for match in pattern.finditer(text):
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
+        if pos < len(text):
+            new_nodes.append(TextNode(text[pos:], TextType.TEXT))
     return new_nodes
 
-
 def text_to_textnodes(text):
     """Convert plain text into a list of TextNodes with inline markdown processed.
     
     Parses a text string and converts it into a list of TextNodes by processing
-    various inline markdown elements. The processing order is:
+    various inline markdown elements. The splitters registered in
+    `registry.INLINE` run in priority order; the built-in order is:
     1. Bold text (delimited by '**')
     2. Italic text (delimited by '_')
     3. Code text (delimited by '`')
@@ -193,10 +173,13 @@ def text_to_textnodes(text):
         Exception: If any delimiter syntax is invalid (e.g., unclosed bold markers).
     """
     textnodes = [TextNode(text, TextType.TEXT)]
-    textnodes = split_nodes_delimiter(textnodes, '**', TextType.BOLD)
-    textnodes = split_nodes_delimiter(textnodes, '_', TextType.ITALIC)
-    textnodes = split_nodes_delimiter(textnodes, '`', TextType.CODE)
-    textnodes = split_nodes_image(textnodes)
-    textnodes = split_nodes_link(textnodes)
+    for split in INLINE.splitters():
+        textnodes = split(textnodes)
     return textnodes
 
+INLINE.register_splitter('bold', lambda nodes: split_nodes_delimiter(nodes, '**', TextType.BOLD), priority=50)
+INLINE.register_splitter('italic', lambda nodes: split_nodes_delimiter(nodes, '_', TextType.ITALIC), priority=40)
+INLINE.register_splitter('code', lambda nodes: split_nodes_delimiter(nodes, '`', TextType.CODE), priority=30)
+INLINE.register_splitter('image', split_nodes_image, priority=20)
+INLINE.register_splitter('link', split_nodes_link, priority=10)
+
@@ -0,0 +1,160 @@
+"""Per-stage memory profiling of page generation with `tracemalloc`.
+
+When a build runs with `--memprofile`, `generate_page()` runs each stage of
+the markdown pipeline through `MemoryProfiler.measure()`:
+
+- block split: `markdown_to_blocks()`
+- textnodes: the inline `TextNode` lists of every block, held at once
+- node tree: the page's HTML node tree
+- to_html: the serialized page body
+
+For every page the peak traced memory and the memory still held at the end
+of each stage are recorded. For the largest pages (by source size) a
+snapshot diff is also taken around each stage to find the top allocation
+sites. The report is written as JSON when the build finishes.
+
+Profiling is opt-in: without a profiler, `generate_page()` takes exactly the
+same path as before and `tracemalloc` is never started.
+
+Classes:
+    MemoryProfiler: Collects the measurements and writes the report.
+
+"""
+import fnmatch
+import heapq
+import json
+import os
+import tracemalloc
+
+STAGES = ('block split', 'textnodes', 'node tree', 'to_html')
+# Leave out the profiler's own bookkeeping.
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, fnmatch.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class PageProfile:
+    """Measurements for one page."""
+
+    def __init__(self, source_path, source_bytes, detailed):
+        self.source_path = source_path
+        self.source_bytes = source_bytes
+        self.detailed = detailed
+        self.stages = {}
+
+    def as_dict(self):
+        return {'source': self.source_path, 'bytes': self.source_bytes, 'stages': self.stages}
+
+
+class MemoryProfiler:
+    """Per-stage peak memory and allocation sites of a build.
+
+    Args:
+        report_path (str): File the JSON report is written to.
+        largest (int): Number of largest pages profiled in detail.
+        top (int): Allocation sites kept per stage.
+    """
+
+    def __init__(self, report_path, largest=5, top=10):
+        self.report_path = report_path
+        self.largest = largest
+        self.top = top
+        self.peak = 0
+        self.pages = 0
+        self.stage_peaks = {stage: {'max_peak_bytes': 0, 'page': None, 'total_retained_bytes': 0} for stage in STAGES}
+        self._largest = []
+        self._current = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin_page(self, source_path, source_bytes):
+        """Start profiling a page; pages among the largest so far get
+        snapshot diffs."""
+        detailed = len(self._largest) < self.largest or source_bytes > self._largest[0][0]
+        self._current = PageProfile(source_path, source_bytes, detailed)
+        if detailed:
+            entry = (source_bytes, self.pages, self._current)
+            if len(self._largest) < self.largest:
+                heapq.heappush(self._largest, entry)
+            else:
+                heapq.heapreplace(self._largest, entry)
+        self.pages += 1
+
+    def measure(self, stage, func, *args):
+        """Run `func(*args)` as `stage` of the current page and return its
+        result.
+
+        The result is still alive when the stage's retained memory and, for
+        detailed pages, its allocation sites are measured.
+        """
+        page = self._current
+        before_snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS) if page.detailed else None
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        record = {'peak_bytes': peak - before, 'retained_bytes': current - before}
+        if before_snapshot is not None:
+            after = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            record['top_sites'] = self._top_sites(after.compare_to(before_snapshot, 'lineno'))
+        page.stages[stage] = record
+        totals = self.stage_peaks[stage]
+        totals['total_retained_bytes'] += max(record['retained_bytes'], 0)
+        if record['peak_bytes'] > totals['max_peak_bytes']:
+            totals['max_peak_bytes'] = record['peak_bytes']
+            totals['page'] = page.source_path
+        return result
+
+    def _top_sites(self, differences):
+        sites = []
+        for stat in differences:
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            sites.append({'site': f"{frame.filename}:{frame.lineno}", 'bytes': stat.size_diff, 'count': stat.count_diff})
+            if len(sites) == self.top:
+                break
+        return sites
+
+    def report(self):
+        """Return the report as a JSON-serializable dict."""
+        largest = [entry[2] for entry in sorted(self._largest, key=lambda e: (-e[0], e[1]))]
+        stages = {}
+        for stage in STAGES:
+            sites = {}
+            for page in largest:
+                for site in page.stages.get(stage, {}).get('top_sites', ()):
+                    merged = sites.setdefault(site['site'], {'site': site['site'], 'bytes': 0, 'count': 0})
+                    merged['bytes'] += site['bytes']
+                    merged['count'] += site['count']
+            top = sorted(sites.values(), key=lambda s: -s['bytes'])[:self.top]
+            stages[stage] = dict(self.stage_peaks[stage], top_sites=top)
+        return {
+            'peak_traced_bytes': self.peak,
+            'pages': self.pages,
+            'stages': stages,
+            'largest_pages': [page.as_dict() for page in largest],
+        }
+
+    def finish(self, context):
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        report = self.report()
+        report_dir = os.path.dirname(self.report_path)
+        if report_dir:
+            context.fs.makedirs(report_dir)
+        context.fs.write_text(self.report_path, json.dumps(report, indent=2))
+        worst = max(STAGES, key=lambda stage: self.stage_peaks[stage]['max_peak_bytes'])
+        context.report(
+            "Memory",
+            f"peak {self.peak / 1024 / 1024:.1f} MiB traced, largest stage peak {worst} "
+            f"({self.stage_peaks[worst]['max_peak_bytes'] / 1024:.1f} KiB), report in {self.report_path}",
+        )
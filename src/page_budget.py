@@ -0,0 +1,116 @@
+"""Per-page time budget for the build.
+
+A page whose rendering takes longer than the budget either fails the build
+with `PageTimeout` or, in quarantine mode, is left out of the output and
+listed in the build summary, so one pathological source cannot stall the
+whole site.
+
+On the main thread the budget is enforced with a `SIGALRM` interval timer,
+which interrupts a page that is still running when the budget runs out.
+Where signals are unavailable (other threads, such as the `serve --watch`
+rebuilder, or platforms without `setitimer`) the page runs until it is
+about to be written and is then treated as over budget if it took too long.
+
+The budget covers reading, parsing and rendering a page. `generate_page()`
+and `generate_page_streaming()` call `PageBudget.stop()` before the page is
+written and handed to the build observers, so a timeout never interrupts a
+write or leaves a half-updated search index or page graph: an over-budget
+page leaves no output, or its previous version when docs/ is updated in
+place. The streaming pipeline writes to a temporary file, renamed over the
+page only after the budget is stopped.
+
+Classes:
+    PageTimeout: Raised when a page exceeds its budget.
+    PageBudget: Runs page generation under the budget.
+
+"""
+import signal
+import threading
+import time
+
+
+class PageTimeout(Exception):
+    """A page took longer to render than the build's per-page budget."""
+
+    def __init__(self, path, seconds):
+        super().__init__(f"Page {path} exceeded the time budget of {seconds:g}s")
+        self.path = path
+        self.seconds = seconds
+
+
+class PageBudget:
+    """Run page generation under a per-page time budget.
+
+    Args:
+        seconds (float): Time allowed per page.
+        quarantine (bool): Skip over-budget pages instead of failing the build.
+    """
+
+    def __init__(self, seconds, quarantine=False):
+        self.seconds = seconds
+        self.quarantine = quarantine
+        self.quarantined = []
+        self._current = None
+
+    def _can_interrupt(self):
+        return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+    def run(self, path, generate, *args, **kwargs):
+        """Call `generate(*args, **kwargs)` for the page at `path`.
+
+        Returns:
+            bool: True if the page was generated, False if it was quarantined.
+
+        Raises:
+            PageTimeout: If the page is over budget and quarantine is off.
+        """
+        self._current = (path, time.perf_counter())
+        try:
+            if self._can_interrupt():
+                self._run_interruptible(path, generate, args, kwargs)
+            else:
+                generate(*args, **kwargs)
+                self.stop()
+        except PageTimeout:
+            if not self.quarantine:
+                raise
+            self.quarantined.append(path)
+            print(f"Quarantined {path}: exceeded the time budget of {self.seconds:g}s")
+            return False
+        return True
+
+    def stop(self):
+        """End the budget of the page being generated, before it is written.
+
+        Does nothing outside `run()` or when called again for the same page.
+
+        Raises:
+            PageTimeout: If the page is already over budget.
+        """
+        if self._current is None:
+            return
+        path, start = self._current
+        self._current = None
+        if self._can_interrupt():
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if time.perf_counter() - start > self.seconds:
+            raise PageTimeout(path, self.seconds)
+
+    def _run_interruptible(self, path, generate, args, kwargs):
+        def expire(signum, frame):
+            raise PageTimeout(path, self.seconds)
+
+        previous = signal.signal(signal.SIGALRM, expire)
+        signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        try:
+            generate(*args, **kwargs)
+            self.stop()
+        finally:
+            self._current = None
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    def finish(self, context):
+        if self.quarantined:
+            context.report("Quarantined", f"{len(self.quarantined)} pages over {self.seconds:g}s: "
+                                          + ', '.join(self.quarantined))
@@ -0,0 +1,248 @@
+"""Backlinks and related pages, computed once per build.
+
+Before any page is rendered, every content source is scanned for its
+internal links and the terms of its headings. A page's "linked from" list
+is then a lookup in a reverse link index, and its "related pages" are
+scored from a term index, so no page is ever compared with every other
+page.
+
+The per-page entries and both indexes are persisted between builds. A
+source whose modification time is unchanged is not read again, and only the
+index entries of the pages that changed are replaced, which is also how a
+targeted build (`--only`) updates them.
+
+The lists are exposed to templates as the page variables `backlinks` and
+`related`, each a list of `{'url': ..., 'title': ...}`. Titles are the raw
+heading text, markup and all; templates escape them when inserting them.
+
+Classes:
+    PageGraph: The scanned pages and their link and term indexes.
+
+Functions:
+    page_key(): The canonical URL of a page.
+    scan_markdown(): Extract the title, links and heading terms of a source.
+
+"""
+import json
+import math
+import os
+
+from link_checker import resolve_target
+from markdown_inline import LINK_PATTERN
+from search_index import tokenize
+
+INDEX_VERSION = 1
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'i', 'in', 'is', 'it', 'my', 'of',
+    'on', 'or', 'our', 'that', 'the', 'this', 'to', 'was', 'we', 'what', 'why', 'with', 'you', 'your',
+))
+
+
+def page_key(url):
+    """Return the canonical URL of the page served at `url`.
+
+    `/blog/tom/index.html`, `/blog/tom/` and `/blog/tom` all name the same
+    page, `/blog/tom`; `/about.html` is `/about`.
+    """
+    if url.endswith('/index.html'):
+        url = url[:-len('index.html')]
+    elif url.endswith('.html'):
+        url = url[:-len('.html')]
+    return url.rstrip('/') or '/'
+
+
+def scan_markdown(markdown, url):
+    """Extract what the indexes need from a markdown source.
+
+    Links inside fenced code blocks are ignored.
+
+    Args:
+        markdown (str): The page source.
+        url (str): URL path of the page, for relative link targets.
+
+    Returns:
+        tuple[str or None, list[str], list[str]]: The level 1 heading, the
+            canonical URLs of the internal pages linked to, and the distinct
+            heading terms without stopwords.
+    """
+    title = None
+    links = set()
+    terms = set()
+    for index, segment in enumerate(markdown.split('```')):
+        if index % 2:
+            continue
+        for _, target in LINK_PATTERN.findall(segment):
+            path = resolve_target(target, url)
+            if path is not None:
+                links.add(page_key(path))
+        for line in segment.split('\n'):
+            if line.startswith('#'):
+                if title is None and line.startswith('# '):
+                    title = line.strip('# ')
+                terms.update(term for term in tokenize(line) if term not in STOPWORDS)
+    links.discard(page_key(url))
+    return title, sorted(links), sorted(terms)
+
+
+class PageGraph:
+    """Reverse link index and term index over the site's pages.
+
+    Args:
+        state_path (str, optional): File the scanned entries are persisted
+            in between builds.
+        related (int): Maximum number of related pages per page.
+        max_postings (int): Terms found on more pages than this are too
+            common to relate pages and are not scored.
+    """
+
+    def __init__(self, state_path=None, related=5, max_postings=100):
+        self.state_path = state_path
+        self.related_count = related
+        self.max_postings = max_postings
+        self.entries = {}
+        self.backlinks = {}
+        self.pages_by_term = {}
+        self.scanned = 0
+        self.changed = 0
+        self._related = {}
+
+    def load(self, fs):
+        """Load the entries and indexes saved by a previous build."""
+        if self.state_path is None or not fs.isfile(self.state_path):
+            return
+        state = json.loads(fs.read_text(self.state_path))
+        if state.get('version') == INDEX_VERSION:
+            self.entries = state['pages']
+            self.backlinks = state['backlinks']
+            self.pages_by_term = state['terms']
+
+    def save(self, fs):
+        if self.state_path is None:
+            return
+        state_dir = os.path.dirname(self.state_path)
+        if state_dir:
+            fs.makedirs(state_dir)
+        state = {'version': INDEX_VERSION, 'pages': self.entries, 'backlinks': self.backlinks,
+                 'terms': self.pages_by_term}
+        fs.write_text(self.state_path, json.dumps(state, separators=(',', ':')))
+
+    def _set_entry(self, key, entry):
+        self._remove_entry(key)
+        self.entries[key] = entry
+        for target in entry['links']:
+            self.backlinks.setdefault(target, []).append(key)
+        for term in entry['terms']:
+            self.pages_by_term.setdefault(term, []).append(key)
+
+    def _remove_entry(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.changed += 1
+        for target in entry['links']:
+            sources = self.backlinks[target]
+            sources.remove(key)
+            if not sources:
+                del self.backlinks[target]
+        for term in entry['terms']:
+            pages = self.pages_by_term[term]
+            pages.remove(key)
+            if not pages:
+                del self.pages_by_term[term]
+
+    def scan(self, fs, content_root, selection=None):
+        """Bring the indexes up to date with the content sources.
+
+        Sources whose modification time matches their entry are not read.
+        In a full build, entries of sources that no longer exist are
+        dropped; with a `selection`, only the selected sources are looked at
+        and every other entry is kept.
+
+        Args:
+            fs: Filesystem backend.
+            content_root (str): The content directory.
+            selection (PageSelection, optional): The pages of a targeted build.
+        """
+        seen = set()
+        stack = [content_root]
+        while stack:
+            directory = stack.pop()
+            for name in fs.listdir(directory):
+                path = os.path.join(directory, name)
+                if fs.isdir(path):
+                    if selection is None or selection.may_contain(path):
+                        stack.append(path)
+                elif name.endswith('.md') and (selection is None or selection.matches(path)):
+                    seen.add(self._scan_file(fs, content_root, path))
+        if selection is None:
+            for key in [key for key in self.entries if key not in seen]:
+                self._remove_entry(key)
+        self._related = {}
+
+    def _scan_file(self, fs, content_root, path):
+        relative = os.path.relpath(path, content_root).replace(os.sep, '/')
+        url = '/' + relative[:-len('.md')] + '.html'
+        key = page_key(url)
+        mtime = fs.mtime(path)
+        entry = self.entries.get(key)
+        if entry is None or entry['mtime'] != mtime:
+            title, links, terms = scan_markdown(fs.read_text(path), url)
+            self.scanned += 1
+            if entry is not None and (entry['title'], entry['links'], entry['terms']) == (title or key, links, terms):
+                # Prose-only edit: the indexes are unchanged, so the state is
+                # not rewritten just for the new mtime.
+                entry['mtime'] = mtime
+            else:
+                self._set_entry(key, {'mtime': mtime, 'title': title or key, 'links': links, 'terms': terms})
+                self.changed += 1
+        return key
+
+    def _link(self, key):
+        return {'url': key, 'title': self.entries[key]['title']}
+
+    def linked_from(self, url):
+        """Return the pages linking to the page at `url`, by title."""
+        sources = self.backlinks.get(page_key(url), ())
+        return sorted((self._link(key) for key in sources if key in self.entries),
+                      key=lambda link: (link['title'].lower(), link['url']))
+
+    def related(self, url):
+        """Return the pages sharing the most heading terms with `url`.
+
+        Shared terms are weighted by their inverse document frequency; terms
+        on more than `max_postings` pages are skipped, which bounds the
+        candidates scored for each page.
+        """
+        key = page_key(url)
+        if key in self._related:
+            return self._related[key]
+        entry = self.entries.get(key)
+        related = []
+        if entry is not None:
+            total = len(self.entries)
+            scores = {}
+            for term in entry['terms']:
+                pages = self.pages_by_term.get(term, ())
+                if len(pages) > self.max_postings:
+                    continue
+                weight = math.log(total / len(pages))
+                for other in pages:
+                    if other != key:
+                        scores[other] = scores.get(other, 0.0) + weight
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:self.related_count]
+            related = [self._link(other) for other, score in best if score > 0]
+        self._related[key] = related
+        return related
+
+    def variables(self, url):
+        """Return the template variables of the page at `url`."""
+        return {'backlinks': self.linked_from(url), 'related': self.related(url)}
+
+    def finish(self, context):
+        if self.changed:
+            self.save(context.fs)
+        context.report(
+            "Page graph",
+            f"{len(self.entries)} pages ({self.scanned} scanned), {len(self.backlinks)} linked, "
+            f"{len(self.pages_by_term)} heading terms",
+        )
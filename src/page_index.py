@@ -0,0 +1,285 @@
+"""Persisted page metadata, and the listings generated from it.
+
+While pages are rendered, the build records a small entry for each one:
+source path, title, first paragraph, source mtime and word count, taken from
+the node tree that was parsed anyway. The entries are persisted between
+builds and only the entries of rendered pages are replaced, so a targeted
+build (`--only`) keeps the rest.
+
+From the index alone, without reading any page source, the build writes:
+
+- paginated listing pages of a section (`/blog/`, `/blog/page/2/`, ...),
+  rendered with the section's layout,
+- `sitemap.xml` and an RSS 2.0 `feed.xml` of the section's newest pages;
+  both need absolute URLs and are only written when a site URL is given.
+
+Each file is produced by a generator that yields it piece by piece from the
+sorted entries, and written chunk by chunk with the filesystem's
+`write_chunks()`, so no whole document is held in memory. Listing pages
+past the current page count, left from a build with more entries, are
+deleted. The sitemap includes the listing pages.
+
+Classes:
+    PageIndex: Build observer maintaining the index and writing the listings.
+
+Functions:
+    page_summary(): Title-less summary and word count of a page's node tree.
+    iter_sitemap(), iter_feed(): Yield the XML documents.
+
+"""
+import datetime
+import email.utils
+import itertools
+import json
+import os
+from xml.sax.saxutils import escape
+
+from deploy_manifest import public_urls
+from html_escape import escape_attribute, escape_text
+from htmlnode import ParentNode
+from search_index import collect_text
+from templates import Markup
+
+INDEX_VERSION = 1
+SUMMARY_LENGTH = 280
+# Stands in for a listing's content while its layout is rendered; the
+# rendered page is split around it.
+CONTENT_MARKER = '\x00listing\x00'
+
+
+def _text(node):
+    return ''.join(text for text, _ in collect_text(node))
+
+
+def _is_navigation(paragraph):
+    # A paragraph of nothing but links, such as "< Back Home".
+    return all(child.tag == 'a' or (child.tag is None and not (child.value or '').strip())
+               for child in paragraph.children)
+
+
+def page_summary(node, length=SUMMARY_LENGTH):
+    """Return the first paragraph and the word count of a page body.
+
+    Paragraphs made only of links are navigation, not prose, and skipped.
+
+    Args:
+        node (ParentNode): The page body as parsed from markdown.
+        length (int): Longer paragraphs are cut at a word boundary.
+
+    Returns:
+        tuple[str, int]: The first paragraph's text and the number of words
+            in the whole body.
+    """
+    words = sum(len(text.split()) for text, _ in collect_text(node))
+    summary = ''
+    for child in node.children or ():
+        if child.tag == 'p' and isinstance(child, ParentNode) and not _is_navigation(child):
+            summary = ' '.join(_text(child).split())
+            if summary:
+                break
+    if len(summary) > length:
+        summary = summary[:length].rsplit(' ', 1)[0] + '…'
+    return summary, words
+
+
+def _rfc822(mtime_ns):
+    return email.utils.format_datetime(datetime.datetime.fromtimestamp(mtime_ns / 1e9, datetime.timezone.utc))
+
+
+def _w3c_date(mtime_ns):
+    return datetime.datetime.fromtimestamp(mtime_ns / 1e9, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+def iter_sitemap(entries, site_url):
+    """Yield `sitemap.xml` for `(public_url, entry)` pairs."""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for url, entry in entries:
+        yield f"<url><loc>{escape(site_url + url)}</loc><lastmod>{_w3c_date(entry['mtime'])}</lastmod></url>\n"
+    yield '</urlset>\n'
+
+
+def iter_feed(entries, site_url, title, link):
+    """Yield an RSS 2.0 feed for `(public_url, entry)` pairs, newest first."""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>\n'
+    yield f"<title>{escape(title)}</title><link>{escape(site_url + link)}</link><description>{escape(title)}</description>\n"
+    for url, entry in entries:
+        yield (f"<item><title>{escape(entry['title'])}</title><link>{escape(site_url + url)}</link>"
+               f"<guid>{escape(site_url + url)}</guid><pubDate>{_rfc822(entry['mtime'])}</pubDate>"
+               f"<description>{escape(entry['summary'])}</description></item>\n")
+    yield '</channel></rss>\n'
+
+
+class PageIndex:
+    """Build observer maintaining the page metadata index.
+
+    Args:
+        basepath (str): URL prefix the site is published under.
+        state_path (str, optional): File the index is persisted in.
+        site_url (str, optional): Scheme and host of the site, such as
+            `https://example.com`, for the sitemap and feed.
+        section (str): Content directory whose pages are listed and fed.
+        per_page (int): Pages per listing page.
+        feed_items (int): Newest pages included in the feed.
+        rebase (callable, optional): `rebase(html, basepath)` applied to
+            listing pages, as to every other page. Defaults to leaving the
+            root-relative links as they are.
+    """
+
+    def __init__(self, basepath, state_path=None, site_url=None, section='blog', per_page=10, feed_items=20,
+                 rebase=None):
+        self.basepath = basepath if basepath.endswith('/') else basepath + '/'
+        self.rebase = rebase
+        self.state_path = state_path
+        self.site_url = site_url.rstrip('/') if site_url else None
+        self.section = section.strip('/')
+        self.per_page = per_page
+        self.feed_items = feed_items
+        self.entries = {}
+        self.updated = 0
+
+    def load(self, fs):
+        """Load the index saved by a previous build."""
+        if self.state_path is None or not fs.isfile(self.state_path):
+            return
+        state = json.loads(fs.read_text(self.state_path))
+        if state.get('version') == INDEX_VERSION:
+            self.entries = state['pages']
+
+    def save(self, fs):
+        if self.state_path is None:
+            return
+        state_dir = os.path.dirname(self.state_path)
+        if state_dir:
+            fs.makedirs(state_dir)
+        fs.write_text(self.state_path, json.dumps({'version': INDEX_VERSION, 'pages': self.entries}))
+
+    def add_page(self, page, context):
+        summary, words = page_summary(page.node)
+        self.entries[page.url.lstrip('/')] = {
+            'source': page.source_path,
+            'title': page.title,
+            'summary': summary,
+            'mtime': context.fs.mtime(page.source_path),
+            'words': words,
+        }
+        self.updated += 1
+
+    def source_mtimes(self):
+        """Return the source mtimes recorded for the indexed pages, by
+        source path."""
+        return {entry['source']: entry['mtime'] for entry in self.entries.values()}
+
+    def section_entries(self):
+        """Return the `(path, entry)` pairs of the section's pages, newest
+        first. The section's own index page is left out."""
+        prefix = self.section + '/'
+        pages = [(path, entry) for path, entry in self.entries.items()
+                 if path.startswith(prefix) and path != prefix + 'index.html']
+        pages.sort(key=lambda item: (-item[1]['mtime'], item[0]))
+        return pages
+
+    def _listing_html(self, entries, number, pages):
+        yield '<div>'
+        for path, entry in entries:
+            url = public_urls(path, '/')[-1]
+            yield (f'<article><h2><a href="{escape_attribute(url)}">{escape_text(entry["title"])}</a></h2>'
+                   f'<p>{escape_text(entry["summary"])}</p><p>{entry["words"]} words</p></article>')
+        if pages > 1:
+            yield '<nav>'
+            if number > 1:
+                yield f'<a href="{self._listing_url(number - 1)}" rel="prev">Newer</a>'
+            yield f' Page {number} of {pages} '
+            if number < pages:
+                yield f'<a href="{self._listing_url(number + 1)}" rel="next">Older</a>'
+            yield '</nav>'
+        yield '</div>'
+
+    def _listing_url(self, number):
+        # Root-relative; rebase_links() adds the basepath like for pages.
+        return f'/{self.section}/' if number == 1 else f'/{self.section}/page/{number}/'
+
+    def _listing_dir(self, context, number):
+        return os.path.join(context.dest_root, self.section, *(('page', str(number)) if number > 1 else ()))
+
+    def _write_listings(self, context, entries):
+        """Write the section's listing pages.
+
+        Returns:
+            list[tuple[str, dict]]: The output path, relative to the output
+                root, and an entry holding the newest listed mtime, of every
+                listing page written.
+        """
+        fs = context.fs
+        section_dir = os.path.join(context.content_root, self.section)
+        layout = context.templates.resolve(section_dir, 'template.html')
+        title = self.section.replace('-', ' ').title()
+        pages = max(1, -(-len(entries) // self.per_page))
+        has_index = fs.isfile(os.path.join(section_dir, 'index.md'))
+        written = []
+        for number in range(1, pages + 1):
+            if number == 1 and has_index:
+                continue
+            chunk = entries[(number - 1) * self.per_page:number * self.per_page]
+            page_title = title if number == 1 else f"{title}, page {number}"
+            output = context.templates.render(layout, {'Title': page_title, 'Content': Markup(CONTENT_MARKER)})
+            head, marker, tail = output.partition(CONTENT_MARKER)
+            listing = self._listing_html(chunk, number, pages) if marker else ()
+            dest_dir = self._listing_dir(context, number)
+            fs.makedirs(dest_dir)
+            dest = os.path.join(dest_dir, 'index.html')
+            fs.write_chunks(dest, self._rebased(itertools.chain((head,), listing, (tail,))))
+            context.add_output(dest)
+            written.append((os.path.relpath(dest, context.dest_root).replace(os.sep, '/'),
+                            {'mtime': max(entry['mtime'] for _, entry in chunk)}))
+        return written
+
+    def _rebased(self, chunks):
+        # Every chunk holds whole elements, so links are never split.
+        for chunk in chunks:
+            yield chunk if self.rebase is None else self.rebase(chunk, self.basepath)
+
+    def _remove_stale_listings(self, context, pages):
+        """Delete listing pages numbered above `pages`, and return how many
+        were deleted."""
+        fs = context.fs
+        page_dir = os.path.join(context.dest_root, self.section, 'page')
+        if not fs.isdir(page_dir):
+            return 0
+        removed = 0
+        for name in fs.listdir(page_dir):
+            if name.isdigit() and int(name) > pages:
+                dest_dir = os.path.join(page_dir, name)
+                fs.rmtree(dest_dir)
+                context.outputs.discard(context.url_for(os.path.join(dest_dir, 'index.html')))
+                removed += 1
+        return removed
+
+    def _write_xml(self, context, name, chunks):
+        dest = os.path.join(context.dest_root, name)
+        context.fs.write_chunks(dest, chunks)
+        context.add_output(dest)
+
+    def finish(self, context):
+        fs = context.fs
+        if context.selection is None:
+            for path in [p for p, entry in self.entries.items() if not fs.isfile(entry['source'])]:
+                del self.entries[path]
+        self.save(fs)
+        entries = self.section_entries()
+        listings = self._write_listings(context, entries) if entries else []
+        removed = self._remove_stale_listings(context, -(-len(entries) // self.per_page))
+        line = f"{len(self.entries)} pages ({self.updated} updated), {len(listings)} listing pages for /{self.section}/"
+        if removed:
+            line += f" ({removed} stale removed)"
+        if self.site_url is not None:
+            every = sorted((public_urls(path, self.basepath)[-1], entry)
+                           for path, entry in [*self.entries.items(), *listings])
+            self._write_xml(context, 'sitemap.xml', iter_sitemap(every, self.site_url))
+            newest = [(public_urls(path, self.basepath)[-1], entry) for path, entry in entries[:self.feed_items]]
+            title = self.entries.get('index.html', {}).get('title') or self.section
+            self._write_xml(context, 'feed.xml', iter_feed(newest, self.site_url, title, self.basepath))
+            line += ", sitemap.xml and feed.xml"
+        else:
+            line += ", no sitemap or feed without a site URL"
+        context.report("Page index", line)
@@ -0,0 +1,126 @@
+"""Priority order for progressive builds.
+
+A progressive build (`--progressive`) updates docs/ in place instead of
+regenerating it from scratch, and renders the pages in this order:
+
+1. pages whose source changed since the last build, as recorded in the page
+   index (see `page_index`), so edits go live first,
+2. pages listed in the priority file, such as the most visited URLs, in the
+   file's order,
+3. the remaining pages, shallowest first, so the home page and section
+   indexes come before the pages below them.
+
+Within the first group, listed pages come first, in the file's order, and
+then the rest, shallowest first.
+
+The priority file holds one URL per line: site-relative (`/blog/tom/`),
+including the basepath, or absolute (`https://example.com/blog/tom/`).
+Blank lines and lines starting with `#` are ignored, as are URLs of no
+content page.
+
+The schedule is also a build observer. It measures the time from the start
+of the build until the first changed page is written, which is reported
+apart from the total build time.
+
+Classes:
+    PageSchedule: Orders the pages of a build and reports the timings.
+
+Functions:
+    priority_keys(): Parse a priority file into page keys.
+
+"""
+import os
+import time
+from urllib.parse import urlsplit
+
+from page_graph import page_key
+
+
+def priority_keys(text, basepath='/'):
+    """Return the page keys of the URLs in a priority file, in order.
+
+    Args:
+        text (str): The priority file's content.
+        basepath (str): The URL prefix the site is published under; stripped
+            from the URLs that start with it.
+
+    Returns:
+        list[str]: Page keys as returned by `page_graph.page_key()`, without
+            duplicates.
+    """
+    prefix = basepath if basepath.endswith('/') else basepath + '/'
+    keys = []
+    for line in text.splitlines():
+        url = line.strip()
+        if not url or url.startswith('#'):
+            continue
+        url = urlsplit(url).path or '/'
+        if prefix != '/' and (url + '/').startswith(prefix):
+            url = '/' + url[len(prefix):]
+        key = page_key(url)
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+class PageSchedule:
+    """Render order of a progressive build.
+
+    Args:
+        priorities (list[str], optional): Page keys of the prioritized pages,
+            most important first (see `priority_keys()`).
+    """
+
+    def __init__(self, priorities=()):
+        self.ranks = {key: rank for rank, key in enumerate(priorities)}
+        self.changed = set()
+        self.prioritized = 0
+        self.pages = 0
+        self.first_changed = None
+        self.last_page = None
+
+    def load(self, fs, path, basepath='/'):
+        """Read the priorities from the priority file at `path`."""
+        self.ranks = {key: rank for rank, key in enumerate(priority_keys(fs.read_text(path), basepath))}
+
+    def order(self, pages, context, previous_mtimes):
+        """Return the pages in the order they should be rendered.
+
+        Args:
+            pages (list[tuple[str, str]]): `(source_path, dest_path)` of every
+                page of the build.
+            context (BuildContext): The build.
+            previous_mtimes (dict[str, int]): Source mtimes of the pages
+                rendered by the previous build, by source path.
+
+        Returns:
+            list[tuple[str, str]]: The same pages, highest priority first.
+        """
+        fs = context.fs
+        self.changed = {source for source, _ in pages if previous_mtimes.get(source) != fs.mtime(source)}
+        unlisted = len(self.ranks)
+
+        def priority(page):
+            source, dest = page
+            rank = self.ranks.get(page_key(context.url_for(dest)), unlisted)
+            tier = 0 if source in self.changed else 1 if rank < unlisted else 2
+            return tier, rank, dest.count(os.sep), dest
+
+        ordered = sorted(pages, key=priority)
+        self.prioritized = sum(1 for _, dest in pages if page_key(context.url_for(dest)) in self.ranks)
+        return ordered
+
+    def add_page(self, page, context):
+        self.pages += 1
+        self.last_page = time.perf_counter() - context.started
+        if self.first_changed is None and page.source_path in self.changed:
+            self.first_changed = (self.last_page, page.source_path)
+
+    def finish(self, context):
+        line = f"{self.pages} pages in priority order ({len(self.changed)} changed, {self.prioritized} listed)"
+        if self.first_changed is not None:
+            elapsed, source = self.first_changed
+            line += f", first changed page live after {elapsed * 1000:.1f} ms ({source})"
+        if self.last_page is not None:
+            line += f", all pages after {self.last_page * 1000:.1f} ms"
+        context.report("Progressive", line)
@@ -0,0 +1,71 @@
+"""Selection of the pages rendered by a targeted build.
+
+`main.py --only PATTERN` builds just the content pages matching one or more
+patterns, for a quick preview of the pages being edited. A pattern is either
+a path or a glob, relative to the project or to the content directory:
+
+- `content/blog/tom/index.md` or `blog/tom/index.md`: that page
+- `blog/tom`: every page under that directory
+- `blog/*/index.md`: a glob; as with `fnmatch`, `*` also matches `/`
+
+`generate_pages_recursive()` asks the selection which directories may hold
+matching pages and never lists the others.
+
+Classes:
+    PageSelection: The patterns of a targeted build.
+
+"""
+import fnmatch
+import os
+
+GLOB_CHARS = frozenset('*?[')
+
+
+class PageSelection:
+    """Content pages selected with `--only`.
+
+    Args:
+        patterns (list[str]): Paths or globs, see the module docstring.
+        content_root (str): The content directory patterns are relative to
+            when they do not start with it.
+    """
+
+    def __init__(self, patterns, content_root='content'):
+        self.content_root = content_root.rstrip('/')
+        self.patterns = [self._normalize(pattern) for pattern in patterns]
+        self.matched = 0
+
+    def _normalize(self, pattern):
+        pattern = pattern.replace(os.sep, '/').strip('/')
+        while pattern.startswith('./'):
+            pattern = pattern[2:]
+        if pattern != self.content_root and not pattern.startswith(self.content_root + '/'):
+            pattern = f"{self.content_root}/{pattern}" if pattern else self.content_root
+        return pattern
+
+    def __str__(self):
+        return ', '.join(self.patterns)
+
+    def matches(self, path):
+        """Return whether the markdown source at `path` is selected."""
+        path = path.replace(os.sep, '/')
+        for pattern in self.patterns:
+            if GLOB_CHARS.isdisjoint(pattern):
+                if path == pattern or path.startswith(pattern + '/'):
+                    return True
+            elif fnmatch.fnmatchcase(path, pattern):
+                return True
+        return False
+
+    def may_contain(self, directory):
+        """Return whether a selected page may be found under `directory`."""
+        directory = directory.replace(os.sep, '/').rstrip('/') + '/'
+        for pattern in self.patterns:
+            if GLOB_CHARS.isdisjoint(pattern):
+                if (pattern + '/').startswith(directory) or directory.startswith(pattern + '/'):
+                    return True
+                continue
+            prefix = pattern[:min(pattern.find(c) for c in GLOB_CHARS if c in pattern)]
+            if prefix.startswith(directory) or directory.startswith(prefix):
+                return True
+        return False
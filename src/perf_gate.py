@@ -0,0 +1,192 @@
+"""Performance regression gate for the generator's pipeline stages.
+
+Times a fixed benchmark profile on a pinned synthetic corpus (see `corpus`)
+and compares it with the checked-in baseline:
+
+- markdown_to_html_node: parse every page into a node tree
+- text_to_textnodes: inline-parse every paragraph
+- to_html: serialize every page's node tree
+- generate_pages_recursive: the whole page generation, in memory
+
+Each stage is run several times and summarized by its median and median
+absolute deviation. A pure-Python calibration loop is timed alongside, and
+the baseline is scaled by the ratio of the calibration times so that a
+baseline recorded on one machine remains usable on another. A stage fails
+when its median exceeds the scaled baseline by more than `--threshold` and
+by more than `--noise` times the combined deviations.
+
+Usage:
+    python3 src/perf_gate.py [--repeat 7] [--threshold 0.15] [--report diff.md]
+    python3 src/perf_gate.py --update
+
+Exits with status 1 if any stage regressed.
+
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+from corpus import CorpusSpec, generate_corpus
+from filesystem import MemoryFileSystem
+from markdown_blocks import BlockType, block_to_block_type, markdown_to_blocks, strip_paragraph_newlines
+from markdown_inline import text_to_textnodes
+from main import generate_pages_recursive, markdown_to_html_node
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'perf_baseline.json')
+CORPUS = {'pages': 150, 'mean_blocks': 20, 'size_sigma': 0.75, 'link_density': 0.5, 'depth': 2, 'fanout': 4, 'seed': 40}
+STAGES = ('markdown_to_html_node', 'text_to_textnodes', 'to_html', 'generate_pages_recursive')
+
+
+def calibrate():
+    """Time a fixed pure-Python workload, used to compare machines."""
+    start = time.perf_counter()
+    total = 0
+    words = {}
+    for i in range(200000):
+        key = f"w{i % 997}"
+        words[key] = words.get(key, 0) + i
+        total += len(key)
+    return time.perf_counter() - start
+
+
+def load_corpus():
+    fs = MemoryFileSystem()
+    generate_corpus('.', CorpusSpec(**CORPUS), fs=fs)
+    pages = []
+    stack = ['content']
+    while stack:
+        directory = stack.pop()
+        for name in sorted(fs.listdir(directory)):
+            path = os.path.join(directory, name)
+            if fs.isdir(path):
+                stack.append(path)
+            else:
+                pages.append(fs.read_text(path))
+    return fs, pages
+
+
+def stage_functions(fs, pages):
+    paragraphs = [strip_paragraph_newlines(block) for page in pages for block in markdown_to_blocks(page)
+                  if block_to_block_type(block) == BlockType.PARAGRAPH]
+    trees = [markdown_to_html_node(page) for page in pages]
+
+    def generate():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive('content', '/', 'template.html', 'docs', fs=fs)
+
+    return {
+        'markdown_to_html_node': lambda: [markdown_to_html_node(page) for page in pages],
+        'text_to_textnodes': lambda: [text_to_textnodes(text) for text in paragraphs],
+        'to_html': lambda: [tree.to_html() for tree in trees],
+        'generate_pages_recursive': generate,
+    }
+
+
+def run_profile(repeat):
+    """Time every stage `repeat` times.
+
+    Returns:
+        dict: `{'calibration': seconds, 'stages': {name: {'median', 'mad', 'runs'}}}`.
+    """
+    fs, pages = load_corpus()
+    functions = stage_functions(fs, pages)
+    calibrations = []
+    runs = {name: [] for name in STAGES}
+    for _ in range(repeat):
+        # Interleave the stages so that a burst of machine noise is spread
+        # over all of them instead of hitting one.
+        calibrations.append(calibrate())
+        for name in STAGES:
+            start = time.perf_counter()
+            functions[name]()
+            runs[name].append(time.perf_counter() - start)
+    stages = {}
+    for name, times in runs.items():
+        median = statistics.median(times)
+        stages[name] = {'median': median, 'mad': statistics.median(abs(t - median) for t in times), 'runs': times}
+    return {'calibration': statistics.median(calibrations), 'stages': stages}
+
+
+def compare_results(baseline, current, threshold, noise):
+    """Compare a profile run with the baseline.
+
+    Args:
+        baseline (dict): A profile as returned by `run_profile()`.
+        current (dict): The profile to check.
+        threshold (float): Allowed relative slowdown, e.g. 0.15 for 15%.
+        noise (float): Required multiple of the combined median absolute
+            deviations before a slowdown counts.
+
+    Returns:
+        list[dict]: One row per stage with the scaled baseline median, the
+            current median, the relative change and whether it regressed.
+    """
+    scale = current['calibration'] / baseline['calibration'] if baseline['calibration'] else 1.0
+    rows = []
+    for name in STAGES:
+        if name not in baseline['stages'] or name not in current['stages']:
+            continue
+        base = baseline['stages'][name]
+        now = current['stages'][name]
+        expected = base['median'] * scale
+        change = now['median'] / expected - 1 if expected else 0.0
+        margin = noise * (base['mad'] * scale + now['mad'])
+        regressed = change > threshold and now['median'] - expected > margin
+        rows.append({'stage': name, 'baseline': expected, 'current': now['median'], 'change': change,
+                     'regressed': regressed})
+    return rows
+
+
+def format_table(rows, scale):
+    lines = [
+        f"Baseline scaled by {scale:.2f} (calibration ratio)",
+        "",
+        "| stage | baseline ms | current ms | change | status |",
+        "|---|---:|---:|---:|---|",
+    ]
+    for row in rows:
+        status = "REGRESSED" if row['regressed'] else "ok"
+        lines.append(f"| {row['stage']} | {row['baseline'] * 1000:.1f} | {row['current'] * 1000:.1f} | "
+                     f"{row['change']:+.1%} | {status} |")
+    return '\n'.join(lines) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', default=os.path.normpath(BASELINE_PATH), help="baseline file")
+    parser.add_argument('--repeat', type=int, default=7, help="runs per stage")
+    parser.add_argument('--threshold', type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument('--noise', type=float, default=3.0,
+                        help="slowdowns within this many median absolute deviations are ignored")
+    parser.add_argument('--report', metavar='PATH', help="also write the diff table to this file")
+    parser.add_argument('--update', action='store_true', help="record the current timings as the new baseline")
+    args = parser.parse_args(argv)
+
+    current = run_profile(args.repeat)
+    if args.update:
+        with open(args.baseline, 'w') as file:
+            json.dump(dict(current, corpus=CORPUS, python=sys.version.split()[0]), file, indent=2)
+            file.write('\n')
+        print(f"Wrote baseline to {args.baseline}")
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline.get('corpus') != CORPUS:
+        print("Baseline was recorded on a different corpus; rerun with --update")
+        return 2
+    rows = compare_results(baseline, current, args.threshold, args.noise)
+    table = format_table(rows, current['calibration'] / baseline['calibration'])
+    print(table, end='')
+    if args.report:
+        with open(args.report, 'w') as file:
+            file.write(table)
+    return 1 if any(row['regressed'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""Atomic staged publishing of the output directory.
+
+Instead of deleting `docs/` and regenerating it in place, a staged build
+writes into a fresh release directory under `.releases/`. The output root is
+a symlink to the live release, and publishing replaces that symlink with
+`os.replace()`, which is atomic, so a server following it sees either the old
+or the new site and never a partial one. Older releases are kept for instant
+rollback.
+
+Files whose content is identical to the previous release are hardlinked from
+it instead of being written again, using the content hashes recorded in each
+release's manifest.
+
+Classes:
+    StagingFileSystem: Local backend that redirects the output root into a
+        staging directory and hardlinks unchanged files.
+    Release: A staged build that can be published or discarded.
+
+Functions:
+    initial_release_id(): The id the pre-release output directory is kept under.
+    list_releases(): Return the release ids under a releases directory.
+    rollback(): Point the output root at an earlier release.
+    update_live_manifest(): Record files rewritten in the live release.
+
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+
+from filesystem import LocalFileSystem
+
+MANIFEST_SUFFIX = '.json'
+# Default release ids are UTC timestamps ending in RELEASE_ID_SUFFIX.
+RELEASE_ID_FORMAT = '%Y%m%dT%H%M%S%f'
+RELEASE_ID_SUFFIX = 'Z'
+
+
+def _manifest_path(releases_dir, release_id):
+    return os.path.join(releases_dir, release_id + MANIFEST_SUFFIX)
+
+
+def initial_release_id(release_id):
+    """Return the id the plain output directory is kept under when
+    `release_id` is the first release published over it.
+
+    The id's timestamp followed by `-initial` sorts just before the id
+    itself, since `-` sorts before the `Z` suffix. Ids without the suffix
+    keep the whole id, and the old site then sorts after the release.
+    """
+    stem = release_id[:-len(RELEASE_ID_SUFFIX)] if release_id.endswith(RELEASE_ID_SUFFIX) else release_id
+    return stem + '-initial'
+
+
+def list_releases(releases_dir):
+    """Return the release ids under `releases_dir`, oldest first."""
+    if not os.path.isdir(releases_dir):
+        return []
+    return sorted(name for name in os.listdir(releases_dir)
+                  if os.path.isdir(os.path.join(releases_dir, name)) and not name.startswith('.'))
+
+
+def current_release(root):
+    """Return the directory the output root points to, or None."""
+    if os.path.islink(root):
+        return os.path.realpath(root)
+    return None
+
+
+def _swap_symlink(root, target):
+    temp_link = f"{root}.swap-{os.getpid()}"
+    if os.path.lexists(temp_link):
+        os.remove(temp_link)
+    os.symlink(os.path.relpath(target, os.path.dirname(os.path.abspath(root))), temp_link)
+    os.replace(temp_link, root)
+
+
+class StagingFileSystem(LocalFileSystem):
+    """Local backend that writes the output root into a staging directory.
+
+    Paths under `root` are transparently mapped into `staging_dir`, so the
+    build code keeps writing to `docs/`. A written file whose SHA-256 matches
+    the previous release's manifest entry is hardlinked from that release.
+
+    Args:
+        root (str): The output root the build writes to (e.g. 'docs').
+        staging_dir (str): Directory receiving the new release.
+        previous_dir (str, optional): Directory of the live release.
+        previous_hashes (dict, optional): Relative path to SHA-256 hex digest
+            for every file in `previous_dir`.
+    """
+
+    def __init__(self, root, staging_dir, previous_dir=None, previous_hashes=None):
+        self.root = os.path.normpath(root)
+        self.staging_dir = staging_dir
+        self.previous_dir = previous_dir
+        self.previous_hashes = previous_hashes or {}
+        self.hashes = {}
+        self.linked = 0
+        self.written = 0
+
+    def _map(self, path):
+        path = os.path.normpath(path)
+        if path == self.root:
+            return self.staging_dir
+        if path.startswith(self.root + os.sep):
+            return os.path.join(self.staging_dir, path[len(self.root) + 1:])
+        return path
+
+    def read_bytes(self, path):
+        return super().read_bytes(self._map(path))
+
+    def read_text(self, path):
+        return super().read_text(self._map(path))
+
+    def open_binary(self, path):
+        return super().open_binary(self._map(path))
+
+    def write_bytes(self, path, data):
+        target = self._map(path)
+        if target == path:
+            return super().write_bytes(path, data)
+        relative = os.path.relpath(target, self.staging_dir)
+        digest = hashlib.sha256(data).hexdigest()
+        self.hashes[relative] = digest
+        if os.path.lexists(target):
+            os.remove(target)
+        if self.previous_dir is not None and self.previous_hashes.get(relative) == digest:
+            try:
+                os.link(os.path.join(self.previous_dir, relative), target)
+                self.linked += 1
+                return
+            except OSError:
+                pass
+        super().write_bytes(target, data)
+        self.written += 1
+
+    def write_text(self, path, text):
+        self.write_bytes(path, text.encode('utf-8'))
+
+    def write_chunks(self, path, chunks):
+        # The digest deciding whether to link the previous release's copy is
+        # only known once every chunk is produced.
+        self.write_bytes(path, b''.join(chunk.encode('utf-8') for chunk in chunks))
+
+    def exists(self, path):
+        return super().exists(self._map(path))
+
+    def isfile(self, path):
+        return super().isfile(self._map(path))
+
+    def isdir(self, path):
+        return super().isdir(self._map(path))
+
+    def listdir(self, path):
+        return super().listdir(self._map(path))
+
+    def mtime(self, path):
+        return super().mtime(self._map(path))
+
+    def mkdir(self, path):
+        super().mkdir(self._map(path))
+
+    def makedirs(self, path):
+        super().makedirs(self._map(path))
+
+    def rmtree(self, path):
+        super().rmtree(self._map(path))
+
+    def remove(self, path):
+        super().remove(self._map(path))
+
+    def copy(self, source_path, dest_path):
+        self.write_bytes(dest_path, self.read_bytes(source_path))
+
+
+class Release:
+    """A build staged into a new release directory.
+
+    Build through `fs`, then call `publish()` to make the release live or
+    `discard()` to throw it away.
+
+    Args:
+        root (str): The output root, which becomes a symlink to the release.
+        releases_dir (str): Directory holding the release directories.
+        release_id (str, optional): Name of the new release. Defaults to a
+            sortable UTC timestamp.
+    """
+
+    def __init__(self, root, releases_dir, release_id=None):
+        self.root = root
+        self.releases_dir = releases_dir
+        self.release_id = release_id or (datetime.datetime.now(datetime.timezone.utc).strftime(RELEASE_ID_FORMAT)
+                                         + RELEASE_ID_SUFFIX)
+        self.path = os.path.join(releases_dir, self.release_id)
+        os.makedirs(releases_dir, exist_ok=True)
+        os.mkdir(self.path)
+        previous_dir = current_release(root)
+        previous_hashes = {}
+        if previous_dir is not None:
+            manifest = _manifest_path(releases_dir, os.path.basename(previous_dir))
+            if os.path.isfile(manifest):
+                with open(manifest, 'r') as file:
+                    previous_hashes = json.load(file)
+        self.fs = StagingFileSystem(root, self.path, previous_dir, previous_hashes)
+
+    def publish(self, keep=5):
+        """Atomically make this release live and prune old releases.
+
+        If the output root is still a plain directory it is first moved into
+        the releases directory, so it stays available for rollback; only this
+        one-time migration is not atomic.
+
+        Args:
+            keep (int): Number of releases to keep, including the new one.
+
+        Returns:
+            list[str]: Ids of the releases that were pruned.
+        """
+        with open(_manifest_path(self.releases_dir, self.release_id), 'w') as file:
+            json.dump(self.fs.hashes, file, separators=(',', ':'))
+        if os.path.isdir(self.root) and not os.path.islink(self.root):
+            os.rename(self.root, os.path.join(self.releases_dir, initial_release_id(self.release_id)))
+        _swap_symlink(self.root, self.path)
+        return prune_releases(self.root, self.releases_dir, keep)
+
+    def discard(self):
+        """Delete the staged release without publishing it."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def prune_releases(root, releases_dir, keep):
+    """Delete all but the newest `keep` releases, never the live one.
+
+    Returns:
+        list[str]: Ids of the releases that were deleted.
+    """
+    live = current_release(root)
+    releases = list_releases(releases_dir)
+    pruned = []
+    for release_id in releases[:max(len(releases) - keep, 0)]:
+        path = os.path.join(releases_dir, release_id)
+        if live is not None and os.path.realpath(path) == live:
+            continue
+        shutil.rmtree(path)
+        manifest = _manifest_path(releases_dir, release_id)
+        if os.path.exists(manifest):
+            os.remove(manifest)
+        pruned.append(release_id)
+    return pruned
+
+
+def rollback(root, releases_dir, steps=1):
+    """Point the output root at an earlier release.
+
+    Args:
+        root (str): The output root symlink.
+        releases_dir (str): Directory holding the release directories.
+        steps (int): How many releases to go back from the live one.
+
+    Returns:
+        str: The id of the release that is now live.
+
+    Raises:
+        ValueError: If the root is not a published release or there is no
+            release `steps` back.
+    """
+    live = current_release(root)
+    releases = list_releases(releases_dir)
+    paths = [os.path.realpath(os.path.join(releases_dir, r)) for r in releases]
+    if live is None or live not in paths:
+        raise ValueError(f"{root} is not a published release")
+    index = paths.index(live) - steps
+    if index < 0:
+        raise ValueError(f"No release {steps} before {os.path.basename(live)}")
+    _swap_symlink(root, paths[index])
+    return releases[index]
+
+
+def update_live_manifest(root, releases_dir, hashes):
+    """Record files rewritten in place in the live release's manifest.
+
+    Builds that update the output root in place (`--only`, `--progressive`)
+    replace files of the live release. Its manifest must list their new
+    hashes, or the next release would hardlink a rewritten file where it
+    expects the previous content.
+
+    Args:
+        root (str): The output root symlink.
+        releases_dir (str): Directory holding the release directories.
+        hashes (dict[str, str]): SHA-256 hex digest of each rewritten file,
+            by site URL (`/blog/index.html`), as in
+            `BuildContext.output_hashes`.
+
+    Returns:
+        bool: False if the output root is not a published release.
+    """
+    live = current_release(root)
+    if live is None or os.path.dirname(live) != os.path.realpath(releases_dir):
+        return False
+    manifest = _manifest_path(releases_dir, os.path.basename(live))
+    previous_hashes = {}
+    if os.path.isfile(manifest):
+        with open(manifest, 'r') as file:
+            previous_hashes = json.load(file)
+    previous_hashes.update((url.lstrip('/'), digest) for url, digest in hashes.items())
+    with open(manifest, 'w') as file:
+        json.dump(previous_hashes, file, separators=(',', ':'))
+    return True
@@ -0,0 +1,141 @@
+"""Extension registry for block and inline markdown handlers.
+
+Block types are described by a detector (does this block have my type?) and
+a renderer (block text to HTML node). Detectors declare the characters a
+block of their type can start with; the registry compiles them into a table
+keyed by first character, so classifying a block is one dictionary lookup
+followed by only the detectors that can possibly match.
+
+Inline handling is split the same way: splitters turn text nodes into typed
+nodes (applied in priority order) and renderers turn each text type into an
+HTML node.
+
+The built-in markdown types register themselves in `markdown_blocks`,
+`markdown_inline` and `main`; extensions call the same `register_*` methods
+on `BLOCKS` and `INLINE`.
+
+Classes:
+    BlockRegistry: Block detectors and renderers with first-character dispatch.
+    InlineRegistry: Inline splitters and renderers.
+
+"""
+
+
+class BlockRule:
+    """A registered block detector."""
+
+    def __init__(self, block_type, detect, first_chars, priority, order):
+        self.block_type = block_type
+        self.detect = detect
+        self.first_chars = first_chars
+        self.priority = priority
+        self.order = order
+
+    def sort_key(self):
+        return (-self.priority, self.order)
+
+
+class BlockRegistry:
+    """Block detectors and renderers with a compiled first-character table.
+
+    Args:
+        default_type: Block type returned when no detector matches.
+    """
+
+    def __init__(self, default_type=None):
+        self.default_type = default_type
+        self._rules = []
+        self._renderers = {}
+        self._table = None
+        self._wildcard = None
+
+    def register_detector(self, block_type, detect, first_chars=None, priority=0):
+        """Register a detector for `block_type`.
+
+        Args:
+            block_type: Key identifying the block type (e.g. a `BlockType`).
+            detect (callable): `detect(block) -> bool`.
+            first_chars (str or iterable, optional): Characters a block of this
+                type can start with. `None` means any character, in which
+                case the detector is tried for every block.
+            priority (int): Detectors with higher priority are tried first.
+        """
+        chars = None if first_chars is None else frozenset(first_chars)
+        self._rules.append(BlockRule(block_type, detect, chars, priority, len(self._rules)))
+        self._table = None
+
+    def register_renderer(self, block_type, render):
+        """Register `render(block) -> HTMLNode` for `block_type`."""
+        self._renderers[block_type] = render
+
+    def compile(self):
+        """Build the first-character lookup table.
+
+        Called automatically on the first lookup after a registration.
+        """
+        wildcard = [rule for rule in self._rules if rule.first_chars is None]
+        table = {}
+        for rule in self._rules:
+            for char in rule.first_chars or ():
+                table.setdefault(char, []).append(rule)
+        for char, rules in table.items():
+            table[char] = tuple((rule.block_type, rule.detect)
+                                for rule in sorted(rules + wildcard, key=BlockRule.sort_key))
+        self._wildcard = tuple((rule.block_type, rule.detect)
+                               for rule in sorted(wildcard, key=BlockRule.sort_key))
+        self._table = table
+
+    def block_type(self, block):
+        """Classify `block`, returning the registry's default type if no
+        detector matches."""
+        if self._table is None:
+            self.compile()
+        for block_type, detect in self._table.get(block[:1], self._wildcard):
+            if detect(block):
+                return block_type
+        return self.default_type
+
+    def renderer(self, block_type):
+        """Return the renderer for `block_type`, or `None`."""
+        return self._renderers.get(block_type)
+
+
+class InlineRegistry:
+    """Inline splitters, applied in priority order, and per-type renderers."""
+
+    def __init__(self):
+        self._splitters = []
+        self._renderers = {}
+        self._compiled = None
+
+    def register_splitter(self, name, split, priority=0):
+        """Register an inline splitter.
+
+        Args:
+            name (str): Name of the token, for replacing or inspecting it.
+            split (callable): `split(nodes) -> nodes`, turning text nodes
+                into typed nodes.
+            priority (int): Splitters with higher priority run first.
+        """
+        self._splitters = [s for s in self._splitters if s[2] != name]
+        self._splitters.append((-priority, len(self._splitters), name, split))
+        self._splitters.sort(key=lambda s: (s[0], s[1]))
+        self._compiled = None
+
+    def register_renderer(self, text_type, render):
+        """Register `render(text_node) -> HTMLNode` for `text_type`."""
+        self._renderers[text_type] = render
+
+    def splitters(self):
+        """Return the splitter callables in the order they are applied."""
+        if self._compiled is None:
+            self._compiled = tuple(s[3] for s in self._splitters)
+        return self._compiled
+
+    def renderer(self, text_type):
+        """Return the renderer for `text_type`, or `None`."""
+        return self._renderers.get(text_type)
+
+
+BLOCKS = BlockRegistry()
+INLINE = InlineRegistry()
@@ -0,0 +1,192 @@
+"""Client-side search index built while pages are rendered.
+
+Each page's node tree is tokenized as it is generated and its postings are
+merged into an inverted index (term -> page id, score and positions). The
+index is written as JSON shards keyed by the first character of each term so
+a client only downloads the shards for the terms it is looking up.
+
+The per-page contributions are persisted between builds; a page whose
+content digest is unchanged keeps its previous postings without being
+tokenized again.
+
+The new shards are written over the previous ones and the shards no longer
+needed are deleted afterwards, so the output directory never lacks an index
+while the build runs; with an `AtomicFileSystem` every file is replaced in
+one step.
+
+Classes:
+    SearchIndex: Build observer maintaining and emitting the inverted index.
+
+Functions:
+    tokenize(): Split text into lowercase search terms.
+    collect_text(): Yield `(text, weight)` pairs from an HTML node tree.
+
+"""
+import json
+import os
+import re
+import time
+
+from htmlnode import ParentNode
+
+TERM_PATTERN = re.compile(r"\w+")
+TITLE_WEIGHT = 5
+HEADING_WEIGHT = 3
+BODY_WEIGHT = 1
+HEADING_TAGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+INDEX_VERSION = 1
+
+
+def tokenize(text):
+    """Split text into lowercase search terms.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list[str]: Word-character runs of `text`, lowercased.
+    """
+    return TERM_PATTERN.findall(text.lower())
+
+
+def collect_text(node):
+    """Yield the text of an HTML node tree with a weight per fragment.
+
+    Text inside `h1`-`h6` elements is weighted as heading text, everything
+    else as body text. The tree is walked with an explicit stack.
+
+    Args:
+        node (HTMLNode): The root of the tree.
+
+    Yields:
+        tuple[str, int]: A text fragment and its weight.
+    """
+    stack = [(node, BODY_WEIGHT)]
+    while stack:
+        current, weight = stack.pop()
+        if current.tag in HEADING_TAGS:
+            weight = HEADING_WEIGHT
+        if isinstance(current, ParentNode):
+            for child in reversed(current.children or []):
+                stack.append((child, weight))
+        elif current.value:
+            yield current.value, weight
+
+
+def _shard_key(term):
+    first = term[0]
+    return first if first.isascii() and first.isalnum() else '_'
+
+
+class SearchIndex:
+    """Build observer that emits a sharded inverted index.
+
+    Output layout under `<dest_root>/<directory>/`:
+
+    - `pages.json`: list of `[url, title]`, indexed by page id.
+    - `terms-<c>.json`: `{term: [[page_id, score, pos, pos, ...], ...]}` for
+      every term starting with character `c` (`_` for non-ASCII starts).
+
+    Args:
+        state_path (str, optional): File the per-page contributions are
+            persisted in between builds. No state is kept when omitted.
+        directory (str): Output directory name, relative to the site root.
+    """
+
+    def __init__(self, state_path=None, directory='search'):
+        self.state_path = state_path
+        self.directory = directory
+        self.pages = {}
+        self.seen = set()
+        self.reused = 0
+        self.elapsed = 0.0
+
+    def load(self, fs):
+        """Load per-page contributions saved by a previous build."""
+        if self.state_path is None or not fs.isfile(self.state_path):
+            return
+        state = json.loads(fs.read_text(self.state_path))
+        if state.get('version') == INDEX_VERSION:
+            self.pages = state['pages']
+
+    def add_page(self, page, context):
+        start = time.perf_counter()
+        digest = page.source_digest
+        self.seen.add(page.url)
+        previous = self.pages.get(page.url)
+        if previous is not None and previous['digest'] == digest:
+            self.reused += 1
+        else:
+            self.pages[page.url] = {
+                'digest': digest,
+                'title': page.title,
+                'postings': self._page_postings(page),
+            }
+        self.elapsed += time.perf_counter() - start
+
+    def _page_postings(self, page):
+        postings = {}
+        position = 0
+        fragments = [(page.title, TITLE_WEIGHT)]
+        fragments.extend(collect_text(page.node))
+        for text, weight in fragments:
+            for term in tokenize(text):
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = [0]
+                entry[0] += weight
+                entry.append(position)
+                position += 1
+        return postings
+
+    def build_shards(self):
+        """Merge the per-page postings into shards.
+
+        Returns:
+            tuple[list, dict]: The page table and `{shard_key: {term: postings}}`.
+        """
+        page_table = []
+        shards = {}
+        for url in sorted(self.pages):
+            page_id = len(page_table)
+            contribution = self.pages[url]
+            page_table.append([url, contribution['title']])
+            for term, entry in contribution['postings'].items():
+                shard = shards.setdefault(_shard_key(term), {})
+                shard.setdefault(term, []).append([page_id] + entry)
+        return page_table, shards
+
+    def finish(self, context):
+        start = time.perf_counter()
+        fs = context.fs
+        for url in [u for u in self.pages if u not in self.seen]:
+            del self.pages[url]
+        page_table, shards = self.build_shards()
+        out_dir = os.path.join(context.dest_root, self.directory)
+        previous = set(fs.listdir(out_dir)) if fs.isdir(out_dir) else set()
+        fs.makedirs(out_dir)
+        total_bytes = 0
+        files = [('pages.json', page_table)]
+        files.extend((f'terms-{key}.json', shards[key]) for key in sorted(shards))
+        for name, data in files:
+            encoded = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            fs.write_bytes(os.path.join(out_dir, name), encoded)
+            context.add_output(os.path.join(out_dir, name))
+            total_bytes += len(encoded)
+        # Only once the new index is complete: shards no term maps to anymore.
+        for name in sorted(previous - {name for name, _ in files}):
+            if fs.isfile(os.path.join(out_dir, name)):
+                fs.remove(os.path.join(out_dir, name))
+        if self.state_path is not None:
+            state_dir = os.path.dirname(self.state_path)
+            if state_dir:
+                fs.makedirs(state_dir)
+            state = {'version': INDEX_VERSION, 'pages': self.pages}
+            fs.write_text(self.state_path, json.dumps(state, separators=(',', ':')))
+        self.elapsed += time.perf_counter() - start
+        terms = sum(len(shard) for shard in shards.values())
+        context.report(
+            "Search index",
+            f"{terms} terms, {len(page_table)} pages ({self.reused} unchanged), "
+            f"{total_bytes / 1024:.1f} KiB in {len(files)} files, {self.elapsed * 1000:.1f} ms",
+        )
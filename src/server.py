@@ -0,0 +1,238 @@
+"""In-memory development server for the generated site.
+
+The site is served from a `SiteStore`, a dictionary of URL path to
+pre-encoded response bodies that is filled from the build output and updated
+in place after each rebuild, so requests never touch the disk.
+
+Classes:
+    SiteStore: Thread-safe map of URL paths to cached response entries.
+    SiteRequestHandler: HTTP handler with strong ETags, `If-None-Match`
+        revalidation and gzip negotiation.
+
+Functions:
+    make_server(): Create a threading HTTP server bound to a store.
+    url_path_for(): Map an output file path to the URL path it is served at.
+
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 256
+
+
+class SiteEntry:
+    """A cached response body and its validators.
+
+    The gzip variant is produced on first request and kept with the entry.
+    """
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+        self._gzip_body = None
+        self._lock = threading.Lock()
+
+    @property
+    def compressible(self):
+        return len(self.body) >= MIN_COMPRESS_SIZE and self.content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def gzip_body(self):
+        """Return the gzip-compressed body, compressing it on first use."""
+        if self._gzip_body is None:
+            with self._lock:
+                if self._gzip_body is None:
+                    self._gzip_body = gzip.compress(self.body, mtime=0)
+        return self._gzip_body
+
+
+def url_path_for(relative_path, prefix='/'):
+    """Map an output file path to the URL path it is served at.
+
+    Args:
+        relative_path (str): Path of the file relative to the output root.
+        prefix (str): URL path the output root is served at, such as the
+            site's basepath.
+
+    Returns:
+        str: The URL path, starting with '/'. Paths use forward slashes.
+    """
+    if not prefix.endswith('/'):
+        prefix += '/'
+    return prefix + relative_path.replace(os.sep, '/')
+
+
+class SiteStore:
+    """Thread-safe map of URL paths to `SiteEntry` objects.
+
+    Entries are replaced one key at a time, so concurrent requests always see
+    either the previous or the new version of a file.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url_path):
+        return self._entries.get(url_path)
+
+    def put(self, url_path, body):
+        """Store `body` at `url_path`, keeping the old entry if unchanged.
+
+        Returns:
+            bool: True if the entry was added or changed.
+        """
+        existing = self._entries.get(url_path)
+        if existing is not None and existing.body == body:
+            return False
+        content_type = mimetypes.guess_type(url_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/'):
+            content_type += '; charset=utf-8'
+        with self._lock:
+            self._entries[url_path] = SiteEntry(body, content_type)
+        return True
+
+    def load(self, fs, root, prefix='/'):
+        """Synchronize the store with every file under `root` in `fs`.
+
+        New and changed files are updated in place and files that no longer
+        exist are dropped.
+
+        Args:
+            fs: Filesystem backend holding the build output.
+            root (str): The output directory to load.
+            prefix (str): URL path `root` is served at. Pages built with a
+                basepath link to their files under it.
+
+        Returns:
+            int: The number of entries added, changed or removed.
+        """
+        seen = set()
+        changed = 0
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            for name in fs.listdir(directory):
+                path = os.path.join(directory, name)
+                if fs.isdir(path):
+                    pending.append(path)
+                    continue
+                url_path = url_path_for(os.path.relpath(path, root), prefix)
+                seen.add(url_path)
+                if self.put(url_path, fs.read_bytes(path)):
+                    changed += 1
+        with self._lock:
+            for url_path in [p for p in self._entries if p not in seen]:
+                del self._entries[url_path]
+                changed += 1
+        return changed
+
+    def resolve(self, url_path):
+        """Find the entry for a request path, trying `index.html` fallbacks."""
+        entry = self._entries.get(url_path)
+        if entry is None:
+            base = url_path if url_path.endswith('/') else url_path + '/'
+            entry = self._entries.get(base + 'index.html')
+        return entry
+
+
+def _accepts_gzip(header):
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            params = params.replace(' ', '')
+            return params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def _etag_matches(header, etags):
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag in candidates for tag in etags)
+
+
+class SiteRequestHandler(BaseHTTPRequestHandler):
+    """Serve `GET`/`HEAD` requests from the server's `SiteStore`."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive client stalls on delayed ACKs between them.
+    disable_nagle_algorithm = True
+    quiet = False
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        url_path = unquote(urlsplit(self.path).path)
+        entry = self.server.store.resolve(url_path)
+        if entry is None:
+            body = b'Not Found'
+            self.send_response(404)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+        use_gzip = entry.compressible and _accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        etag = entry.gzip_etag if use_gzip else entry.etag
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None and _etag_matches(if_none_match, (entry.etag, entry.gzip_etag)):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            if entry.compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        body = entry.gzip_body() if use_gzip else entry.body
+        self.send_response(200)
+        self.send_header('Content-Type', entry.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        if entry.compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(store, host='127.0.0.1', port=8888, quiet=False):
+    """Create a threading HTTP server that serves `store`.
+
+    Args:
+        store (SiteStore): The entries to serve.
+        host (str): Interface to bind.
+        port (int): Port to bind. Use 0 for an ephemeral port.
+        quiet (bool): Suppress the per-request access log.
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet started.
+    """
+    handler = type('Handler', (SiteRequestHandler,), {'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.store = store
+    return server
@@ -0,0 +1,322 @@
+"""A small compiled template language for page layouts.
+
+Templates are plain HTML with three kinds of tags:
+
+- `{{ Name }}` or `{{ item.title }}` inserts a value. Dotted names look up
+  dictionary keys or attributes. Values are escaped for where they appear,
+  element content or an attribute value inside a tag, unless they are
+  `Markup`, such as a page's rendered `Content`.
+- `{% include "header.html" %}` inserts a partial from the partials
+  directory, rendered with the variables in scope, including loop
+  variables.
+- `{% for item in nav %}...{% endfor %}` and
+  `{% if name %}...{% else %}...{% endif %}` loop and branch.
+
+Each template is compiled once into a Python function and cached by path and
+modification time, so rendering a page is a single function call. Partials
+that only use site-wide variables are rendered once per build and reused for
+every page, until the partial or one it includes is modified.
+
+Classes:
+    Markup: A string of HTML inserted without escaping.
+    CompiledTemplate: A template compiled to a Python callable.
+    TemplateLoader: Resolves, compiles, caches and renders templates.
+
+Functions:
+    compile_template(): Compile template source into a `CompiledTemplate`.
+
+"""
+import os
+import re
+
+from html_escape import escape_attribute, escape_text
+
+TAG_PATTERN = re.compile(r"({{.*?}}|{%.*?%})", re.DOTALL)
+NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+INCLUDE_PATTERN = re.compile(r"""^include\s+["']([^"']+)["']$""")
+FOR_PATTERN = re.compile(r"^for\s+([A-Za-z_][A-Za-z0-9_]*)\s+in\s+(\S+)$")
+IF_PATTERN = re.compile(r"^if\s+(\S+)$")
+LAYOUT_NAME = 'template.html'
+
+_compiled_cache = {}
+
+
+def _attr(value, name):
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+class Markup(str):
+    """A string of HTML that templates insert as it is, without escaping."""
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, Markup):
+        return value
+    return escape_text(str(value))
+
+
+def _attribute(value):
+    if value is None:
+        return ''
+    if isinstance(value, Markup):
+        return value
+    return escape_attribute(str(value))
+
+
+def _scan_markup(text, in_tag, quote):
+    # Follow literal template text far enough to tell whether a value
+    # inserted after it lands inside a tag: returns the updated
+    # (in_tag, quote) state, quote being the open attribute quote if any.
+    for char in text:
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif in_tag:
+            if char in '"\'':
+                quote = char
+            elif char == '>':
+                in_tag = False
+        elif char == '<':
+            in_tag = True
+    return in_tag, quote
+
+
+class CompiledTemplate:
+    """A template compiled to a Python callable.
+
+    Attributes:
+        name (str): The template path, used in error messages.
+        render (callable): `render(ctx, include)` returning the output string.
+        names (set[str]): Top-level variable names the template reads.
+        includes (list[str]): Partials the template includes.
+        source (str): The generated Python source, for debugging.
+    """
+
+    def __init__(self, name, render, names, includes, source):
+        self.name = name
+        self.render = render
+        self.names = names
+        self.includes = includes
+        self.source = source
+
+
+def compile_template(text, name='<template>'):
+    """Compile template source into a `CompiledTemplate`.
+
+    Args:
+        text (str): The template source.
+        name (str): Template name used in error messages.
+
+    Returns:
+        CompiledTemplate: The compiled template.
+
+    Raises:
+        ValueError: If a tag is malformed or a block is left unclosed.
+    """
+    lines = ["def render(ctx, include):", "    out = []", "    append = out.append"]
+    indent = 1
+    blocks = []
+    loop_vars = []
+    names = set()
+    includes = []
+    in_tag, quote = False, None
+
+    def emit(line):
+        lines.append("    " * indent + line)
+
+    def expression(ref):
+        if not NAME_PATTERN.match(ref):
+            raise ValueError(f"{name}: invalid variable name {ref!r}")
+        root, *attrs = ref.split('.')
+        if root in loop_vars:
+            expr = f"_l_{root}"
+        else:
+            names.add(root)
+            expr = f"ctx.get({root!r})"
+        for attr in attrs:
+            expr = f"_attr({expr}, {attr!r})"
+        return expr
+
+    for part in TAG_PATTERN.split(text):
+        if not part:
+            continue
+        if part.startswith('{{') and part.endswith('}}'):
+            escape = '_attribute' if in_tag else '_text'
+            emit(f"append({escape}({expression(part[2:-2].strip())}))")
+        elif part.startswith('{%') and part.endswith('%}'):
+            statement = ' '.join(part[2:-2].split())
+            if match := INCLUDE_PATTERN.match(statement):
+                includes.append(match.group(1))
+                scope = "ctx"
+                if loop_vars:
+                    scope = "{**ctx, " + ", ".join(f"{var!r}: _l_{var}" for var in loop_vars) + "}"
+                emit(f"append(include({match.group(1)!r}, {scope}))")
+            elif match := FOR_PATTERN.match(statement):
+                iterable = expression(match.group(2))
+                loop_vars.append(match.group(1))
+                blocks.append('for')
+                emit(f"for _l_{match.group(1)} in ({iterable} or ()):")
+                indent += 1
+                emit("pass")
+            elif match := IF_PATTERN.match(statement):
+                blocks.append('if')
+                emit(f"if {expression(match.group(1))}:")
+                indent += 1
+                emit("pass")
+            elif statement == 'else':
+                if not blocks or blocks[-1] != 'if':
+                    raise ValueError(f"{name}: 'else' outside of an 'if' block")
+                blocks[-1] = 'else'
+                lines.append("    " * (indent - 1) + "else:")
+                emit("pass")
+            elif statement in ('endfor', 'endif'):
+                expected = ('for',) if statement == 'endfor' else ('if', 'else')
+                if not blocks or blocks[-1] not in expected:
+                    raise ValueError(f"{name}: unexpected '{statement}'")
+                if blocks.pop() == 'for':
+                    loop_vars.pop()
+                indent -= 1
+            else:
+                raise ValueError(f"{name}: unknown tag {part!r}")
+        else:
+            emit(f"append({part!r})")
+            in_tag, quote = _scan_markup(part, in_tag, quote)
+    if blocks:
+        raise ValueError(f"{name}: unclosed '{blocks[-1]}' block")
+    lines.append("    return ''.join(out)")
+    source = '\n'.join(lines)
+    namespace = {'_attr': _attr, '_text': _text, '_attribute': _attribute}
+    exec(compile(source, name, 'exec'), namespace)
+    return CompiledTemplate(name, namespace['render'], names, includes, source)
+
+
+class TemplateLoader:
+    """Resolve, compile and render templates for one build.
+
+    Compiled templates are shared between loaders through a module-level
+    cache keyed by path and modification time. Partials whose variables are
+    all site-wide are rendered once per loader, i.e. once per build.
+
+    Args:
+        fs: Filesystem backend the templates are read from.
+        partials_dir (str): Directory `{% include %}` names are relative to.
+        site (dict, optional): Site-wide variables available to every
+            template, such as `nav`.
+        content_root (str, optional): Root of the content tree. When given,
+            `resolve()` looks for per-directory `template.html` layouts.
+    """
+
+    def __init__(self, fs, partials_dir='partials', site=None, content_root=None):
+        self.fs = fs
+        self.partials_dir = partials_dir
+        self.site = dict(site or {})
+        self.content_root = content_root
+        self._resolved = {}
+        self._static_partials = {}
+        self._filters = []
+        self.compiled = 0
+        self.partial_renders = 0
+
+    def add_source_filter(self, source_filter, key):
+        """Register a function applied to template sources before compiling.
+
+        Args:
+            source_filter (callable): `source_filter(text) -> text`.
+            key (str): Identifies the filter's behavior in the compiled
+                template cache; change it whenever the filter's output for
+                the same source would change.
+        """
+        self._filters.append((key, source_filter))
+
+    def load(self, path):
+        """Return the compiled template at `path`, compiling it if needed."""
+        key = (os.path.abspath(path), tuple(filter_key for filter_key, _ in self._filters))
+        mtime = self.fs.mtime(path)
+        cached = _compiled_cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        source = self.fs.read_text(path)
+        for _, source_filter in self._filters:
+            source = source_filter(source)
+        template = compile_template(source, path)
+        _compiled_cache[key] = (mtime, template)
+        self.compiled += 1
+        return template
+
+    def resolve(self, page_dir, default):
+        """Find the layout for a page in `page_dir`.
+
+        Walks up from `page_dir` to the content root and returns the first
+        `template.html` found, or `default`. Results are memoized per
+        directory.
+        """
+        if self.content_root is None:
+            return default
+        page_dir = os.path.normpath(page_dir)
+        if page_dir in self._resolved:
+            return self._resolved[page_dir]
+        root = os.path.normpath(self.content_root)
+        candidate = os.path.join(page_dir, LAYOUT_NAME)
+        if self.fs.isfile(candidate):
+            layout = candidate
+        elif page_dir == root or not page_dir.startswith(root + os.sep):
+            layout = default
+        else:
+            layout = self.resolve(os.path.dirname(page_dir), default)
+        self._resolved[page_dir] = layout
+        return layout
+
+    def _static_key(self, path, template, names, seen=()):
+        # The version a partial's cached output is valid for if it and the
+        # partials it includes only read site-wide variables, else None. It
+        # holds the compiled templates, which load() replaces when a file is
+        # modified.
+        if not template.names <= self.site.keys():
+            return None
+        names.update(template.names)
+        key = [(path, template)]
+        for name in template.includes:
+            nested = os.path.join(self.partials_dir, name)
+            if nested in seen:
+                return None
+            nested_key = self._static_key(nested, self.load(nested), names, seen + (nested,))
+            if nested_key is None:
+                return None
+            key.extend(nested_key)
+        return tuple(key)
+
+    def include(self, name, ctx):
+        path = os.path.join(self.partials_dir, name)
+        template = self.load(path)
+        names = set()
+        key = self._static_key(path, template, names, (path,))
+        # Page or loop variables may shadow site-wide ones.
+        if key is not None and any(ctx.get(var) is not self.site[var] for var in names):
+            key = None
+        if key is not None:
+            cached = self._static_partials.get(path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        self.partial_renders += 1
+        output = template.render(ctx, self.include)
+        if key is not None:
+            self._static_partials[path] = (key, output)
+        return output
+
+    def render(self, path, variables):
+        """Render the template at `path` with site and page variables.
+
+        Args:
+            path (str): Path of the template.
+            variables (dict): Page variables; they shadow site variables.
+
+        Returns:
+            str: The rendered output.
+        """
+        ctx = dict(self.site)
+        ctx.update(variables)
+        return self.load(path).render(ctx, self.include)
@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+
+from arena import DocumentArena, NO_NODE, node_tree_nbytes
+from bench_bytes_pipeline import BLOCKS
+from htmlnode import LeafNode, ParentNode
+from main import markdown_to_html_node
+
+class TestDocumentArena(unittest.TestCase):
+    def test_round_trip_html(self):
+        md = """
+# Heading with **bold**
+
+A paragraph with a [link](/blog) and an ![image](/images/tom.png)
+
+- one
+- _two_
+
+```
+code here
+```
+"""
+        node = markdown_to_html_node(md)
+        arena = DocumentArena.from_node(node)
+        self.assertEqual(arena.to_html(), node.to_html())
+        self.assertEqual(arena.to_node().to_html(), node.to_html())
+
+    def test_escaping_matches_nodes(self):
+        node = markdown_to_html_node('Is 1 < 2 & 3 > 2? ![a "quoted" alt](/a.png)\n\n```\n<b>not bold</b>\n```')
+        self.assertEqual(DocumentArena.from_node(node).to_html(), node.to_html())
+        self.assertIn('&lt;b&gt;not bold&lt;/b&gt;', node.to_html())
+
+    def test_structure_arrays(self):
+        node = ParentNode("p", [LeafNode(None, "a"), LeafNode("b", "bold"), LeafNode(None, "c")])
+        arena = DocumentArena.from_node(node)
+        self.assertEqual(len(arena), 4)
+        self.assertEqual(arena.parents[0], NO_NODE)
+        self.assertEqual(arena.children(0), [1, 2, 3])
+        self.assertEqual(arena.next_siblings[3], NO_NODE)
+        self.assertEqual(arena.value(2), "bold")
+        self.assertIsNone(arena.value(0))
+        self.assertEqual(arena.text, "aboldc")
+
+    def test_props_preserved(self):
+        node = ParentNode("div", [LeafNode("a", "x", {"href": "/y"})], {"class": "c"})
+        arena = DocumentArena.from_node(node)
+        self.assertEqual(arena.to_html(), '<div class="c"><a href="/y">x</a></div>')
+        self.assertEqual(arena.to_node().children[0].props, {"href": "/y"})
+
+    def test_deep_nesting(self):
+        arena = DocumentArena()
+        parent = NO_NODE
+        depth = 20000
+        for _ in range(depth):
+            parent = arena.add_node(parent, "div")
+        arena.add_node(parent, None, "deep")
+        html = arena.to_html()
+        self.assertEqual(html, "<div>" * depth + "deep" + "</div>" * depth)
+        self.assertEqual(DocumentArena.from_node(arena.to_node()).to_html(), html)
+
+    def test_empty_arena(self):
+        arena = DocumentArena()
+        self.assertEqual(arena.to_html(), "")
+        self.assertIsNone(arena.to_node())
+
+    def test_leaf_without_value(self):
+        with self.assertRaises(ValueError):
+            DocumentArena.from_node(ParentNode("p", [LeafNode("b", None)]))
+
+    def test_text_size_checked(self):
+        arena = DocumentArena()
+        root = arena.add_node(NO_NODE, "p")
+        arena.add_node(root, None, "abc")
+        with mock.patch('arena.MAX_TEXT_SIZE', 5):
+            with self.assertRaises(OverflowError):
+                arena.add_node(root, None, "def")
+
+    def test_add_after_conversion(self):
+        arena = DocumentArena.from_node(ParentNode("p", [LeafNode(None, "a"), LeafNode("b", "bold")]))
+        arena.add_node(0, None, "c")
+        self.assertEqual(arena.to_html(), "<p>a<b>bold</b>c</p>")
+
+    def test_smaller_than_node_tree(self):
+        node = markdown_to_html_node(''.join(BLOCKS[i % len(BLOCKS)] for i in range(200)))
+        arena = DocumentArena.from_node(node)
+        self.assertLess(arena.nbytes() * 6, node_tree_nbytes(node))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from build_cache import ENTRY_SUFFIX, RenderCache, decode_node, encode_node
+from filesystem import MemoryFileSystem
+from highlight import HighlightedCode
+from main import build_site, markdown_to_html_node
+
+MARKDOWN = "# Title\n\nSome **bold** [link](/a) ![img](/b.png)\n\n```python\nreturn None\n```"
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.parses = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def parse(self, markdown):
+        self.parses += 1
+        return markdown_to_html_node(markdown)
+
+    def test_encode_round_trip(self):
+        node = markdown_to_html_node(MARKDOWN)
+        decoded = decode_node(encode_node(node))
+        self.assertEqual(decoded.to_html(), node.to_html())
+        self.assertIsInstance(decoded.children[-1].children[0], HighlightedCode)
+
+    def test_hit_from_another_runner(self):
+        first = RenderCache(self.tmp)
+        first.node(MARKDOWN, self.parse)
+        second = RenderCache(self.tmp)
+        node = second.node(MARKDOWN, self.parse)
+        self.assertEqual(self.parses, 1)
+        self.assertEqual((second.hits, second.misses), (1, 0))
+        self.assertEqual(node.to_html(), markdown_to_html_node(MARKDOWN).to_html())
+        self.assertIsNot(second.node(MARKDOWN, self.parse), node)
+
+    def test_key_includes_parser(self):
+        cache = RenderCache(self.tmp)
+        key = cache.key(MARKDOWN)
+        cache.salt += b'changed'
+        self.assertNotEqual(cache.key(MARKDOWN), key)
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = RenderCache(self.tmp)
+        cache.node(MARKDOWN, self.parse)
+        [(_, _, path)] = cache.entries()
+        with open(path, 'wb') as file:
+            file.write(b'garbage')
+        cache.node(MARKDOWN, self.parse)
+        self.assertEqual(self.parses, 2)
+        self.assertEqual(cache.misses, 2)
+
+    def test_no_temporary_files_left(self):
+        cache = RenderCache(self.tmp)
+        cache.node(MARKDOWN, self.parse)
+        names = [name for _, _, files in os.walk(self.tmp) for name in files]
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].endswith(ENTRY_SUFFIX))
+
+    def test_prune_least_recently_used(self):
+        cache = RenderCache(self.tmp)
+        for i in range(3):
+            cache.node(f"# Page {i}\n\n" + "text " * 200, self.parse)
+        entries = cache.entries()
+        for age, (_, _, path) in enumerate(entries):
+            os.utime(path, ns=(age * 10 ** 9, age * 10 ** 9))
+        os.utime(entries[0][2], ns=(10 ** 12, 10 ** 12))
+        cache.max_bytes = entries[0][1] + entries[1][1] + 1
+        cache.prune()
+        remaining = {path for _, _, path in cache.entries()}
+        self.assertEqual(cache.pruned, 1)
+        self.assertEqual(remaining, {entries[0][2], entries[2][2]})
+
+    def test_build_site(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('content')
+        fs.write_text('template.html', '{{ Title }}{{ Content }}')
+        fs.write_text('content/index.md', MARKDOWN)
+        build_site('/', fs=fs)
+        expected = fs.read_text('docs/index.html')
+        build_site('/', fs=fs, render_cache=RenderCache(self.tmp))
+        cache = RenderCache(self.tmp)
+        context = build_site('/', fs=fs, render_cache=cache)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(fs.read_text('docs/index.html'), expected)
+        self.assertIn('Render cache', dict(context.summary))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from build_context import Page
+from build_history import (STAGES, BuildHistory, Stopwatch, connect, count_nodes, growth, slowest_pages,
+                           stage_breakdown)
+from filesystem import MemoryFileSystem
+from main import build_site, main, markdown_to_html_node
+
+class TestBuildHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'history.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def page(self, source, render_ms, markdown='# Title\n\nSome *text*.'):
+        node = markdown_to_html_node(markdown)
+        timings = {stage: render_ms / len(STAGES) / 1000 for stage in STAGES}
+        return Page(source, 'docs/x.html', '/x.html', markdown, 'Title', node, '<html></html>', timings=timings)
+
+    def record(self, history, *pages):
+        for page in pages:
+            history.add_page(page, None)
+        return history.record(0.5)
+
+    def test_stopwatch(self):
+        stopwatch = Stopwatch()
+        stopwatch.lap('read')
+        stopwatch.lap('parse')
+        stopwatch.lap('read')
+        self.assertEqual(list(stopwatch.laps), ['read', 'parse'])
+        self.assertTrue(all(seconds >= 0 for seconds in stopwatch.laps.values()))
+
+    def test_count_nodes(self):
+        node = markdown_to_html_node('# Title\n\nSome *text* and `code`.\n\n- one\n- two')
+        self.assertEqual(count_nodes(node), (3, 8))
+
+    def test_retention(self):
+        history = BuildHistory(self.path, keep=2)
+        for render_ms in (1, 2, 3):
+            build_id = self.record(history, self.page('a.md', render_ms))
+        self.assertEqual(build_id, 3)
+        connection = connect(self.path)
+        self.assertEqual(connection.execute("SELECT id FROM builds").fetchall(), [(2,), (3,)])
+        self.assertEqual(connection.execute("SELECT COUNT(*) FROM pages").fetchone(), (2,))
+        connection.close()
+
+    def test_queries(self):
+        history = BuildHistory(self.path)
+        self.record(history, self.page('a.md', 8), self.page('b.md', 2))
+        self.record(history, self.page('a.md', 8), self.page('b.md', 10, markdown='# Longer\n\n' + 'word ' * 50))
+        self.record(history, self.page('c.md', 1))
+        connection = connect(self.path)
+        slowest = slowest_pages(connection, builds=3)
+        self.assertEqual([row[0] for row in slowest], ['a.md', 'b.md', 'c.md'])
+        self.assertAlmostEqual(slowest[1][2], 6)
+        self.assertEqual(slowest[1][4], len('# Longer\n\n' + 'word ' * 50))
+        trends = growth(connection, builds=3)
+        self.assertEqual([row[0] for row in trends], ['b.md', 'a.md'])
+        self.assertAlmostEqual(trends[0][2] - trends[0][1], 8)
+        self.assertEqual(len(slowest_pages(connection, builds=1)), 1)
+        self.assertAlmostEqual(sum(stage_breakdown(connection, builds=3).values()), 29)
+        connection.close()
+
+    def test_build_site_and_stats(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('content/blog')
+        fs.write_text('template.html', '{{ Title }}{{ Content }}')
+        fs.write_text('content/index.md', '# Home\n\nWelcome.')
+        fs.write_text('content/blog/post.md', '# Post\n\nText.')
+        context = build_site('/', fs=fs, history=BuildHistory(self.path))
+        self.assertIn('Build history', dict(context.summary))
+        build_site('/', fs=fs, history=BuildHistory(self.path))
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(['stats', '--db', self.path, '--builds', '5'])
+        report = output.getvalue()
+        self.assertIn('Last 2 builds', report)
+        self.assertIn('content/blog/post.md', report)
+        self.assertIn('Time by stage', report)
+
+    def test_stats_without_history(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main(['stats', '--db', self.path])
+        self.assertIn('No build history', output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from bytes_pipeline import extract_title_bytes, iter_blocks, map_source
+from link_checker import LinkChecker
+from main import build_site, generate_page, generate_page_streaming
+from markdown_blocks import extract_title, markdown_to_blocks
+
+MARKDOWN = """# Tolkien's **legendarium**
+
+Intro with a [link](/blog/tom) and an ![image](/images/tom.png)
+
+
+
+> "Old Tom Bombadil"
+> is a merry fellow
+
+- one
+- two
+
+```
+code — with ünïcode
+```
+"""
+
+class TestBytesPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def path(self, name):
+        return os.path.join(self.tmp, name)
+
+    def write(self, name, text):
+        with open(self.path(name), 'w') as file:
+            file.write(text)
+
+    def test_blocks_match_str_pipeline(self):
+        data = MARKDOWN.encode('utf-8')
+        self.assertEqual(list(iter_blocks(data)), markdown_to_blocks(MARKDOWN))
+        self.assertEqual(list(iter_blocks(b"")), [])
+        self.assertEqual(extract_title_bytes(data), extract_title(MARKDOWN))
+        self.assertEqual(extract_title_bytes(b"intro\n# Title\nmore"), "Title")
+        with self.assertRaises(Exception):
+            extract_title_bytes(b"no title")
+
+    def test_crlf_line_endings(self):
+        data = MARKDOWN.replace('\n', '\r\n').encode('utf-8')
+        self.assertEqual(list(iter_blocks(data)), markdown_to_blocks(MARKDOWN))
+        self.assertEqual(extract_title_bytes(data), extract_title(MARKDOWN))
+        self.assertEqual(list(iter_blocks(b"a\rb\r\rc\r\n\nd")), ["a\nb", "c", "d"])
+        self.assertEqual(extract_title_bytes(b"intro\r# Title\rmore"), "Title")
+
+    def test_map_source(self):
+        self.write('page.md', MARKDOWN)
+        self.write('empty.md', "")
+        with map_source(self.path('page.md')) as mapped:
+            self.assertEqual(list(iter_blocks(mapped)), markdown_to_blocks(MARKDOWN))
+        with map_source(self.path('empty.md')) as mapped:
+            self.assertEqual(len(mapped), 0)
+
+    def test_streaming_output_matches_generate_page(self):
+        self.write('template.html', "<title>{{ Title }}</title><a href=\"/\">home</a>{{ Content }}<img src=\"/x.png\">")
+        os.mkdir(self.path('out'))
+        for newline in ('\n', '\r\n'):
+            with open(self.path('page.md'), 'wb') as file:
+                file.write(MARKDOWN.replace('\n', newline).encode('utf-8'))
+            generate_page(self.path('page.md'), '/base/', self.path('template.html'), self.path('out/str.html'))
+            generate_page_streaming(self.path('page.md'), '/base/', self.path('template.html'),
+                                    self.path('out/bytes.html'))
+            with open(self.path('out/str.html'), 'rb') as expected, open(self.path('out/bytes.html'), 'rb') as actual:
+                self.assertEqual(actual.read(), expected.read(), repr(newline))
+
+class TestStreamedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        os.makedirs('content/blog/tom')
+        os.makedirs('static')
+        self.write('content/index.md', "# Home\n\n[Tom](/blog/tom) and [missing](/blog/missing)")
+        self.write('content/blog/tom/index.md', MARKDOWN)
+        self.write('template.html', "{{ Title }}{{ Content }}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def write(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def build(self, stream_threshold):
+        shutil.rmtree('docs', ignore_errors=True)
+        shutil.rmtree('.cache', ignore_errors=True)
+        context = build_site('/', stream_threshold=stream_threshold)
+        checker = next(o for o in context.observers if isinstance(o, LinkChecker))
+        search = {}
+        for name in sorted(os.listdir('docs/search')):
+            with open(os.path.join('docs/search', name), 'rb') as file:
+                search[name] = file.read()
+        return context.pages, checker.checked, checker.broken, search
+
+    def test_streamed_build_matches_str_build(self):
+        pages, checked, broken, search = self.build(stream_threshold=1)
+        self.assertEqual(pages, 2)
+        self.assertEqual(broken, {'/blog/tom/index.html': ['/images/tom.png'], '/index.html': ['/blog/missing']})
+        self.assertIn('terms-b.json', search)
+        self.assertEqual((pages, checked, broken, search), self.build(stream_threshold=None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from corpus import CorpusSpec, generate_corpus, page_path
+from filesystem import MemoryFileSystem
+from main import build_site
+
+def files(fs, root):
+    found = {}
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        for name in fs.listdir(path):
+            child = f"{path}/{name}"
+            if fs.isdir(child):
+                stack.append(child)
+            else:
+                found[child] = fs.read_text(child)
+    return found
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        spec = CorpusSpec(pages=30, seed=7)
+        first, second = MemoryFileSystem(), MemoryFileSystem()
+        self.assertEqual(generate_corpus('site', spec, fs=first), generate_corpus('site', spec, fs=second))
+        self.assertEqual(files(first, 'site'), files(second, 'site'))
+        other = MemoryFileSystem()
+        generate_corpus('site', CorpusSpec(pages=30, seed=8), fs=other)
+        self.assertNotEqual(files(first, 'site'), files(other, 'site'))
+
+    def test_shape(self):
+        fs = MemoryFileSystem()
+        generate_corpus('site', CorpusSpec(pages=20, depth=3, fanout=2, block_mix={'code': 1}, size_sigma=0, mean_blocks=4), fs=fs)
+        pages = {path: text for path, text in files(fs, 'site/content').items()}
+        self.assertEqual(len(pages), 20)
+        self.assertIn('site/content/section-1/section-0/section-1/page-5.md', pages)
+        for text in pages.values():
+            self.assertEqual(text.count('```'), 8)
+        self.assertEqual(page_path(5, 3, 2), (['section-1', 'section-0', 'section-1'], 'page-5'))
+
+    def test_links_resolve(self):
+        fs = MemoryFileSystem()
+        generate_corpus('.', CorpusSpec(pages=40, link_density=2, depth=1), fs=fs)
+        context = build_site('/', fs=fs)
+        checker = next(o for o in context.observers if type(o).__name__ == 'LinkChecker')
+        self.assertGreater(checker.checked, 0)
+        self.assertEqual(checker.broken, {})
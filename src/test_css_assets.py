@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from build_context import BuildContext
+from css_assets import CssBundle, critical_css, document_selectors, minify_css, split_rules
+from filesystem import ArchiveFileSystem, MemoryFileSystem
+from main import build_site
+
+STYLESHEET = """
+/* site theme */
+body {
+    color: #fff;
+    font-family: "Open  Sans", serif;
+}
+
+h1, .card > p:hover, #main {
+    margin : 0 ;
+}
+
+@media (max-width: 600px) {
+    h1 { font-size: 2em; }
+    table td { padding: 0; }
+}
+
+@keyframes fade { from { opacity: 0; } to { opacity: 1; } }
+"""
+
+class TestMinifyCss(unittest.TestCase):
+    def test_minify(self):
+        self.assertEqual(
+            minify_css(STYLESHEET),
+            'body{color:#fff;font-family:"Open  Sans",serif}h1,.card>p:hover,#main{margin :0}'
+            '@media (max-width:600px){h1{font-size:2em}table td{padding:0}}'
+            '@keyframes fade{from{opacity:0}to{opacity:1}}',
+        )
+
+    def test_strings_and_comments(self):
+        self.assertEqual(minify_css('a::after { content: "/* ; } */"; }'), 'a::after{content:"/* ; } */"}')
+        self.assertEqual(minify_css('a /* x */ b { color: red }'), 'a b{color:red}')
+
+    def test_split_rules(self):
+        self.assertEqual(
+            split_rules('@import "a.css";a{b:c}@media x{d{e:f}}'),
+            [('@import "a.css"', None), ('a', 'b:c'), ('@media x', 'd{e:f}')],
+        )
+
+class TestCriticalCss(unittest.TestCase):
+    def test_selects_rules_for_document(self):
+        tags, classes, ids = document_selectors('<html><body class="dark"><h1 id="main">x</h1></body></html>')
+        self.assertEqual((tags, classes, ids), ({'html', 'body', 'h1'}, {'dark'}, {'main'}))
+        self.assertEqual(
+            critical_css(minify_css(STYLESHEET), tags, classes, ids),
+            'body{color:#fff;font-family:"Open  Sans",serif}h1,#main{margin :0}'
+            '@media (max-width:600px){h1{font-size:2em}}',
+        )
+
+    def test_classes_must_be_present(self):
+        self.assertEqual(critical_css('.card>p{a:b}', {'p'}, {'card'}), '.card>p{a:b}')
+        self.assertEqual(critical_css('.card>p{a:b}', {'p'}), '')
+
+class TestCssBundle(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('static')
+        self.fs.makedirs('docs')
+        self.fs.write_text('static/a.css', 'body { color: red; }\n')
+        self.fs.write_text('static/b.css', 'table td { padding: 0; }\n')
+        self.fs.write_text('template.html', (
+            '<head><link href="/a.css" rel="stylesheet" /><link href="/b.css" rel="stylesheet" />'
+            '<link href="https://cdn.example/x.css" rel="stylesheet" /></head><body>{{ Content }}</body>'
+        ))
+
+    def build(self, critical):
+        context = BuildContext(fs=self.fs, content_root='content', dest_root='docs')
+        bundle = CssBundle('static', critical=critical)
+        bundle.build(context)
+        return context, bundle
+
+    def test_bundle_and_link_rewrite(self):
+        context, bundle = self.build(critical=False)
+        self.assertEqual(self.fs.read_text('docs/bundle.css'), 'body{color:red}\ntable td{padding:0}')
+        self.assertFalse(self.fs.exists('docs/a.css'))
+        self.assertIn('/bundle.css', context.outputs)
+        self.assertEqual(
+            context.templates.render('template.html', {'Content': 'x'}),
+            '<head><link href="/bundle.css" rel="stylesheet" />'
+            '<link href="https://cdn.example/x.css" rel="stylesheet" /></head><body>x</body>',
+        )
+        self.assertTrue(bundle.summary().startswith('2 files bundled'))
+
+    def test_critical_inlined(self):
+        context, bundle = self.build(critical=True)
+        html = context.templates.render('template.html', {'Content': 'x'})
+        self.assertTrue(html.startswith('<head><style>body{color:red}</style><link href="/bundle.css" rel="preload"'))
+        self.assertIn('<noscript><link href="/bundle.css" rel="stylesheet" /></noscript>', html)
+        self.assertNotIn('td{', html)
+        self.assertEqual(bundle.inlined_bytes, len('body{color:red}'))
+
+    def add_page(self):
+        self.fs.makedirs('content')
+        self.fs.write_text('content/index.md', '# Home\n\nWelcome')
+
+    def test_build_site_reports_inlined_css(self):
+        self.add_page()
+        context = build_site('/', fs=self.fs, critical_css=True)
+        self.assertIn(f"{len('body{color:red}')} bytes of critical CSS inlined", dict(context.summary)['CSS'])
+
+    def test_archive_has_only_the_bundle(self):
+        self.add_page()
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        archive_path = os.path.join(tmp, 'site.zip')
+        with ArchiveFileSystem(archive_path, 'docs', base=self.fs) as fs:
+            build_site('/', fs=fs)
+        with zipfile.ZipFile(archive_path) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), len(set(names)))
+            self.assertNotIn('a.css', names)
+            self.assertEqual(archive.read('bundle.css'), b'body{color:red}\ntable td{padding:0}')
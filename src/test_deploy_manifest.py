@@ -0,0 +1,67 @@
+import json
+import unittest
+
+from deploy_manifest import DeployManifest, public_urls
+from filesystem import MemoryFileSystem
+from main import build_site
+from page_schedule import PageSchedule
+
+class TestPublicUrls(unittest.TestCase):
+    def test_urls(self):
+        self.assertEqual(public_urls('index.html', '/'), ['/index.html', '/'])
+        self.assertEqual(public_urls('blog/tom/index.html', '/site'), ['/site/blog/tom/index.html', '/site/blog/tom/'])
+        self.assertEqual(public_urls('index.css', '/site/'), ['/site/index.css'])
+
+class TestDeployManifest(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('content/blog')
+        self.fs.makedirs('content/old')
+        self.fs.makedirs('static')
+        self.fs.write_text('template.html', '<title>{{ Title }}</title>{{ Content }}')
+        self.fs.write_text('static/index.css', 'body { color: red; }')
+        self.fs.write_text('content/index.md', '# Home\n\nWelcome')
+        self.fs.write_text('content/blog/index.md', '# Blog\n\nPosts')
+        self.fs.write_text('content/old/index.md', '# Old\n\nGone soon')
+
+    def manifest(self):
+        return json.loads(self.fs.read_text('.cache/deploy-manifest.json'))
+
+    def test_first_build_adds_everything(self):
+        context = build_site('/site/', fs=self.fs)
+        manifest = self.manifest()
+        added = {entry['path'] for entry in manifest['added']}
+        self.assertEqual(added, {url.lstrip('/') for url in context.outputs})
+        self.assertEqual(manifest['modified'], [])
+        self.assertEqual(manifest['files'].keys(), added)
+
+    def test_changes_between_builds(self):
+        build_site('/site/', fs=self.fs)
+        self.fs.write_text('content/blog/index.md', '# Blog\n\nNew posts')
+        self.fs.rmtree('content/old')
+        build_site('/site/', fs=self.fs)
+        manifest = self.manifest()
+        modified = [entry['path'] for entry in manifest['modified']]
+        self.assertIn('blog/index.html', modified)
+        self.assertNotIn('index.html', modified)
+        self.assertNotIn('index.css', modified)
+        [blog] = [entry for entry in manifest['modified'] if entry['path'] == 'blog/index.html']
+        self.assertEqual(blog['urls'], ['/site/blog/index.html', '/site/blog/'])
+        self.assertNotEqual(blog['sha256'], blog['previous_sha256'])
+        removed = [entry['path'] for entry in manifest['removed']]
+        self.assertIn('old/index.html', removed)
+
+    def test_page_deleted_before_progressive_build(self):
+        build_site('/site/', fs=self.fs)
+        self.fs.rmtree('content/old')
+        build_site('/site/', fs=self.fs, schedule=PageSchedule())
+        self.assertFalse(self.fs.exists('docs/old/index.html'))
+        manifest = self.manifest()
+        self.assertIn('old/index.html', [entry['path'] for entry in manifest['removed']])
+        self.assertNotIn('old/index.html', manifest['files'])
+
+    def test_compare(self):
+        manifest = DeployManifest('/', 'm.json').compare({'a': '1', 'b': '2'}, {'b': '3', 'c': '4'})
+        self.assertEqual([e['path'] for e in manifest['added']], ['c'])
+        self.assertEqual([e['path'] for e in manifest['modified']], ['b'])
+        self.assertEqual([e['path'] for e in manifest['removed']], ['a'])
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from filesystem import ArchiveFileSystem, AtomicFileSystem, HashingFileSystem, LocalFileSystem, MemoryFileSystem
+from main import copy_directory, generate_pages_recursive
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main><a href=\"/x\">x</a>"
+
+def make_site(fs):
+    fs.makedirs('content/blog')
+    fs.makedirs('static/images')
+    fs.write_text('content/index.md', "# Home\n\nWelcome")
+    fs.write_text('content/blog/index.md', "# Blog\n\nA **post**")
+    fs.write_text('static/index.css', "body {}")
+    fs.write_bytes('static/images/a.png', b'\x89PNG')
+    fs.write_text('template.html', TEMPLATE)
+
+class TestMemoryFileSystem(unittest.TestCase):
+    def test_build_in_memory(self):
+        fs = MemoryFileSystem()
+        make_site(fs)
+        copy_directory('static', 'docs', fs=fs)
+        generate_pages_recursive('content', '/base/', 'template.html', 'docs', fs=fs)
+        self.assertEqual(fs.read_bytes('docs/images/a.png'), b'\x89PNG')
+        self.assertEqual(
+            fs.read_text('docs/blog/index.html'),
+            "<title>Blog</title><main><div><h1>Blog</h1><p>A <b>post</b></p></div></main><a href=\"/base/x\">x</a>",
+        )
+        self.assertEqual(sorted(fs.listdir('docs')), ['blog', 'images', 'index.css', 'index.html'])
+
+    def test_rmtree_and_missing(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('a/b')
+        fs.write_text('a/b/c.txt', "c")
+        fs.rmtree('a')
+        self.assertFalse(fs.exists('a/b/c.txt'))
+        self.assertFalse(fs.isdir('a'))
+        with self.assertRaises(FileNotFoundError):
+            fs.read_text('a/b/c.txt')
+        with self.assertRaises(FileNotFoundError):
+            fs.write_text('missing/file.txt', "x")
+
+    def test_read_through_base(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'source.md'), 'w') as file:
+                file.write("# Disk")
+            os.mkdir(os.path.join(tmp, 'out'))
+            fs = MemoryFileSystem(base=LocalFileSystem())
+            self.assertEqual(fs.read_text(os.path.join(tmp, 'source.md')), "# Disk")
+            fs.rmtree(os.path.join(tmp, 'out'))
+            fs.mkdir(os.path.join(tmp, 'out'))
+            fs.write_text(os.path.join(tmp, 'out', 'page.html'), "<p></p>")
+            self.assertEqual(fs.listdir(os.path.join(tmp, 'out')), ['page.html'])
+            self.assertTrue(os.path.isdir(os.path.join(tmp, 'out')))
+            self.assertEqual(os.listdir(os.path.join(tmp, 'out')), [])
+
+    def test_remove(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'old.html'), 'w') as file:
+                file.write("old")
+            fs = MemoryFileSystem(base=LocalFileSystem())
+            fs.write_text(os.path.join(tmp, 'new.html'), "new")
+            fs.remove(os.path.join(tmp, 'old.html'))
+            fs.remove(os.path.join(tmp, 'new.html'))
+            self.assertEqual(fs.listdir(tmp), [])
+            self.assertTrue(os.path.exists(os.path.join(tmp, 'old.html')))
+            with self.assertRaises(FileNotFoundError):
+                fs.remove(os.path.join(tmp, 'new.html'))
+
+class TestWriteChunks(unittest.TestCase):
+    CHUNKS = ['<p>', 'ünïcode', '</p>\n']
+
+    def test_backends(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for fs in (LocalFileSystem(), AtomicFileSystem(), MemoryFileSystem()):
+                path = os.path.join(tmp, f'{type(fs).__name__}.html')
+                if isinstance(fs, MemoryFileSystem):
+                    fs.makedirs(tmp)
+                fs.write_chunks(path, iter(self.CHUNKS))
+                self.assertEqual(fs.read_bytes(path), ''.join(self.CHUNKS).encode('utf-8'), type(fs).__name__)
+
+    def test_archives(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('site.tar', 'site.zip'):
+                with ArchiveFileSystem(os.path.join(tmp, name), 'docs') as fs:
+                    fs.write_chunks('docs/index.html', iter(self.CHUNKS))
+                if name.endswith('.zip'):
+                    with zipfile.ZipFile(os.path.join(tmp, name)) as archive:
+                        data = archive.read('index.html')
+                else:
+                    with tarfile.open(os.path.join(tmp, name)) as tar:
+                        data = tar.extractfile('index.html').read()
+                self.assertEqual(data, ''.join(self.CHUNKS).encode('utf-8'), name)
+
+    def test_hashing(self):
+        hashes = {}
+        base = MemoryFileSystem()
+        base.makedirs('docs')
+        fs = HashingFileSystem(base, 'docs', lambda path, digest: hashes.__setitem__(path, digest))
+        fs.write_chunks('docs/index.html', iter(self.CHUNKS))
+        self.assertEqual(hashes['docs/index.html'], hashlib.sha256(base.read_bytes('docs/index.html')).hexdigest())
+
+class TestAtomicFileSystem(unittest.TestCase):
+    def test_replace_in_place(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'page.html')
+            fs = AtomicFileSystem()
+            fs.write_text(path, "old")
+            before = os.stat(path).st_ino
+            fs.write_text(path, "new")
+            self.assertEqual(fs.read_text(path), "new")
+            self.assertNotEqual(os.stat(path).st_ino, before)
+            self.assertEqual(os.stat(path).st_mode & 0o777, fs.mode)
+            self.assertEqual(os.listdir(tmp), ['page.html'])
+
+class TestArchiveFileSystem(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        make_site(LocalFileSystem())
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def build(self, archive_path):
+        with ArchiveFileSystem(archive_path, 'docs') as fs:
+            copy_directory('static', 'docs', fs=fs)
+            generate_pages_recursive('content', '/', 'template.html', 'docs', fs=fs)
+        self.assertFalse(os.path.exists('docs'))
+
+    def test_tar_archive(self):
+        self.build('site.tar.gz')
+        with tarfile.open('site.tar.gz') as tar:
+            self.assertEqual(
+                sorted(tar.getnames()),
+                ['blog/index.html', 'images/a.png', 'index.css', 'index.html'],
+            )
+            self.assertIn(b"<h1>Home</h1>", tar.extractfile('index.html').read())
+
+    def test_zip_archive(self):
+        self.build('site.zip')
+        with zipfile.ZipFile('site.zip') as archive:
+            self.assertEqual(archive.read('images/a.png'), b'\x89PNG')
+            self.assertIn(b"<b>post</b>", archive.read('blog/index.html'))
+
+class TestHashingFileSystem(unittest.TestCase):
+    def test_records_writes_under_root(self):
+        base = MemoryFileSystem()
+        make_site(base)
+        hashes = {}
+        fs = HashingFileSystem(base, 'docs', lambda path, digest: hashes.__setitem__(path, digest))
+        copy_directory('static', 'docs', fs=fs)
+        fs.write_text('template.html', '{}')
+        self.assertEqual(sorted(hashes), ['docs/images/a.png', 'docs/index.css'])
+        self.assertEqual(hashes['docs/images/a.png'], hashlib.sha256(b'\x89PNG').hexdigest())
+        self.assertEqual(base.read_text('template.html'), '{}')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from highlight import Highlighter, PYTHON, JSON, BASH, tokenize
+from html_minify import HtmlMinifier
+from main import markdown_to_html_node
+from search_index import collect_text
+
+class TestTokenize(unittest.TestCase):
+    def kinds(self, code, lexer):
+        return [(kind, text) for kind, text in tokenize(code, lexer) if kind is not None]
+
+    def test_python(self):
+        self.assertEqual(self.kinds('def f(x):  # note\n    return "a" + str(10)', PYTHON), [
+            ('keyword', 'def'), ('function', 'f'), ('comment', '# note'), ('keyword', 'return'),
+            ('string', '"a"'), ('builtin', 'str'), ('number', '10'),
+        ])
+
+    def test_python_triple_quoted(self):
+        self.assertEqual(self.kinds('x = """a\n# not a comment"""', PYTHON), [('string', '"""a\n# not a comment"""')])
+
+    def test_json(self):
+        self.assertEqual(self.kinds('{"a": ["b", 1.5, null]}', JSON), [
+            ('key', '"a"'), ('string', '"b"'), ('number', '1.5'), ('keyword', 'null'),
+        ])
+
+    def test_bash(self):
+        self.assertEqual(self.kinds('echo $HOME#x # note', BASH), [
+            ('builtin', 'echo'), ('variable', '$HOME'), ('comment', '# note'),
+        ])
+
+    def test_tokens_cover_code(self):
+        code = 'for i in range(3):\n    print(i, "x")\n'
+        self.assertEqual(''.join(text for _, text in tokenize(code, PYTHON)), code)
+
+class TestHighlighter(unittest.TestCase):
+    def test_cached_by_language_and_code(self):
+        highlighter = Highlighter()
+        first = highlighter.code_node('x = 1\n', 'python')
+        self.assertIs(highlighter.code_node('x = 1\n', 'python'), first)
+        self.assertIsNot(highlighter.code_node('x = 1\n', 'py'), first)
+        self.assertEqual((highlighter.hits, highlighter.misses), (1, 2))
+        self.assertIsNone(highlighter.code_node('x = 1\n', 'cobol'))
+
+    def test_code_block(self):
+        html = markdown_to_html_node('```python\nreturn None\n```').to_html()
+        self.assertEqual(html, '<div><pre><code class="language-python"><span class="tok-keyword">return</span> '
+                               '<span class="tok-keyword">None</span>\n</code></pre></div>')
+
+    def test_unsupported_language(self):
+        html = markdown_to_html_node('```cobol\nDISPLAY "HI"\n```').to_html()
+        self.assertEqual(html, '<div><pre><code class="language-cobol">DISPLAY "HI"\n</code></pre></div>')
+
+    def test_minified_and_indexed(self):
+        node = markdown_to_html_node('```python\nif  x:\n    pass\n```')
+        self.assertIn('<span class="tok-keyword">if</span>  x:\n    <span', node.to_html(HtmlMinifier()))
+        self.assertEqual(''.join(text for text, _ in collect_text(node)), 'if  x:\n    pass\n')
+
+if __name__ == '__main__':
+    unittest.main()
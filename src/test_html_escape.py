@@ -0,0 +1,20 @@
+import unittest
+
+from html_escape import escape_attribute, escape_text
+
+class TestHtmlEscape(unittest.TestCase):
+    def test_text(self):
+        self.assertEqual(escape_text('a < b & c > "d"'), 'a &lt; b &amp; c &gt; "d"')
+        self.assertEqual(escape_text('&lt;'), '&amp;lt;')
+
+    def test_attribute(self):
+        self.assertEqual(escape_attribute('say "hi" & <go>'), 'say &quot;hi&quot; &amp; &lt;go&gt;')
+        self.assertEqual(escape_attribute("it's"), "it's")
+
+    def test_fast_path_returns_value(self):
+        value = 'nothing to escape here'
+        self.assertIs(escape_text(value), value)
+        self.assertIs(escape_attribute(value), value)
+
+if __name__ == '__main__':
+    unittest.main()
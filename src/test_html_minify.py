@@ -0,0 +1,67 @@
+import unittest
+
+from html_minify import HtmlMinifier, unquoted_safe
+from htmlnode import LeafNode, ParentNode
+from main import rebase_links
+from templates import Markup, TemplateLoader
+from filesystem import MemoryFileSystem
+
+class TestMinifiedSerialization(unittest.TestCase):
+    def test_whitespace_and_quotes(self):
+        node = ParentNode('p', [
+            LeafNode(None, 'Some\n   text '),
+            LeafNode('a', 'a  link', {'href': '/blog/tom', 'title': 'Two words'}),
+            LeafNode('code', 'x  =\n 1'),
+        ], {'class': 'intro'})
+        minifier = HtmlMinifier()
+        self.assertEqual(
+            node.to_html(minifier),
+            '<p class=intro>Some text <a href=/blog/tom title="Two words">a link</a><code>x  =\n 1</code></p>',
+        )
+        self.assertEqual(minifier.saved, 3 + 1 + 2 + 2)
+
+    def test_pre_is_untouched(self):
+        node = ParentNode('pre', [ParentNode('code', [LeafNode(None, 'def f():\n    return 1\n')])])
+        self.assertEqual(node.to_html(HtmlMinifier()), node.to_html())
+
+    def test_plain_mode_unchanged(self):
+        node = ParentNode('p', [LeafNode('a', 'x  y', {'href': '/a'})])
+        self.assertEqual(node.to_html(), '<p><a href="/a">x  y</a></p>')
+
+    def test_escaping(self):
+        node = ParentNode('p', [
+            LeafNode(None, 'a  <b>'),
+            LeafNode('a', 'x', {'href': '/s?a=1&b=2', 'title': 'say "hi"'}),
+        ])
+        self.assertEqual(node.to_html(HtmlMinifier()),
+                         '<p>a &lt;b&gt;<a href="/s?a=1&amp;b=2" title="say &quot;hi&quot;">x</a></p>')
+
+    def test_unquoted_safe(self):
+        self.assertTrue(unquoted_safe('/images/a.png'))
+        for value in ('', 'a b', 'a=b', "it's", 'a"b', 'a>b', 'a`b'):
+            self.assertFalse(unquoted_safe(value), value)
+
+class TestMinifiedTemplates(unittest.TestCase):
+    def test_template_filter(self):
+        fs = MemoryFileSystem()
+        fs.write_text('template.html', (
+            '<!doctype html>\n<html>\n  <head>\n    <!-- comment -->\n    <title>{{ Title }}</title>\n'
+            '    <link href="/index.css" rel="stylesheet" />\n  </head>\n  <body>\n'
+            '    <a href="{{ url }}">go   <b>now</b></a>\n    <pre>  keep\n  this </pre>\n'
+            '    <article>{{ Content }}</article>\n  </body>\n</html>\n'
+        ))
+        loader = TemplateLoader(fs)
+        minifier = HtmlMinifier()
+        loader.add_source_filter(minifier.template, 'minify')
+        html = loader.render('template.html', {'Title': 'T', 'url': '/x', 'Content': Markup('<p>c</p>')})
+        self.assertEqual(html, (
+            '<!doctype html><html><head><title>T</title><link href=/index.css rel=stylesheet /></head>'
+            '<body><a href="/x">go <b>now</b></a><pre>  keep\n  this </pre><article><p>c</p></article></body></html>'
+        ))
+        self.assertGreater(minifier.template_saved, 0)
+
+    def test_rebase_links(self):
+        self.assertEqual(
+            rebase_links('<a href=/a>x</a><img src="/b.png">', '/site/'),
+            '<a href=/site/a>x</a><img src="/site/b.png">',
+        )
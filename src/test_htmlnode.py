@@ -1,5 +1,6 @@
 import unittest
 
+from html_minify import HtmlMinifier
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
 class TestHTMLNode(unittest.TestCase):
@@ -41,6 +42,18 @@ class TestHTMLNode(unittest.TestCase):
         node = LeafNode(None, "Hello")
         self.assertEqual(node.to_html(), "Hello")
 
+    def test_leaf_to_html_escapes(self):
+        node = LeafNode("code", "if a < b && c > d: print(\"x\")")
+        self.assertEqual(node.to_html(), "<code>if a &lt; b &amp;&amp; c &gt; d: print(\"x\")</code>")
+        node = LeafNode("img", "", {"src": "/a.png?x=1&y=2", "alt": "The \"One\" <Ring>"})
+        self.assertEqual(node.to_html(),
+                         "<img src=\"/a.png?x=1&amp;y=2\" alt=\"The &quot;One&quot; &lt;Ring&gt;\"></img>")
+
+    def test_non_str_prop_values(self):
+        node = LeafNode("td", "x", {"colspan": 2, "hidden": True})
+        self.assertEqual(node.to_html(), "<td colspan=\"2\" hidden=\"True\">x</td>")
+        self.assertEqual(node.to_html(HtmlMinifier()), "<td colspan=2 hidden=True>x</td>")
+
     def test_to_html_with_children(self):
         child_node = LeafNode("span", "child")
         parent_node = ParentNode("div", [child_node])
@@ -0,0 +1,83 @@
+import io
+import struct
+import unittest
+
+from filesystem import MemoryFileSystem
+from image_index import ImageIndex, read_image_size
+from main import markdown_to_html_node
+
+def png(width, height, padding=0):
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\x00' * (5 + padding)
+
+def gif(width, height):
+    return b'GIF89a' + struct.pack('<HH', width, height) + b'\x00' * 20
+
+def jpeg(width, height):
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+    sof = b'\xff\xc0' + struct.pack('>HBHH', 17, 8, height, width) + b'\x00' * 10
+    return b'\xff\xd8' + app0 + sof + b'\xff\xd9'
+
+def webp(chunk, payload):
+    data = chunk + struct.pack('<I', len(payload)) + payload
+    return b'RIFF' + struct.pack('<I', len(data) + 4) + b'WEBP' + data
+
+class TestReadImageSize(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(read_image_size(io.BytesIO(png(928, 468))), ('png', 928, 468))
+        self.assertEqual(read_image_size(io.BytesIO(gif(10, 20))), ('gif', 10, 20))
+        self.assertEqual(read_image_size(io.BytesIO(jpeg(640, 480))), ('jpeg', 640, 480))
+        lossy = b'\x00' * 3 + b'\x9d\x01\x2a' + struct.pack('<HH', 300, 200) + b'\x00' * 4
+        self.assertEqual(read_image_size(io.BytesIO(webp(b'VP8 ', lossy))), ('webp', 300, 200))
+        bits = (300 - 1) | ((200 - 1) << 14)
+        lossless = b'\x2f' + bits.to_bytes(4, 'little') + b'\x00' * 8
+        self.assertEqual(read_image_size(io.BytesIO(webp(b'VP8L', lossless))), ('webp', 300, 200))
+        extended = b'\x00' * 4 + (299).to_bytes(3, 'little') + (199).to_bytes(3, 'little') + b'\x00' * 4
+        self.assertEqual(read_image_size(io.BytesIO(webp(b'VP8X', extended))), ('webp', 300, 200))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(read_image_size(io.BytesIO(b'not an image')))
+        self.assertIsNone(read_image_size(io.BytesIO(b'\xff\xd8\xff\xe0')))
+        self.assertIsNone(read_image_size(io.BytesIO(b'')))
+
+class TestImageIndex(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('static/images')
+        self.fs.write_bytes('static/images/big.png', png(928, 468, padding=4096))
+        self.fs.write_bytes('static/images/icon.gif', gif(16, 16))
+
+    def test_transform_adds_attributes(self):
+        index = ImageIndex('static')
+        node = markdown_to_html_node("![big](/images/big.png) ![icon](../images/icon.gif) ![ext](https://a.b/c.png) ![gone](/x.png)")
+        index.transform(node, '/blog/index.html', self.fs)
+        big, icon, ext, gone = [c for c in node.children[0].children if c.tag == 'img']
+        self.assertEqual(big.props, {
+            'src': '/images/big.png', 'alt': 'big', 'width': '928', 'height': '468',
+            'loading': 'lazy', 'decoding': 'async',
+        })
+        self.assertTrue(icon.props['src'].startswith('data:image/gif;base64,'))
+        self.assertEqual((icon.props['width'], icon.props['height']), ('16', '16'))
+        self.assertEqual(ext.props, {'src': 'https://a.b/c.png', 'alt': 'ext'})
+        self.assertEqual(gone.props, {'src': '/x.png', 'alt': 'gone'})
+
+    def test_headers_read_once_and_cached_by_mtime(self):
+        index = ImageIndex('static', state_path='.cache/images.json')
+        for _ in range(3):
+            index.transform(markdown_to_html_node("![a](/images/big.png)"), '/index.html', self.fs)
+        self.assertEqual(index.reads, 1)
+        index.save(self.fs)
+
+        again = ImageIndex('static', state_path='.cache/images.json')
+        again.load(self.fs)
+        again.transform(markdown_to_html_node("![a](/images/big.png)"), '/index.html', self.fs)
+        self.assertEqual(again.reads, 0)
+        self.fs.write_bytes('static/images/big.png', png(100, 50, padding=4096))
+        changed = ImageIndex('static', state_path='.cache/images.json')
+        changed.load(self.fs)
+        node = markdown_to_html_node("![a](/images/big.png)")
+        changed.transform(node, '/index.html', self.fs)
+        self.assertEqual(changed.reads, 1)
+        self.assertEqual(node.children[0].children[0].props['width'], '100')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from build_context import BuildContext
+from filesystem import MemoryFileSystem
+from link_checker import LinkChecker, collect_targets, resolve_target
+from main import copy_directory, generate_pages_recursive, markdown_to_html_node
+
+class TestLinkChecker(unittest.TestCase):
+    def test_collect_targets(self):
+        node = markdown_to_html_node("[a](/one) and ![b](/img.png)\n\n- [c](two)")
+        self.assertEqual(collect_targets(node), ["/one", "/img.png", "two"])
+
+    def test_resolve_target(self):
+        page = "/blog/tom/index.html"
+        self.assertEqual(resolve_target("/contact", page), "/contact")
+        self.assertEqual(resolve_target("../majesty/", page), "/blog/majesty/")
+        self.assertEqual(resolve_target("pic.png?v=2#top", page), "/blog/tom/pic.png")
+        self.assertEqual(resolve_target("/", page), "/")
+        self.assertIsNone(resolve_target("https://boot.dev", page))
+        self.assertIsNone(resolve_target("#section", page))
+        self.assertIsNone(resolve_target("mailto:tom@example.com", page))
+
+    def test_broken_links_grouped_by_page(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('content/blog/tom')
+        fs.makedirs('static/images')
+        fs.write_bytes('static/images/tom.png', b'png')
+        fs.write_text('content/index.md', "# Home\n\n[Tom](/blog/tom) [Gone](/blog/gone) ![x](/images/tom.png)")
+        fs.write_text('content/blog/tom/index.md', "# Tom\n\n[Home](/) ![y](/images/missing.png) [ext](https://a.b)")
+        fs.write_text('template.html', "{{ Title }}{{ Content }}")
+        context = BuildContext(fs=fs)
+        checker = context.add_observer(LinkChecker())
+        copy_directory('static', 'docs', fs=fs, context=context)
+        generate_pages_recursive('content', '/', 'template.html', 'docs', fs=fs, context=context)
+        context.finish()
+        self.assertEqual(checker.broken, {
+            "/index.html": ["/blog/gone"],
+            "/blog/tom/index.html": ["/images/missing.png"],
+        })
+        self.assertEqual(checker.checked, 5)
+
+if __name__ == "__main__":
+    unittest.main()
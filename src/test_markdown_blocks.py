@@ -1,5 +1,5 @@
 import unittest
-from markdown_blocks import markdown_to_blocks, block_to_block_type, BlockType, extract_title
+from markdown_blocks import markdown_to_blocks, block_to_block_type, BlockType, extract_title, extract_codeblock_language, strip_codeblock_backticks
 
 
 class TestMarkdownBlocks(unittest.TestCase):
@@ -103,6 +103,13 @@ This is a paragraph"""
         with self.assertRaises(Exception):
             extract_title(markdown)
 
+    def test_codeblock_language(self):
+        block = "```Python\nprint('hi')\n```"
+        self.assertEqual(extract_codeblock_language(block), 'python')
+        self.assertEqual(strip_codeblock_backticks(block), "print('hi')\n")
+        self.assertIsNone(extract_codeblock_language("```\ncode\n```"))
+        self.assertIsNone(extract_codeblock_language("```This is code\n```"))
+
 
 if __name__ == "__main__":
     unittest.main()
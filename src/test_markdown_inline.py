@@ -282,6 +282,20 @@ class TestSSGFunctions(unittest.TestCase):
             ]
         )
     
+    def test_split_links_match_offsets(self):
+        # The link text also appears earlier as plain text; splitting must
+        # cut at the match, not at the first occurrence of the string.
+        nodes = split_nodes_link([TextNode("a](b) and [a](b)", TextType.TEXT)])
+        self.assertEqual(nodes, [
+            TextNode("a](b) and ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "b"),
+        ])
+
+    def test_many_links_single_pass(self):
+        nodes = split_nodes_link([TextNode("see [a](/b) " * 20000, TextType.TEXT)])
+        self.assertEqual(len(nodes), 40001)
+        self.assertEqual(nodes[-1], TextNode(" ", TextType.TEXT))
+    
     
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,36 @@
+import json
+import tracemalloc
+import unittest
+
+from filesystem import MemoryFileSystem
+from main import build_site
+from memprofile import STAGES, MemoryProfiler
+
+class TestMemoryProfiler(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('content/big')
+        self.fs.write_text('template.html', '<html><body>{{ Content }}</body></html>')
+        self.fs.write_text('content/index.md', '# Home\n\nShort page.')
+        self.fs.write_text('content/big/index.md', '# Big\n\n' + '\n\n'.join(f'Paragraph **{i}** with _text_.' for i in range(300)))
+
+    def test_report(self):
+        profiler = MemoryProfiler('reports/mem.json', largest=1)
+        build_site('/', fs=self.fs, memprofile=profiler)
+        self.assertFalse(tracemalloc.is_tracing())
+        report = json.loads(self.fs.read_text('reports/mem.json'))
+        self.assertEqual(report['pages'], 2)
+        self.assertEqual(list(report['stages']), list(STAGES))
+        self.assertGreater(report['peak_traced_bytes'], 0)
+        [largest] = report['largest_pages']
+        self.assertEqual(largest['source'], 'content/big/index.md')
+        self.assertEqual(list(largest['stages']), list(STAGES))
+        tree = largest['stages']['node tree']
+        self.assertGreater(tree['retained_bytes'], 0)
+        self.assertTrue(any('main.py' in site['site'] or 'htmlnode.py' in site['site'] for site in tree['top_sites']))
+        self.assertEqual(report['stages']['textnodes']['page'], 'content/big/index.md')
+
+    def test_off_by_default(self):
+        context = build_site('/', fs=self.fs)
+        self.assertIsNone(context.memprofile)
+        self.assertFalse(tracemalloc.is_tracing())
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from build_context import BuildContext
+from filesystem import MemoryFileSystem
+from main import build_site, generate_page_streaming
+from page_budget import PageBudget, PageTimeout
+from page_schedule import PageSchedule
+
+def slow(seconds):
+    # Busy loop, so the timer interrupts Python code rather than a sleep.
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+class TestPageBudget(unittest.TestCase):
+    def test_interrupts_and_fails(self):
+        budget = PageBudget(0.05)
+        start = time.perf_counter()
+        with self.assertRaises(PageTimeout):
+            budget.run('content/slow.md', slow, 5)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_quarantine(self):
+        budget = PageBudget(0.05, quarantine=True)
+        self.assertFalse(budget.run('content/slow.md', slow, 5))
+        self.assertTrue(budget.run('content/fast.md', slow, 0))
+        self.assertEqual(budget.quarantined, ['content/slow.md'])
+
+    def test_without_signals_in_threads(self):
+        budget = PageBudget(0.01, quarantine=True)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(budget.run('content/slow.md', slow, 0.05)))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [False])
+
+    def test_build_with_budget(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('content')
+        fs.write_text('template.html', '{{ Content }}')
+        fs.write_text('content/index.md', '# Home\n\nHello')
+        context = build_site('/', fs=fs, page_budget=PageBudget(10))
+        self.assertIn('/index.html', context.outputs)
+        self.assertEqual(context.page_budget.quarantined, [])
+
+    def test_quarantined_page_is_not_written_or_observed(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('content')
+        fs.write_text('template.html', '{{ Content }}')
+        fs.write_text('content/index.md', '# Home\n\nHello')
+        build_site('/', fs=fs)
+        fs.write_text('content/index.md', '# Home\n\nChanged')
+        # With no time at all, every page is over budget when it is about to
+        # be written.
+        context = build_site('/', fs=fs, page_budget=PageBudget(0, quarantine=True), schedule=PageSchedule())
+        self.assertEqual(context.page_budget.quarantined, ['content/index.md'])
+        self.assertEqual(context.pages, 0)
+        self.assertIn('Hello', fs.read_text('docs/index.html'))
+        self.assertIn('/index.html', context.outputs)
+        removed = json.loads(fs.read_text('.cache/deploy-manifest.json'))['removed']
+        self.assertNotIn('index.html', [entry['path'] for entry in removed])
+
+    def test_interrupted_streamed_page_leaves_no_output(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        source, template = os.path.join(tmp, 'page.md'), os.path.join(tmp, 'template.html')
+        with open(source, 'w') as file:
+            file.write('# Slow\n\n' + 'A paragraph.\n\n' * 200)
+        with open(template, 'w') as file:
+            file.write('{{ Content }}')
+        os.mkdir(os.path.join(tmp, 'docs'))
+        context = BuildContext(dest_root=os.path.join(tmp, 'docs'))
+        context.add_transform(lambda node, page_url, fs: slow(0.01))
+        budget = PageBudget(0.05, quarantine=True)
+        dest = os.path.join(tmp, 'docs', 'page.html')
+        self.assertFalse(budget.run(source, generate_page_streaming, source, '/', template, dest, context=context))
+        self.assertEqual(os.listdir(os.path.join(tmp, 'docs')), [])
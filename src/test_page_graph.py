@@ -0,0 +1,99 @@
+import unittest
+
+from filesystem import MemoryFileSystem
+from main import build_site
+from page_graph import PageGraph, page_key, scan_markdown
+from page_selection import PageSelection
+
+class TestScan(unittest.TestCase):
+    def test_page_key(self):
+        self.assertEqual(page_key('/index.html'), '/')
+        self.assertEqual(page_key('/blog/tom/index.html'), '/blog/tom')
+        self.assertEqual(page_key('/blog/tom/'), '/blog/tom')
+        self.assertEqual(page_key('/about.html'), '/about')
+
+    def test_scan_markdown(self):
+        markdown = ("# The Tale of Tom\n\n[Home](/) and [Majesty](../majesty/) but not [out](https://example.com)"
+                    " or ![img](/images/a.png)\n\n```\n[code](/blog/code)\n```\n\n## Songs of the Forest")
+        title, links, terms = scan_markdown(markdown, '/blog/tom/index.html')
+        self.assertEqual(title, 'The Tale of Tom')
+        self.assertEqual(links, ['/', '/blog/majesty'])
+        self.assertEqual(terms, ['forest', 'songs', 'tale', 'tom'])
+
+class TestPageGraph(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('content/blog/tom')
+        self.fs.makedirs('content/blog/glorfindel')
+        self.fs.makedirs('content/blog/balrog')
+        self.fs.write_text('content/index.md', '# Home\n\n[Tom](/blog/tom) [Glorfindel](/blog/glorfindel)')
+        self.fs.write_text('content/blog/tom/index.md', '# Tom Bombadil\n\n## The Old Forest')
+        self.fs.write_text('content/blog/glorfindel/index.md', '# Glorfindel\n\n[Tom](/blog/tom)\n\n## The Balrog')
+        self.fs.write_text('content/blog/balrog/index.md', '# Balrog of Moria\n\n## Glorfindel')
+
+    def scan(self, selection=None):
+        graph = PageGraph(state_path='.cache/page-graph.json')
+        graph.load(self.fs)
+        graph.scan(self.fs, 'content', selection=selection)
+        graph.save(self.fs)
+        return graph
+
+    def titles(self, links):
+        return [link['title'] for link in links]
+
+    def test_backlinks(self):
+        graph = self.scan()
+        self.assertEqual(self.titles(graph.linked_from('/blog/tom/index.html')), ['Glorfindel', 'Home'])
+        self.assertEqual(graph.linked_from('/blog/tom/index.html')[1]['url'], '/')
+        self.assertEqual(graph.linked_from('/blog/balrog/index.html'), [])
+
+    def test_related(self):
+        graph = self.scan()
+        self.assertEqual(self.titles(graph.related('/blog/balrog/index.html')), ['Glorfindel'])
+        self.assertEqual(graph.related('/index.html'), [])
+
+    def test_incremental_update(self):
+        self.scan()
+        self.fs.write_text('content/blog/glorfindel/index.md', '# Glorfindel\n\n## The Balrog')
+        self.fs.rmtree('content/blog/balrog')
+        graph = self.scan()
+        self.assertEqual(graph.scanned, 1)
+        self.assertEqual(self.titles(graph.linked_from('/blog/tom/index.html')), ['Home'])
+        self.assertNotIn('/blog/balrog', graph.entries)
+        self.assertNotIn('moria', graph.pages_by_term)
+
+    def test_prose_edit_keeps_state(self):
+        self.scan()
+        self.fs.write_text('content/blog/tom/index.md', '# Tom Bombadil\n\nNew prose.\n\n## The Old Forest')
+        graph = self.scan()
+        self.assertEqual(graph.scanned, 1)
+        self.assertEqual(graph.changed, 0)
+
+    def test_selection_keeps_other_pages(self):
+        self.scan()
+        self.fs.write_text('content/index.md', '# Home')
+        self.fs.write_text('content/blog/balrog/index.md', '# Balrog\n\n[Tom](/blog/tom)')
+        graph = self.scan(PageSelection(['blog/balrog']))
+        self.assertEqual(graph.scanned, 1)
+        self.assertEqual(self.titles(graph.linked_from('/blog/tom/')), ['Balrog', 'Glorfindel', 'Home'])
+
+    def test_template_variables(self):
+        self.fs.write_text('template.html', '{{ Content }}')
+        self.fs.write_text('content/blog/template.html',
+                           '{{ Content }}{% for page in backlinks %}<a href="{{ page.url }}">{{ page.title }}</a>'
+                           '{% endfor %}')
+        build_site('/site/', fs=self.fs)
+        self.assertIn('<a href="/site/blog/glorfindel">Glorfindel</a><a href="/site/">Home</a>',
+                      self.fs.read_text('docs/blog/tom/index.html'))
+
+    def test_titles_are_escaped(self):
+        self.fs.write_text('content/blog/glorfindel/index.md', '# Using <script> & friends\n\n[Tom](/blog/tom)')
+        self.fs.write_text('template.html', '{{ Content }}')
+        self.fs.write_text('content/blog/template.html',
+                           '{% for page in backlinks %}<a href="{{ page.url }}">{{ page.title }}</a>{% endfor %}')
+        build_site('/', fs=self.fs)
+        self.assertIn('<a href="/blog/glorfindel">Using &lt;script&gt; &amp; friends</a>',
+                      self.fs.read_text('docs/blog/tom/index.html'))
+
+if __name__ == '__main__':
+    unittest.main()
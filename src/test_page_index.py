@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from build_context import BuildContext
+from filesystem import MemoryFileSystem
+from link_checker import LinkChecker
+from main import build_site, generate_page, generate_page_streaming, markdown_to_html_node
+from page_index import PageIndex, page_summary
+from page_selection import PageSelection
+
+class TestPageSummary(unittest.TestCase):
+    def test_first_prose_paragraph(self):
+        node = markdown_to_html_node("# Title\n\n[< Back Home](/)\n\nThe **first** paragraph.\n\nThe second one.")
+        self.assertEqual(page_summary(node), ('The first paragraph.', 10))
+
+    def test_long_paragraph_cut_at_word(self):
+        node = markdown_to_html_node("word " * 100)
+        summary, words = page_summary(node, length=22)
+        self.assertEqual(summary, 'word word word word…')
+        self.assertEqual(words, 100)
+
+class TestPageIndex(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('content/blog')
+        self.fs.write_text('template.html', '<title>{{ Title }}</title>{{ Content }}')
+        self.fs.write_text('content/index.md', '# Home\n\nWelcome.')
+        for number in range(3):
+            self.write_post(number)
+
+    def write_post(self, number, body='Some prose'):
+        self.fs.makedirs(f'content/blog/post{number}')
+        self.fs.write_text(f'content/blog/post{number}/index.md', f'# Post {number}\n\n{body} {number}.')
+
+    def build(self, **options):
+        context = build_site('/site/', fs=self.fs, **options)
+        return dict(context.summary)['Page index']
+
+    def test_listing_newest_first(self):
+        self.build()
+        listing = self.fs.read_text('docs/blog/index.html')
+        self.assertIn('<title>Blog</title>', listing)
+        self.assertLess(listing.index('Post 2'), listing.index('Post 0'))
+        self.assertIn('<a href="/site/blog/post1/">Post 1</a>', listing)
+        self.assertIn('<p>Some prose 1.</p>', listing)
+        self.assertFalse(self.fs.exists('docs/sitemap.xml'))
+
+    def test_pagination(self):
+        context = build_site('/', fs=self.fs)
+        index = PageIndex('/', per_page=2)
+        for page in [('blog/post0/index.html', 0), ('blog/post1/index.html', 1), ('blog/post2/index.html', 2)]:
+            index.entries[page[0]] = {'source': 'content/index.md', 'title': f'Post {page[1]}', 'summary': '',
+                                      'mtime': page[1], 'words': 1}
+        index.finish(context)
+        first = self.fs.read_text('docs/blog/index.html')
+        second = self.fs.read_text('docs/blog/page/2/index.html')
+        self.assertIn('Post 1', first)
+        self.assertNotIn('Post 0', first)
+        self.assertIn('href="/blog/page/2/" rel="next"', first)
+        self.assertIn('Post 0', second)
+        self.assertIn('href="/blog/" rel="prev"', second)
+
+    def test_stale_listing_pages_removed(self):
+        context = build_site('/', fs=self.fs)
+        index = PageIndex('/', per_page=2)
+        for number in range(3):
+            index.entries[f'blog/post{number}/index.html'] = {'source': 'content/index.md', 'title': f'Post {number}',
+                                                              'summary': '', 'mtime': number, 'words': 1}
+        index.finish(context)
+        self.assertIn('/blog/page/2/index.html', context.outputs)
+        del index.entries['blog/post0/index.html']
+        index.finish(context)
+        self.assertFalse(self.fs.exists('docs/blog/page/2'))
+        self.assertNotIn('/blog/page/2/index.html', context.outputs)
+        self.assertIn('(1 stale removed)', context.summary[-1][1])
+
+    def test_links_to_listing_pages_resolve(self):
+        for number in range(3, 11):
+            self.write_post(number)
+        self.fs.write_text('content/index.md', '# Home\n\n[Blog](/blog/) and [older posts](/blog/page/2/)')
+        context = build_site('/', fs=self.fs)
+        [checker] = [observer for observer in context.observers if isinstance(observer, LinkChecker)]
+        self.assertIn('/blog/page/2/index.html', context.outputs)
+        self.assertEqual(checker.broken, {})
+
+    def test_section_index_page_is_kept(self):
+        self.fs.write_text('content/blog/index.md', '# My Blog')
+        self.build()
+        self.assertIn('My Blog', self.fs.read_text('docs/blog/index.html'))
+
+    def test_sitemap_and_feed(self):
+        self.build(site_url='https://example.com/')
+        sitemap = self.fs.read_text('docs/sitemap.xml')
+        feed = self.fs.read_text('docs/feed.xml')
+        self.assertIn('<loc>https://example.com/site/</loc>', sitemap)
+        self.assertIn('<loc>https://example.com/site/blog/post0/</loc>', sitemap)
+        self.assertIn('<loc>https://example.com/site/blog/</loc>', sitemap)
+        self.assertIn('<title>Home</title>', feed)
+        self.assertIn('<link>https://example.com/site/blog/post2/</link>', feed)
+        self.assertEqual(feed.count('<item>'), 3)
+
+    def test_incremental_update(self):
+        self.build()
+        self.write_post(1, body='Rewritten')
+        line = self.build(selection=PageSelection(['blog/post1']), copy_assets=False)
+        self.assertTrue(line.startswith('4 pages (1 updated)'))
+        listing = self.fs.read_text('docs/blog/index.html')
+        self.assertIn('Rewritten 1.', listing)
+        self.assertIn('Post 0', listing)
+        self.fs.rmtree('content/blog/post0')
+        self.build()
+        self.assertNotIn('Post 0', self.fs.read_text('docs/blog/index.html'))
+
+class TestStreamedPages(unittest.TestCase):
+    def test_streamed_page_is_indexed(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        os.makedirs(os.path.join(tmp, 'content', 'blog'))
+        os.makedirs(os.path.join(tmp, 'docs', 'blog'))
+        source = os.path.join(tmp, 'content', 'blog', 'big.md')
+        template = os.path.join(tmp, 'template.html')
+        with open(source, 'w') as file:
+            file.write('# Big post\n\n[< Back](/)\n\nThe **first** paragraph.\n\n' + 'More words here.\n\n' * 50)
+        with open(template, 'w') as file:
+            file.write('{{ Content }}')
+        entries = []
+        for generate in (generate_page, generate_page_streaming):
+            context = BuildContext(content_root=os.path.join(tmp, 'content'), dest_root=os.path.join(tmp, 'docs'))
+            index = context.add_observer(PageIndex('/'))
+            generate(source, '/', template, os.path.join(tmp, 'docs', 'blog', 'big.html'), context=context)
+            entries.append(index.entries)
+        self.assertEqual(entries[1], entries[0])
+        self.assertEqual(entries[1]['blog/big.html']['summary'], 'The first paragraph.')
+        self.assertEqual(entries[1]['blog/big.html']['words'], 157)
+
+if __name__ == '__main__':
+    unittest.main()
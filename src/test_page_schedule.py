@@ -0,0 +1,60 @@
+import os
+import unittest
+
+from build_context import BuildContext
+from filesystem import MemoryFileSystem
+from main import build_site, main
+from page_schedule import PageSchedule, priority_keys
+
+class TestPriorityKeys(unittest.TestCase):
+    def test_parse(self):
+        text = "# top pages\n\nhttps://example.com/site/blog/tom/\n/site/\n/site/blog/tom/index.html\n/contact\n"
+        self.assertEqual(priority_keys(text, '/site/'), ['/blog/tom', '/', '/contact'])
+
+class TestPageSchedule(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('content/blog/tom')
+        self.fs.makedirs('content/contact')
+        self.fs.makedirs('static')
+        self.fs.write_text('template.html', '{{ Title }}{{ Content }}')
+        self.fs.write_text('content/blog/tom/index.md', '# Tom')
+        self.fs.write_text('content/contact/index.md', '# Contact')
+        self.fs.write_text('content/index.md', '# Home')
+        self.pages = [(os.path.join('content', path, 'index.md'), os.path.join('docs', path, 'index.html'))
+                      for path in ('blog/tom', 'contact', '')]
+
+    def test_order(self):
+        context = BuildContext(fs=self.fs)
+        mtimes = {source: self.fs.mtime(source) for source, _ in self.pages}
+        schedule = PageSchedule()
+        ordered = [source for source, _ in schedule.order(self.pages, context, mtimes)]
+        self.assertEqual(ordered, ['content/index.md', 'content/contact/index.md', 'content/blog/tom/index.md'])
+        schedule = PageSchedule(['/blog/tom'])
+        self.fs.write_text('content/contact/index.md', '# Contact us')
+        ordered = [source for source, _ in schedule.order(self.pages, context, mtimes)]
+        self.assertEqual(ordered, ['content/contact/index.md', 'content/blog/tom/index.md', 'content/index.md'])
+        self.assertEqual((schedule.changed, schedule.prioritized), ({'content/contact/index.md'}, 1))
+
+    def test_progressive_build(self):
+        build_site('/', fs=self.fs)
+        self.fs.write_text('static/robots.txt', 'User-agent: *')
+        self.fs.write_text('docs/stale.html', 'old')
+        self.fs.rmtree('content/contact')
+        self.fs.write_text('content/blog/tom/index.md', '# Tom Bombadil')
+        context = build_site('/', fs=self.fs, schedule=PageSchedule())
+        summary = dict(context.summary)
+        self.assertIn('1 changed', summary['Progressive'])
+        self.assertIn('first changed page live after', summary['Progressive'])
+        self.assertEqual(summary['Stale files'], '2 removed from docs/')
+        self.assertFalse(self.fs.exists('docs/stale.html'))
+        self.assertFalse(self.fs.exists('docs/contact'))
+        self.assertEqual(self.fs.read_text('docs/robots.txt'), 'User-agent: *')
+        self.assertIn('Tom Bombadil', self.fs.read_text('docs/blog/tom/index.html'))
+
+    def test_cannot_combine_with_archive(self):
+        with self.assertRaises(SystemExit):
+            main(['--progressive', '--archive', 'site.tar'])
+
+if __name__ == '__main__':
+    unittest.main()
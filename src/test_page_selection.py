@@ -0,0 +1,92 @@
+import json
+import unittest
+
+from filesystem import MemoryFileSystem
+from link_checker import LinkChecker
+from main import build_site, generate_pages_recursive
+from page_selection import PageSelection
+
+class TestPageSelection(unittest.TestCase):
+    def test_path(self):
+        selection = PageSelection(['blog/tom/index.md'])
+        self.assertEqual(selection.patterns, ['content/blog/tom/index.md'])
+        self.assertTrue(selection.matches('content/blog/tom/index.md'))
+        self.assertFalse(selection.matches('content/blog/index.md'))
+        self.assertTrue(selection.may_contain('content/blog'))
+        self.assertFalse(selection.may_contain('content/contact'))
+        self.assertFalse(selection.may_contain('content/blog/tomato'))
+
+    def test_directory(self):
+        selection = PageSelection(['./content/blog/'])
+        self.assertTrue(selection.matches('content/blog/index.md'))
+        self.assertTrue(selection.matches('content/blog/tom/index.md'))
+        self.assertFalse(selection.matches('content/blogroll.md'))
+        self.assertTrue(selection.may_contain('content/blog/tom'))
+        self.assertFalse(selection.may_contain('content/contact'))
+
+    def test_glob(self):
+        selection = PageSelection(['content/blog/t*'])
+        self.assertTrue(selection.matches('content/blog/tom/index.md'))
+        self.assertFalse(selection.matches('content/blog/index.md'))
+        self.assertTrue(selection.may_contain('content/blog'))
+        self.assertTrue(selection.may_contain('content/blog/tom'))
+        self.assertFalse(selection.may_contain('content/blog/glorfindel'))
+        self.assertFalse(selection.may_contain('content/contact'))
+
+    def test_unrelated_directories_not_listed(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('content/blog/tom')
+        fs.makedirs('content/contact')
+        fs.write_text('template.html', '{{ Content }}')
+        fs.write_text('content/blog/tom/index.md', '# Tom')
+        fs.write_text('content/contact/index.md', '# Contact')
+        listed = []
+        listdir = fs.listdir
+        fs.listdir = lambda path: listed.append(path) or listdir(path)
+        selection = PageSelection(['blog/tom'])
+        generate_pages_recursive('content', '/', 'template.html', 'docs', fs=fs, selection=selection)
+        self.assertNotIn('content/contact', listed)
+        self.assertEqual(selection.matched, 1)
+        self.assertTrue(fs.isfile('docs/blog/tom/index.html'))
+        self.assertFalse(fs.exists('docs/contact'))
+
+class TestTargetedBuild(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('content/blog')
+        self.fs.makedirs('static')
+        self.fs.write_text('template.html', '<title>{{ Title }}</title>{{ Content }}')
+        self.fs.write_text('static/index.css', 'body { color: red; }')
+        self.fs.write_text('content/index.md', '# Home\n\n[Blog](/blog/)')
+        self.fs.write_text('content/blog/index.md', '# Blog\n\n[Home](/)')
+        build_site('/', fs=self.fs)
+
+    def test_updates_selected_pages_in_place(self):
+        self.fs.write_text('content/index.md', '# Home\n\nEdited')
+        self.fs.write_text('content/blog/index.md', '# Blog\n\nEdited')
+        self.fs.write_text('static/index.css', 'body { color: blue; }')
+        context = build_site('/', fs=self.fs, selection=PageSelection(['blog/index.md']), copy_assets=False)
+        self.assertEqual(context.pages, 1)
+        self.assertIn('Edited', self.fs.read_text('docs/blog/index.html'))
+        self.assertNotIn('Edited', self.fs.read_text('docs/index.html'))
+        self.assertIn('red', self.fs.read_text('docs/bundle.css'))
+        self.assertTrue(self.fs.isdir('docs/search'))
+        manifest = json.loads(self.fs.read_text('.cache/deploy-manifest.json'))
+        self.assertEqual([entry['path'] for entry in manifest['modified']], ['blog/index.html'])
+        self.assertEqual(manifest['removed'], [])
+        self.assertIn('index.html', manifest['files'])
+        self.assertIn('search/pages.json', manifest['files'])
+
+    def test_links_to_unselected_pages_resolve(self):
+        context = build_site('/', fs=self.fs, selection=PageSelection(['blog']), copy_assets=False)
+        [checker] = [observer for observer in context.observers if isinstance(observer, LinkChecker)]
+        self.assertEqual(checker.broken, {})
+
+    def test_copy_assets(self):
+        self.fs.write_text('static/index.css', 'body { color: blue; }')
+        build_site('/', fs=self.fs, selection=PageSelection(['blog']), copy_assets=True)
+        self.assertIn('blue', self.fs.read_text('docs/bundle.css'))
+        self.assertTrue(self.fs.isfile('docs/index.html'))
+
+if __name__ == '__main__':
+    unittest.main()
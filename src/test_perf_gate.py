@@ -0,0 +1,23 @@
+import unittest
+
+from perf_gate import STAGES, compare_results, format_table
+
+def profile(calibration, medians, mad=0.001):
+    return {'calibration': calibration,
+            'stages': {name: {'median': median, 'mad': mad} for name, median in zip(STAGES, medians)}}
+
+class TestCompareResults(unittest.TestCase):
+    def test_regression_detected(self):
+        rows = compare_results(profile(1.0, [0.1, 0.1, 0.1, 0.1]), profile(1.0, [0.1, 0.25, 0.105, 0.1]), 0.15, 3)
+        self.assertEqual([row['regressed'] for row in rows], [False, True, False, False])
+        self.assertAlmostEqual(rows[1]['change'], 1.5)
+        self.assertIn('| text_to_textnodes | 100.0 | 250.0 | +150.0% | REGRESSED |', format_table(rows, 1.0))
+
+    def test_scaled_by_calibration(self):
+        rows = compare_results(profile(1.0, [0.1] * 4), profile(2.0, [0.2] * 4), 0.15, 3)
+        self.assertFalse(any(row['regressed'] for row in rows))
+        self.assertAlmostEqual(rows[0]['baseline'], 0.2)
+
+    def test_noise_suppresses(self):
+        rows = compare_results(profile(1.0, [0.1] * 4, mad=0.02), profile(1.0, [0.13] * 4, mad=0.02), 0.15, 3)
+        self.assertFalse(any(row['regressed'] for row in rows))
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from main import build_site, main
+from publish import Release, initial_release_id, list_releases, rollback
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+        os.makedirs('content/blog')
+        os.makedirs('static')
+        self.write('content/index.md', "# Home\n\n[Blog](/blog)")
+        self.write('content/blog/index.md', "# Blog\n\nFirst post")
+        self.write('static/index.css', "body {}")
+        self.write('template.html', "{{ Title }}{{ Content }}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def write(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path, 'r') as file:
+            return file.read()
+
+    def release_hash(self, release_id, path):
+        with open(f'.releases/{release_id}.json', 'r') as file:
+            return json.load(file)[path]
+
+    def publish(self, release_id, keep=5):
+        release = Release('docs', '.releases', release_id)
+        build_site('/', fs=release.fs)
+        release.publish(keep=keep)
+        return release
+
+    def test_publish_swaps_symlink(self):
+        os.makedirs('docs')
+        self.write('docs/old.html', "old site")
+        first = self.publish('0001Z')
+        self.assertTrue(os.path.islink('docs'))
+        self.assertEqual(self.read('docs/blog/index.html'), "Blog<div><h1>Blog</h1><p>First post</p></div>")
+        self.assertEqual(list_releases('.releases'), ['0001-initial', '0001Z'])
+        self.assertEqual(first.fs.linked, 0)
+
+    def test_initial_release_id(self):
+        self.assertEqual(initial_release_id('20240102T030405000006Z'), '20240102T030405000006-initial')
+        self.assertLess(initial_release_id('20240102T030405000006Z'), '20240102T030405000006Z')
+        self.assertGreater(initial_release_id('20240102T030405000006Z'), '20240102T030405000005Z')
+        self.assertEqual(initial_release_id('0001'), '0001-initial')
+
+    def test_unchanged_files_are_hardlinked(self):
+        self.publish('0001')
+        self.write('content/blog/index.md', "# Blog\n\nSecond post")
+        second = self.publish('0002')
+        self.assertEqual(os.stat('.releases/0001/bundle.css').st_ino, os.stat('.releases/0002/bundle.css').st_ino)
+        self.assertEqual(os.stat('.releases/0001/index.html').st_ino, os.stat('.releases/0002/index.html').st_ino)
+        self.assertNotEqual(os.stat('.releases/0001/blog/index.html').st_ino, os.stat('.releases/0002/blog/index.html').st_ino)
+        self.assertIn("Second post", self.read('docs/blog/index.html'))
+        self.assertIn("First post", self.read('.releases/0001/blog/index.html'))
+        self.assertGreaterEqual(second.fs.linked, 2)
+
+    def test_rollback_and_prune(self):
+        for release_id in ('0001', '0002', '0003'):
+            self.write('content/blog/index.md', f"# Blog\n\nPost {release_id}")
+            self.publish(release_id, keep=2)
+        self.assertEqual(list_releases('.releases'), ['0002', '0003'])
+        self.assertFalse(os.path.exists('.releases/0001.json'))
+        self.assertEqual(rollback('docs', '.releases'), '0002')
+        self.assertIn("Post 0002", self.read('docs/blog/index.html'))
+        with self.assertRaises(ValueError):
+            rollback('docs', '.releases')
+
+    def test_targeted_build_keeps_earlier_releases(self):
+        self.publish('0001')
+        self.publish('0002')
+        self.assertEqual(os.stat('.releases/0001/index.html').st_ino, os.stat('.releases/0002/index.html').st_ino)
+        self.write('content/index.md', "# Home\n\nEdited")
+        main(['--only', 'index.md', '--history-builds', '0'])
+        self.assertIn("Edited", self.read('docs/index.html'))
+        self.assertNotIn("Edited", self.read('.releases/0001/index.html'))
+        self.assertNotEqual(self.release_hash('0002', 'index.html'), self.release_hash('0001', 'index.html'))
+        self.assertEqual(rollback('docs', '.releases'), '0001')
+        self.assertNotIn("Edited", self.read('docs/index.html'))
+
+    def test_discard(self):
+        release = Release('docs', '.releases', '0001')
+        release.discard()
+        self.assertEqual(list_releases('.releases'), [])
+        self.assertFalse(os.path.exists('docs'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import BlockType
+from registry import BLOCKS, BlockRegistry, InlineRegistry
+
+class TestBlockRegistry(unittest.TestCase):
+    def test_first_character_dispatch(self):
+        calls = []
+        registry = BlockRegistry(default_type='paragraph')
+
+        def detector(name, result=True):
+            def detect(block):
+                calls.append(name)
+                return result
+            return detect
+
+        registry.register_detector('heading', detector('heading'), first_chars='#')
+        registry.register_detector('quote', detector('quote'), first_chars='>')
+        registry.register_detector('never', detector('never', False), first_chars='#', priority=5)
+        self.assertEqual(registry.block_type("# Title"), 'heading')
+        self.assertEqual(calls, ['never', 'heading'])
+        calls.clear()
+        self.assertEqual(registry.block_type("plain text"), 'paragraph')
+        self.assertEqual(registry.block_type(""), 'paragraph')
+        self.assertEqual(calls, [])
+
+    def test_wildcard_and_priority(self):
+        registry = BlockRegistry(default_type='paragraph')
+        registry.register_detector('table', lambda b: b.startswith('|'), first_chars='|')
+        registry.register_detector('admonition', lambda b: b.startswith('!!!'))
+        registry.register_detector('anything', lambda b: True, first_chars='|', priority=-1)
+        self.assertEqual(registry.block_type("| a | b |"), 'table')
+        self.assertEqual(registry.block_type("!!! note"), 'admonition')
+        self.assertEqual(registry.block_type("| x"), 'table')
+        registry.register_detector('override', lambda b: True, first_chars='|', priority=10)
+        self.assertEqual(registry.block_type("| x"), 'override')
+
+    def test_renderer_lookup(self):
+        registry = BlockRegistry()
+        registry.register_renderer('table', lambda b: ParentNode('table', []))
+        self.assertEqual(registry.renderer('table')("|").tag, 'table')
+        self.assertIsNone(registry.renderer('missing'))
+
+    def test_builtin_types_registered(self):
+        self.assertEqual(BLOCKS.block_type("```\ncode\n```"), BlockType.CODE)
+        self.assertEqual(BLOCKS.block_type("1. a\n3. b"), BlockType.PARAGRAPH)
+        for block_type in BlockType:
+            self.assertIsNotNone(BLOCKS.renderer(block_type))
+
+class TestInlineRegistry(unittest.TestCase):
+    def test_splitters_in_priority_order(self):
+        registry = InlineRegistry()
+        registry.register_splitter('low', lambda nodes: nodes + ['low'], priority=1)
+        registry.register_splitter('high', lambda nodes: nodes + ['high'], priority=9)
+        nodes = []
+        for split in registry.splitters():
+            nodes = split(nodes)
+        self.assertEqual(nodes, ['high', 'low'])
+        registry.register_splitter('high', lambda nodes: nodes + ['replaced'], priority=0)
+        self.assertEqual(len(registry.splitters()), 2)
+
+    def test_renderer(self):
+        registry = InlineRegistry()
+        registry.register_renderer('strike', lambda node: LeafNode('s', node))
+        self.assertEqual(registry.renderer('strike')("gone").to_html(), "<s>gone</s>")
+
+if __name__ == "__main__":
+    unittest.main()
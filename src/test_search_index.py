@@ -0,0 +1,91 @@
+import json
+import unittest
+
+from build_context import BuildContext
+from filesystem import MemoryFileSystem
+from main import generate_pages_recursive
+from search_index import SearchIndex, tokenize, HEADING_WEIGHT, TITLE_WEIGHT
+
+def make_site(fs):
+    fs.makedirs('content/blog')
+    fs.write_text('content/index.md', "# Rivendell\n\nThe house of Elrond")
+    fs.write_text('content/blog/index.md', "# Blog\n\n## Elrond\n\nElrond and Glorfindel")
+    fs.write_text('template.html', "{{ Title }}{{ Content }}")
+
+def build(fs):
+    context = BuildContext(fs=fs)
+    index = context.add_observer(SearchIndex(state_path='.cache/search.json'))
+    index.load(fs)
+    generate_pages_recursive('content', '/', 'template.html', 'docs', fs=fs, context=context)
+    context.finish()
+    return index, context
+
+def read_shard(fs, key):
+    return json.loads(fs.read_text(f'docs/search/terms-{key}.json'))
+
+class TestSearchIndex(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Old Tom's **boots**, yellow!"), ["old", "tom", "s", "boots", "yellow"])
+
+    def test_postings_and_weights(self):
+        fs = MemoryFileSystem()
+        make_site(fs)
+        build(fs)
+        pages = json.loads(fs.read_text('docs/search/pages.json'))
+        self.assertEqual(pages, [["/blog/index.html", "Blog"], ["/index.html", "Rivendell"]])
+        elrond = read_shard(fs, 'e')['elrond']
+        blog = [p for p in elrond if p[0] == 0][0]
+        home = [p for p in elrond if p[0] == 1][0]
+        self.assertEqual(blog[1], HEADING_WEIGHT + 1)
+        self.assertEqual(home[1], 1)
+        self.assertEqual(len(blog[2:]), 2)
+        rivendell = read_shard(fs, 'r')['rivendell'][0]
+        self.assertEqual(rivendell[1], TITLE_WEIGHT + HEADING_WEIGHT)
+
+    def test_incremental_update(self):
+        fs = MemoryFileSystem()
+        make_site(fs)
+        build(fs)
+        fs.write_text('content/index.md', "# Rivendell\n\nThe house of Arwen")
+        index, context = build(fs)
+        self.assertEqual(index.reused, 1)
+        self.assertIn('arwen', read_shard(fs, 'a'))
+        self.assertEqual([p[0] for p in read_shard(fs, 'e')['elrond']], [0])
+        self.assertEqual(context.summary[0][0], "Search index")
+
+    def test_removed_page_dropped(self):
+        fs = MemoryFileSystem()
+        make_site(fs)
+        build(fs)
+        fs.rmtree('content/blog')
+        fs.rmtree('docs')
+        build(fs)
+        self.assertFalse(fs.exists('docs/search/terms-g.json'))
+        self.assertEqual([p[0] for p in read_shard(fs, 'e')['elrond']], [0])
+
+    def test_shards_replaced_in_place(self):
+        fs = MemoryFileSystem()
+        make_site(fs)
+        build(fs)
+        fs.rmtree('content/blog')
+        write_bytes = fs.write_bytes
+
+        def failing_write(path, data):
+            if path.endswith('terms-h.json'):
+                raise OSError("disk full")
+            write_bytes(path, data)
+
+        fs.write_bytes = failing_write
+        with self.assertRaises(OSError):
+            build(fs)
+        # The index written by the previous build is still complete.
+        self.assertIn('glorfindel', read_shard(fs, 'g'))
+        fs.write_bytes = write_bytes
+        build(fs)
+        self.assertFalse(fs.exists('docs/search/terms-g.json'))
+        self.assertEqual(sorted(fs.listdir('docs/search')),
+                         ['pages.json', 'terms-e.json', 'terms-h.json', 'terms-o.json', 'terms-r.json',
+                          'terms-t.json'])
+
+if __name__ == "__main__":
+    unittest.main()
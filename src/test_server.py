@@ -0,0 +1,119 @@
+import gzip
+import http.client
+import re
+import threading
+import unittest
+
+from filesystem import MemoryFileSystem
+from main import build_into_store
+from server import SiteStore, make_server
+
+PAGE = b"<html><body>" + b"<p>Old Tom Bombadil is a merry fellow</p>" * 20 + b"</body></html>"
+
+class TestSiteStore(unittest.TestCase):
+    def test_load_updates_in_place(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('docs/blog')
+        fs.write_bytes('docs/index.html', PAGE)
+        fs.write_bytes('docs/blog/index.html', b"<p>blog</p>")
+        store = SiteStore()
+        self.assertEqual(store.load(fs, 'docs'), 2)
+        entry = store.get('/index.html')
+        self.assertIs(store.resolve('/'), entry)
+        self.assertIs(store.resolve('/blog'), store.get('/blog/index.html'))
+
+        fs.write_bytes('docs/blog/index.html', b"<p>changed</p>")
+        fs.rmtree('docs/blog')
+        fs.write_bytes('docs/new.css', b"body {}")
+        self.assertEqual(store.load(fs, 'docs'), 2)
+        self.assertIs(store.get('/index.html'), entry)
+        self.assertIsNone(store.get('/blog/index.html'))
+        self.assertEqual(store.get('/new.css').content_type, 'text/css; charset=utf-8')
+
+class TestSiteServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.store = SiteStore()
+        cls.store.put('/index.html', PAGE)
+        cls.store.put('/images/a.png', b"\x89PNG" * 100)
+        cls.server = make_server(cls.store, port=0, quiet=True)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def request(self, path, headers=None, method='GET'):
+        conn = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+        conn.request(method, path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_get_with_etag(self):
+        response, body = self.request('/')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, PAGE)
+        self.assertEqual(response.getheader('ETag'), self.store.get('/index.html').etag)
+
+    def test_if_none_match(self):
+        etag = self.store.get('/index.html').etag
+        response, body = self.request('/index.html', {'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+        response, _ = self.request('/index.html', {'If-None-Match': '"stale"'})
+        self.assertEqual(response.status, 200)
+
+    def test_gzip_negotiation(self):
+        response, body = self.request('/index.html', {'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(gzip.decompress(body), PAGE)
+        self.assertNotEqual(response.getheader('ETag'), self.store.get('/index.html').etag)
+        response, body = self.request('/index.html', {'Accept-Encoding': 'gzip;q=0'})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        response, body = self.request('/images/a.png', {'Accept-Encoding': 'gzip'})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+
+    def test_head_and_missing(self):
+        response, body = self.request('/index.html', method='HEAD')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"")
+        response, _ = self.request('/missing')
+        self.assertEqual(response.status, 404)
+
+class TestServeBasepath(unittest.TestCase):
+    def test_links_resolve_under_basepath(self):
+        sources = MemoryFileSystem()
+        sources.makedirs('content/blog')
+        sources.makedirs('static')
+        sources.write_text('template.html', '<link href="/index.css" rel="stylesheet" />{{ Content }}')
+        sources.write_text('static/index.css', 'body { color: red; }')
+        sources.write_text('content/index.md', '# Home\n\n[Blog](/blog/)')
+        sources.write_text('content/blog/index.md', '# Blog\n\n[Home](/)')
+        store = SiteStore()
+        build_into_store(store, '/x/', base=sources)
+        server = make_server(store, port=0, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        def get(path):
+            conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+            conn.request('GET', path)
+            response = conn.getresponse()
+            body = response.read()
+            conn.close()
+            return response.status, body
+
+        status, home = get('/x/')
+        self.assertEqual(status, 200)
+        links = re.findall(rb'(?:href|src)="([^"]+)"', home)
+        self.assertEqual(sorted(links), [b'/x/blog/', b'/x/bundle.css'])
+        for link in links:
+            self.assertEqual(get(link.decode())[0], 200, link)
+        self.assertEqual(get('/index.html')[0], 404)
+
+if __name__ == "__main__":
+    unittest.main()
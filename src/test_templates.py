@@ -0,0 +1,119 @@
+import unittest
+
+from build_context import BuildContext
+from filesystem import MemoryFileSystem
+from main import build_site, generate_pages_recursive
+from templates import Markup, TemplateLoader, compile_template
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_variables(self):
+        template = compile_template("<title>{{ Title }}</title>{{ page.url }}{{ missing }}")
+        output = template.render({'Title': "Tom", 'page': {'url': "/tom"}}, None)
+        self.assertEqual(output, "<title>Tom</title>/tom")
+        self.assertEqual(template.names, {'Title', 'page', 'missing'})
+
+    def test_for_and_if(self):
+        template = compile_template(
+            "{% for item in nav %}<a href=\"{{ item.url }}\">{{ item.title }}</a>{% endfor %}"
+            "{% if footer %}F{% else %}none{% endif %}"
+        )
+        nav = [{'url': "/", 'title': "Home"}, {'url': "/blog", 'title': "Blog"}]
+        self.assertEqual(
+            template.render({'nav': nav}, None),
+            "<a href=\"/\">Home</a><a href=\"/blog\">Blog</a>none",
+        )
+        self.assertEqual(template.names, {'nav', 'footer'})
+
+    def test_values_are_not_reparsed(self):
+        template = compile_template("{{ Content }}")
+        self.assertEqual(template.render({'Content': "{{ Title }}"}, None), "{{ Title }}")
+
+    def test_values_are_escaped(self):
+        template = compile_template("<title>{{ Title }}</title><a href=\"{{ url }}\">x</a>{{ Content }}")
+        output = template.render({'Title': 'Post <b> & "x"', 'url': '/a?b=1&c="2"', 'Content': Markup("<p>c</p>")},
+                                 None)
+        self.assertEqual(output, '<title>Post &lt;b&gt; &amp; "x"</title>'
+                                 '<a href="/a?b=1&amp;c=&quot;2&quot;">x</a><p>c</p>')
+
+    def test_page_title_is_escaped(self):
+        fs = MemoryFileSystem()
+        fs.makedirs('content')
+        fs.write_text('template.html', '<title>{{ Title }}</title>{{ Content }}')
+        fs.write_text('content/index.md', '# Post <b> & "x"\n\nText')
+        build_site('/', fs=fs)
+        self.assertEqual(fs.read_text('docs/index.html'),
+                         '<title>Post &lt;b&gt; &amp; "x"</title>'
+                         '<div><h1>Post &lt;b&gt; &amp; "x"</h1><p>Text</p></div>')
+
+    def test_escaping_follows_position(self):
+        template = compile_template('<p title="{{ v }}">{{ v }}</p><img alt="a > {{ v }}">{{ v }}')
+        self.assertEqual(template.render({'v': '"a" & <b>'}, None),
+                         '<p title="&quot;a&quot; &amp; &lt;b&gt;">"a" &amp; &lt;b&gt;</p>'
+                         '<img alt="a > &quot;a&quot; &amp; &lt;b&gt;">"a" &amp; &lt;b&gt;')
+
+    def test_syntax_errors(self):
+        for text in ("{% for x in y %}", "{% endif %}", "{% while x %}", "{{ a b }}", "{% else %}"):
+            with self.assertRaises(ValueError):
+                compile_template(text)
+
+class TestTemplateLoader(unittest.TestCase):
+    def setUp(self):
+        self.fs = MemoryFileSystem()
+        self.fs.makedirs('content/blog/tom')
+        self.fs.makedirs('partials')
+        self.fs.write_text('content/index.md', "# Home\n\nHi")
+        self.fs.write_text('content/blog/tom/index.md', "# Tom\n\nBombadil")
+        self.fs.write_text('content/blog/template.html', "{% include \"nav.html\" %}<blog>{{ Content }}</blog>")
+        self.fs.write_text('template.html', "{% include \"nav.html\" %}{% include \"title.html\" %}{{ Content }}")
+        self.fs.write_text('partials/nav.html', "{% for item in nav %}[{{ item.title }}]{% endfor %}")
+        self.fs.write_text('partials/title.html', "<h1>{{ Title }}</h1>")
+
+    def test_layout_resolution(self):
+        loader = TemplateLoader(self.fs, content_root='content')
+        self.assertEqual(loader.resolve('content/blog/tom', 'template.html'), 'content/blog/template.html')
+        self.assertEqual(loader.resolve('content', 'template.html'), 'template.html')
+        self.assertEqual(loader.resolve('content/blog', 'template.html'), 'content/blog/template.html')
+
+    def test_static_partials_rendered_once(self):
+        context = BuildContext(fs=self.fs)
+        context.templates.site['nav'] = [{'url': '/', 'title': 'Home'}]
+        generate_pages_recursive('content', '/', 'template.html', 'docs', fs=self.fs, context=context)
+        self.assertEqual(self.fs.read_text('docs/index.html'), "[Home]<h1>Home</h1><div><h1>Home</h1><p>Hi</p></div>")
+        self.assertEqual(self.fs.read_text('docs/blog/tom/index.html'), "[Home]<blog><div><h1>Tom</h1><p>Bombadil</p></div></blog>")
+        # nav.html once for the whole build, title.html once per page using it.
+        self.assertEqual(context.templates.partial_renders, 2)
+
+    def test_include_sees_loop_variables(self):
+        self.fs.write_text('partials/item.html', "<li>{{ item.title }}</li>")
+        self.fs.write_text('template.html', "{% for item in nav %}{% include \"item.html\" %}{% endfor %}")
+        loader = TemplateLoader(self.fs)
+        loader.site['nav'] = [{'title': 'Home'}, {'title': 'Blog'}]
+        self.assertEqual(loader.render('template.html', {}), "<li>Home</li><li>Blog</li>")
+
+    def test_static_partial_rerendered_on_change(self):
+        loader = TemplateLoader(self.fs)
+        loader.site['nav'] = [{'url': '/', 'title': 'Home'}]
+        self.fs.write_text('template.html', "{% include \"nav.html\" %}")
+        self.assertEqual(loader.render('template.html', {}), "[Home]")
+        self.fs.write_text('partials/nav.html', "{% for item in nav %}({{ item.title }}){% endfor %}")
+        self.assertEqual(loader.render('template.html', {}), "(Home)")
+        self.assertEqual(loader.partial_renders, 2)
+
+    def test_shadowed_site_variable_not_cached(self):
+        loader = TemplateLoader(self.fs)
+        loader.site['nav'] = [{'url': '/', 'title': 'Home'}]
+        self.fs.write_text('template.html', "{% include \"nav.html\" %}")
+        self.assertEqual(loader.render('template.html', {}), "[Home]")
+        self.assertEqual(loader.render('template.html', {'nav': [{'title': 'Page'}]}), "[Page]")
+        self.assertEqual(loader.render('template.html', {}), "[Home]")
+
+    def test_recompiles_on_change(self):
+        loader = TemplateLoader(self.fs)
+        first = loader.load('template.html')
+        self.assertIs(loader.load('template.html'), first)
+        self.fs.write_text('template.html', "changed")
+        self.assertIsNot(loader.load('template.html'), first)
+        self.assertEqual(loader.render('template.html', {}), "changed")
+
+if __name__ == "__main__":
+    unittest.main()